@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Decoding time of representative results pages, a hundred rows carrying the
+HTML content of a web page each, with every installed JSON backend; the
+baseline decodes the body to str first, as ``response.json()`` does.
+
+    python -m benchmarks.json_benchmark
+"""
+
+import json
+import timeit
+
+from mixnode.error import MissingDependency
+from mixnode.jsonbackend import (BACKENDS, JsonBackend)
+
+from benchmarks.stub_server import StubServer
+
+ROWS_PER_PAGE = 100
+CELL_SIZE = 16384
+REPEAT = 50
+
+def main():
+    server = StubServer(pages=1, rows_per_page=ROWS_PER_PAGE, cell_size=CELL_SIZE)
+    try:
+        content = server.page(1)
+    finally:
+        server.server_close()
+    candidates = [('json (str)', lambda content: json.loads(content.decode('utf-8')))]
+    for name in BACKENDS:
+        try:
+            candidates.append((name, JsonBackend(name).loads))
+        except MissingDependency:
+            print('%-11s not installed' % name)
+    size = len(content) / 1048576.0
+    for name, loads in candidates:
+        elapsed = min(timeit.repeat(lambda: loads(content), number=REPEAT, repeat=3)) / REPEAT
+        print('%-11s %7.2f ms/page %8.1f MiB/s' % (name, elapsed * 1000, size / elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Download time of a FINISHED query with sequential paging against
+prefetching windows, on a local stub of /queries/{id}/results/N which adds
+a fixed latency to every page.
+
+    python -m benchmarks.prefetch_benchmark
+"""
+
+import time
+
+from mixnode import Mixnode
+
+from benchmarks.stub_server import StubServer
+
+PAGES = 100
+LATENCY = 0.02
+
+def run(server, window):
+    client = Mixnode('XXXXX')
+    client.setLag(0)
+    client.setPrefetch(window)
+    client.endpointUrl = server.url
+    started = time.time()
+    rows = sum(1 for _ in client.iter_rows('SELECT url FROM pages'))
+    elapsed = time.time() - started
+    client.close()
+    return rows, elapsed
+
+def main():
+    with StubServer(pages=PAGES, rows_per_page=100, delay=LATENCY) as server:
+        for window in (0, 2, 4, 8, 16):
+            rows, elapsed = run(server, window)
+            print('window %2d %5d pages %6d rows %8.3f s %8.3f ms/page' % (window, PAGES, rows, elapsed, elapsed * 1000.0 / PAGES))
+
+if __name__ == '__main__':
+    main()
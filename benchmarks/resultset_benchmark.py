@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Memory held by the results of a query as a list of dicts (execute) against
+a columnar ResultSet (execute_columnar).
+
+    python -m benchmarks.resultset_benchmark
+"""
+
+import tracemalloc
+
+from mixnode import Mixnode
+
+from benchmarks.stub_server import StubServer
+
+PAGES = 50
+ROWS_PER_PAGE = 2000
+
+def measure(method, server):
+    client = Mixnode('XXXXX')
+    client.setLag(0)
+    client.endpointUrl = server.url
+    tracemalloc.start()
+    result = getattr(client, method)('SELECT url, content_length, content FROM pages')
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    client.close()
+    return len(result), current
+
+def main():
+    with StubServer(pages=PAGES, rows_per_page=ROWS_PER_PAGE, cell_size=16) as server:
+        # Renders the pages up front so the server cache is not traced
+        for page in range(1, PAGES + 1):
+            server.page(page)
+        for method in ('execute', 'execute_columnar'):
+            rows, held = measure(method, server)
+            print('%-17s %7d rows %8.1f MiB %6.1f bytes/row' % (method, rows, held / 1048576.0, float(held) / rows))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Local stand-in for the Mixnode SQL API used by the benchmarks.
+
+Serves POST /queries, GET /queries/{id} and GET /queries/{id}/results/N for a
+single synthetic query whose result is split over a configurable number of
+FINISHED pages. A query submitted with a ``webhook_url`` gets its webhook
+called with the FINISHED query object.
+"""
+
+import json
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs
+    from urllib.request import Request, urlopen
+except ImportError:
+    raise SystemExit('The benchmarks require Python 3.7 or above')
+
+QUERY_ID = 'bench0000000000000'
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, payload, status=200):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        self.server.requests += 1
+        self._send(self.server.query_object())
+        if form.get('webhook_url'):
+            threading.Timer(self.server.webhook_delay, self.server.notify, (form['webhook_url'][0],)).start()
+
+    def do_DELETE(self):
+        self.server.requests += 1
+        query_object = self.server.query_object()
+        query_object['status'] = 'USER_CANCELED'
+        self._send(query_object)
+
+    def do_GET(self):
+        self.server.requests += 1
+        parts = self.path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'queries':
+            return self._send(self.server.query_object())
+        if len(parts) != 4 or parts[2] != 'results':
+            return self._send({'errors': {'message': 'Not found'}}, 404)
+        page = int(parts[3])
+        if page > self.server.pages:
+            return self._send({'errors': {'message': 'Not found'}}, 404)
+        if self.server.delay:
+            threading.Event().wait(self.server.delay)
+        self._send(self.server.page(page))
+
+class StubServer(ThreadingHTTPServer):
+    """
+    Threaded stub server; use as a context manager.
+
+    :param pages: Number of results pages of the synthetic query.
+    :param rows_per_page: Number of rows in every page.
+    :param cell_size: Length of the synthetic ``content`` column.
+    :param delay: Seconds of server side latency added to every results page.
+    :param webhook_delay: Seconds after which the webhook of a query is called.
+    """
+    daemon_threads = True
+
+    def __init__(self, pages=50, rows_per_page=100, cell_size=64, delay=0, webhook_delay=0):
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', 0), StubHandler)
+        self.pages = pages
+        self.rows_per_page = rows_per_page
+        self.cell_size = cell_size
+        self.delay = delay
+        self.webhook_delay = webhook_delay
+        self.webhooks = 0
+        self.requests = 0
+        self._pages = {}
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self.server_address[1]
+
+    def query_object(self):
+        return {
+            'object': 'query',
+            'query_id': QUERY_ID,
+            'status': 'PLANNING',
+            'error_msg': None,
+            'input_limit': 1073741824,
+            'data_scanned': self.pages * self.rows_per_page * self.cell_size,
+            'rows_scanned': self.pages * self.rows_per_page * 10,
+            'output_rows': self.pages * self.rows_per_page,
+            'results_download_url': self.url + '/download-results?query_id=' + QUERY_ID,
+        }
+
+    def notify(self, webhook_url):
+        query_object = self.query_object()
+        query_object['status'] = 'FINISHED'
+        body = json.dumps(query_object).encode('utf-8')
+        urlopen(Request(webhook_url, body, {'Content-Type': 'application/json'})).close()
+        self.webhooks += 1
+
+    def page(self, page):
+        if page not in self._pages:
+            payload = {
+                'status': 'FINISHED',
+                'error_msg': None,
+                'columns': [
+                    {'name': 'url', 'type': 'varchar', 'typeSignature': {'rawType': 'varchar'}},
+                    {'name': 'content_length', 'type': 'bigint', 'typeSignature': {'rawType': 'bigint'}},
+                    {'name': 'content', 'type': 'varchar', 'typeSignature': {'rawType': 'varchar'}},
+                ],
+                'rows': [['http://example%d.com/%d' % (page, index), index * 10, 'x' * self.cell_size] for index in range(self.rows_per_page)],
+            }
+            if page < self.pages:
+                payload['next_page'] = self.url + '/queries/' + QUERY_ID + '/results/' + str(page + 1)
+            self._pages[page] = json.dumps(payload).encode('utf-8')
+        return self._pages[page]
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
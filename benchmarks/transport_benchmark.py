@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Per-page latency of the pooled keep-alive transport against a fresh
+connection per request (the behaviour of module level requests.request).
+
+    python -m benchmarks.transport_benchmark
+"""
+
+import time
+
+import requests
+
+from mixnode import Mixnode
+from mixnode.transport import Transport
+
+from benchmarks.stub_server import StubServer
+
+PAGES = 200
+
+class UnpooledTransport(Transport):
+    """
+    Opens a new connection for every request, as the client used to.
+    """
+    def request(self, method, uri, data=None, headers=None, auth=None):
+        return requests.request(method, uri, data=data, headers=headers, auth=auth)
+
+def run(transport, server):
+    client = Mixnode('XXXXX', transport=transport)
+    client.setLag(0)
+    client.endpointUrl = server.url
+    started = time.time()
+    rows = sum(1 for _ in client.iter_rows('SELECT url FROM pages'))
+    elapsed = time.time() - started
+    client.close()
+    return rows, elapsed
+
+def main():
+    with StubServer(pages=PAGES, rows_per_page=10) as server:
+        for name, transport in (('unpooled', UnpooledTransport()), ('pooled', None)):
+            rows, elapsed = run(transport, server)
+            print('%-10s %5d pages %6d rows %8.3f s %8.3f ms/page' % (name, PAGES, rows, elapsed, elapsed * 1000.0 / PAGES))
+
+if __name__ == '__main__':
+    main()
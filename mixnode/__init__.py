@@ -33,5 +33,26 @@ __author__ = 'Mixnode'
 __version__ = '1.0.1'
 __license__ = 'Apache 2.0'
 
+import sys
+
 from .api_client import Mixnode
-from .error import (MixnodeError, KnownMixnodeError, ResponseError, ResponseServerError)
+from .batch import (BatchResult, BatchStats)
+from .cache import ResultCache
+from .checkpoint import Checkpoint
+from .cost import (CostStore, CostEstimate)
+from .decoder import Decoder
+from .error import (MixnodeError, KnownMixnodeError, ResponseError, ResponseServerError, MissingDependency, NotSupported)
+from .jsonbackend import JsonBackend
+from .metrics import (QueryListener, QueryMetrics, PrometheusListener)
+from .partition import (HashPartitions, OffsetPartitions, Aggregation)
+from .polling import (PollingPolicy, ConstantPolling, ExponentialBackoff)
+from .resultset import (ResultSet, Row)
+from .retry import RetryPolicy
+from .singleflight import SingleFlight
+from .sink import (Sink, MemorySink, NdjsonSink, CsvSink, ParquetSink, SqliteSink)
+from .throttle import Throttle
+from .transport import (Transport, RequestsTransport, HttpxTransport)
+from .webhook import WebhookReceiver
+
+if sys.version_info >= (3, 6):
+    from .async_client import (AsyncMixnode, AsyncTransport, AiohttpTransport, AsyncSingleFlight)
@@ -19,16 +19,36 @@
 
 
 # Standard python packages
-import requests
-from requests.auth import HTTPBasicAuth
 import time   
+from collections import deque
+from concurrent.futures import (ThreadPoolExecutor, as_completed)
 
 
 # Internal imports
-from .error import (MixnodeError, ResponseError, MissingQuery, MissingApiKey, ResponseServerError, GetError)
+from .batch import (BatchResult, BatchStats, MAX_WORKERS)
+from .cache import cacheKey
+from .cost import (CostStore, PROBE_INPUT_LIMIT)
+from .decoder import Decoder
+from .download import iterRecords
+from .export import (toTable, toReader)
+from .jsonbackend import JsonBackend
+from .metrics import (SLEEP_POLLING, SLEEP_RETRY, SLEEP_THROTTLE, SLEEP_WEBHOOK)
+from .partition import (PartitionedResult, SPLIT_STATUS, MAX_ATTEMPTS, isRetryable)
+from .error import (MixnodeError, ResponseError, MissingQuery, MissingApiKey, MissingWebhook, ResponseServerError, DownloadError, MissingDependency, PartitionError, GetError, QueryTimeout, QUERY_ERROR_STATUS)
+from .polling import (ConstantPolling, ExponentialBackoff)
+from .query import (Query, PAGINATION_STATE)
+from .resultset import ResultSet
+from .retry import RetryPolicy
+from .throttle import Throttle
+from .transport import (RequestsTransport, POOL_CONNECTIONS, POOL_MAXSIZE, TIMEOUT)
+from .webhook import (WAIT_POLL, WAIT_WEBHOOK)
 
-# Delay in sending subsequent requests in seconds
-LAG = 2 
+def _responseSize(response):
+    """
+    Size in bytes of the body of a response, 0 when it is not available
+    """
+    content = getattr(response, 'content', None)
+    return len(content) if isinstance(content, bytes) else 0
 
 class Mixnode(object):
     """
@@ -38,9 +58,17 @@ class Mixnode(object):
         client = Mixnode('Your_API_KEY')
 
     :param api_key: API Key obtained from Mixnode Portal.
+    :param transport: :class:`Transport <mixnode.transport.Transport>` shared by
+        every request of the client, defaults to a pooled keep-alive session.
+    :param pool_connections: Number of host pools of the default transport.
+    :param pool_maxsize: Keep-alive connections per host of the default transport.
+    :param max_retries: Retries of the default transport adapter, an int or a
+        :class:`urllib3.util.retry.Retry` instance.
+    :param timeout: (connect, read) seconds after which a request of the
+        default transport raises :exc:`RequestTimeout`, or a single number for both.
     :return: :class:`Mixnode <Mixnode>` object
     """
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, transport=None, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0, timeout=TIMEOUT):
         
         self.endpointUrl = 'https://api.mixnode.com'
         if (api_key is None):
@@ -48,9 +76,43 @@ class Mixnode(object):
         self.credentials = {
           'api_key': api_key + ':'
         };
+        self.auth = (self.credentials['api_key'], '')
+        if transport is None:
+            transport = RequestsTransport(pool_connections, pool_maxsize, max_retries, timeout=timeout)
+        self.transport = transport
+        self.transferStats = getattr(transport, 'stats', None)
         self.isDebugMode = False
         self.response = []
-        self.lag = LAG
+        self.query_id = None
+        self.lastQuery = None
+        self.lastBatchStats = None
+        self.prefetch = 0
+        self.bulkDownload = False
+        self.decodeTypes = False
+        self.cache = None
+        self.singleFlight = None
+        self.checkpoint = None
+        self.jsonBackend = JsonBackend()
+        self.pollingPolicy = ExponentialBackoff()
+        self.retryPolicy = RetryPolicy()
+        self.throttle = Throttle()
+        self.listeners = []
+        self.scanStats = False
+        self.webhook = None
+        self.queryTimeout = None
+        self.costStore = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Closes the connections pooled by the transport of the client
+        """
+        self.transport.close()
 
     def _buildRequestParams(self, path, http_method, form_params=None, skip_build_url=False):
         """
@@ -97,43 +159,826 @@ class Mixnode(object):
 
     def setLag(self, time_in_secs):
         """
-        Enables debugging and logs the queries being sent to Mixnode Server
+        Waits a constant delay between polls of a query still in progress.
+        Kept for backward compatibility, see :meth:`setPollingPolicy`.
 
-        :param path: isDebug <boolean>
+        :param time_in_secs: delay in seconds
+        """
+        self.setPollingPolicy(ConstantPolling(time_in_secs))
+
+    def setPollingPolicy(self, policy):
+        """
+        Sets the policy deciding how long to wait between polls of a query
+        which is still PLANNING or RUNNING, defaults to exponential backoff.
+
+        :param policy: :class:`PollingPolicy <mixnode.polling.PollingPolicy>`
+        """
+        self.pollingPolicy = policy
+
+    def setRetryPolicy(self, policy):
+        """
+        Sets the policy deciding which failed requests are fired again and
+        how long to wait first; by default results pages and query objects
+        are fetched again up to 5 times on transient failures, with
+        exponential backoff. None disables retrying.
+
+        :param policy: :class:`RetryPolicy <mixnode.retry.RetryPolicy>`
+        """
+        self.retryPolicy = policy
+
+    def setThrottle(self, throttle):
+        """
+        Limits the rate of requests and of bytes received, and the number of
+        queries in flight; a throttle set on several clients, or shared by
+        several processes through its ``path``, applies to all of them
+        together. None removes the limits.
+
+        Examples:
+            throttle = Throttle(requests_per_second=10, max_queries=4)
+            client.setThrottle(throttle)
+            other_client.setThrottle(throttle)
+
+        :param throttle: :class:`Throttle <mixnode.throttle.Throttle>`
+        """
+        self.throttle = throttle if throttle is not None else Throttle()
+
+    def addListener(self, listener):
+        """
+        Notifies a listener of the lifecycle of every query of the client:
+        submission, requests with their latency and size, sleeps and end of
+        the query with its metrics.
+
+        Examples:
+            client.addListener(PrometheusListener())
+
+        :param listener: :class:`QueryListener <mixnode.metrics.QueryListener>`
+        """
+        self.listeners.append(listener)
+
+    def removeListener(self, listener):
+        """
+        Stops notifying a listener added by :meth:`addListener`
+
+        :param listener: :class:`QueryListener <mixnode.metrics.QueryListener>`
+        """
+        self.listeners.remove(listener)
+
+    def setScanStats(self, is_fetch):
+        """
+        Fetches the query object of every query which completed, one more
+        request per query, to keep its scan statistics (data_scanned,
+        rows_scanned, output_size, output_rows, created_ts, ended_ts) on
+        ``query.metrics.server``.
+
+        :param is_fetch: <boolean>
+        """
+        self.scanStats = is_fetch
+
+    def setQueryTimeout(self, seconds):
+        """
+        Bounds the wall-clock time of every query, from its submission to its
+        last page: a query still running once it is over is cancelled on the
+        server and :exc:`QueryTimeout` is raised; None disables the timeout.
+
+        :param seconds: timeout of a query in seconds
+        """
+        self.queryTimeout = seconds
+
+    def setCostStore(self, store):
+        """
+        Keeps the scan statistics of every query which completes in a store,
+        fetching its query object once it is over, so that :meth:`estimate`
+        can predict the cost of queries of the same shape; None disables it.
+
+        :param store: :class:`CostStore <mixnode.cost.CostStore>`
+        """
+        self.costStore = store
+
+    def estimate(self, query=None, input_limit=None, probe=False, probe_limit=PROBE_INPUT_LIMIT):
+        """
+        Predicts the bytes and rows a query scans, the rows it returns and
+        the time it takes, out of the past runs of queries of the same shape
+        kept by the cost store, see :meth:`setCostStore`. Without a cost
+        store only a probe can be estimated, and it is not kept.
+
+        Examples:
+            estimate = client.estimate(query, input_limit=1 << 40, probe=True)
+            print(estimate.data_scanned, estimate.elapsed)
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Input limit the query would run with
+        :param probe:  Runs the query with a small input limit first when no
+            query of its shape ran yet; its results are not fetched
+        :param probe_limit:  Input limit of the probe in bytes
+        :return: :class:`CostEstimate <mixnode.cost.CostEstimate>`, None when
+            nothing is known of the shape of the query
+        """
+        if query is None:
+            raise MissingQuery()
+        store = self.costStore if self.costStore is not None else CostStore()
+        try:
+            estimate = store.estimate(query, input_limit)
+            if estimate is None and probe:
+                if input_limit is not None:
+                    probe_limit = min(probe_limit, input_limit)
+                self._probe(query, probe_limit, store)
+                estimate = store.estimate(query, input_limit)
+            return estimate
+        finally:
+            if store is not self.costStore:
+                store.close()
+
+    def _probe(self, query, input_limit, store):
+        """
+        Runs a query until it is over without fetching its results and
+        records its scan statistics
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Input limit of the probe
+        :param store:  :class:`CostStore <mixnode.cost.CostStore>` recording them
+        """
+        q = Query(self, self._buildFormParams(query, input_limit))
+        try:
+            self._waitForInfo(q)
+        finally:
+            self._finishMetrics(q)
+        if q.info is not None:
+            store.record(query, input_limit, q.info, q.metrics.elapsed())
+
+    def setPrefetch(self, window):
+        """
+        Once a query is FINISHED, fetches up to ``window`` results pages
+        concurrently ahead of the consumer, still delivering them in order.
+        Disabled (0) by default.
+
+        :param window: number of pages fetched ahead
+        """
+        self.prefetch = window
+
+    def setBulkDownload(self, is_bulk):
+        """
+        Makes :meth:`execute` and :meth:`iter_rows` wait for the query to
+        finish and stream its whole results file from ``results_download_url``
+        instead of paging through JSON. Values are then returned as text, as
+        written in the results file.
+
+        :param is_bulk: <boolean>
+        """
+        self.bulkDownload = is_bulk
+
+    def setDecodeTypes(self, is_decode):
+        """
+        Converts values to the Python type matching the type of their column
+        (double NaN/Infinity, decimal, date, timestamp, time, varbinary and
+        arrays/maps/rows of them) instead of returning the raw JSON values.
+
+        :param is_decode: <boolean>
+        """
+        self.decodeTypes = is_decode
+
+    def setCache(self, cache):
+        """
+        Consults a result cache before submitting a query and stores the
+        results of the queries run to completion; None disables caching.
+
+        Examples:
+            client.setCache(ResultCache('/var/cache/mixnode', ttl=3600, max_bytes=10 << 30))
+
+        :param cache: :class:`ResultCache <mixnode.cache.ResultCache>`
+        """
+        self.cache = cache
+
+    def setSingleFlight(self, group):
+        """
+        Makes concurrent identical requests (same normalized query and input
+        limit) share one server-side query and one download, the pages being
+        fanned out to every caller; None disables it.
+
+        :param group: :class:`SingleFlight <mixnode.singleflight.SingleFlight>`, may be shared by clients of the same account
+        """
+        self.singleFlight = group
+
+    def setCheckpoint(self, checkpoint):
+        """
+        Spools the results pages of every query and records its progress
+        after each page, so that :meth:`resume` can continue an interrupted
+        download; None disables checkpointing.
+
+        :param checkpoint: :class:`Checkpoint <mixnode.checkpoint.Checkpoint>`
+        """
+        self.checkpoint = checkpoint
+
+    def setJsonBackend(self, name):
+        """
+        Sets the JSON library decoding the responses of Mixnode server,
+        defaults to the fastest installed one.
+
+        :param name: orjson, ujson, simdjson or json
+        """
+        self.jsonBackend = JsonBackend(name)
+
+    def setWebhook(self, receiver):
         """
-        self.lag = time_in_secs    
+        Sets the webhook receiver notified of the completion of the queries
+        fired with ``wait='webhook'``; it has to be reachable by Mixnode
+        server, e.g. through its ``public_url``. The client does not close it.
 
-    def execute(self, query=None, input_limit=None):
+        :param receiver: :class:`WebhookReceiver <mixnode.webhook.WebhookReceiver>`, None to unset it
+        """
+        self.webhook = receiver
+
+    def _webhookReceiver(self, wait):
+        """
+        Webhook receiver waited on by the queries of a wait mode, None when
+        they are polled
+
+        :param wait: WAIT_POLL or WAIT_WEBHOOK
+        :raises: :exc:`MissingWebhook` when no receiver was set
+        """
+        if wait == WAIT_POLL:
+            return None
+        if wait != WAIT_WEBHOOK:
+            raise ValueError('wait must be ' + WAIT_POLL + ' or ' + WAIT_WEBHOOK)
+        if self.webhook is None:
+            raise MissingWebhook()
+        return self.webhook
+
+    def execute(self, query=None, input_limit=None, wait=WAIT_POLL, max_rows=None, deadline=None):
         """
         Interface exposing functionality to make calls to Mixnode server
 
         :param query:  SQL query sent to the backend
         :param input_limit:  Sets the input limit on the data to be scanned
+        :param wait:  poll to poll the query until it is over, webhook to
+            wait for Mixnode server to notify its completion, see :meth:`setWebhook`
+        :param max_rows:  Returns at most this many records, stopping the
+            query as soon as they were fetched
+        :param deadline:  Seconds after which the query is stopped and the
+            records fetched so far are returned
+        """
+        self.response = list(self.iter_rows(query, input_limit, wait, max_rows, deadline))
+        return self.response
+
+    def execute_columnar(self, query=None, input_limit=None):
+        """
+        Fires a query and stores its records column by column instead of
+        building a dict per row.
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Sets the input limit on the data to be scanned
+        :return: :class:`ResultSet <mixnode.resultset.ResultSet>`
+        """
+        resultset = ResultSet()
+        q = Query(self, self._buildFormParams(query, input_limit))
+        for payload in self._request(q):
+            resultset.addPage(payload, self._decoder(q, payload))
+        return resultset
+
+    def execute_to(self, sink, query=None, input_limit=None):
+        """
+        Fires a query and writes every results page to a sink as it arrives,
+        so that results larger than memory can be extracted. The sink is
+        closed once the query is over, even when it failed.
+
+        Examples:
+            client.execute_to(CsvSink('/data/results.csv'), query)
+
+        :param sink: :class:`Sink <mixnode.sink.Sink>` written to
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Sets the input limit on the data to be scanned
+        :return: the sink
+        """
+        q = Query(self, self._buildFormParams(query, input_limit))
+        try:
+            for payload in self._request(q):
+                if not payload.get('columns'):
+                    continue
+                if sink.decode:
+                    payload = self._decode(q, payload)
+                sink.write(payload['columns'], payload.get('rows') or [])
+        finally:
+            sink.close()
+        return sink
+
+    def execute_arrow(self, query=None, input_limit=None):
+        """
+        Fires a query and builds an Arrow table out of it, appending every
+        results page straight into a record batch; requires ``pip install pyarrow``.
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Sets the input limit on the data to be scanned
+        :return: :class:`pyarrow.Table`
+        """
+        return toTable(self._request(Query(self, self._buildFormParams(query, input_limit))))
+
+    def stream_arrow(self, query=None, input_limit=None):
+        """
+        Fires a query and returns a reader yielding a record batch per results
+        page as it arrives, for out-of-core processing; requires ``pip install pyarrow``.
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Sets the input limit on the data to be scanned
+        :return: :class:`pyarrow.RecordBatchReader`
+        """
+        return toReader(self._request(Query(self, self._buildFormParams(query, input_limit))))
+
+    def execute_df(self, query=None, input_limit=None):
+        """
+        Fires a query and builds a pandas DataFrame out of it, through Arrow
+        when pyarrow is installed and from a :class:`ResultSet <mixnode.resultset.ResultSet>`
+        otherwise; requires ``pip install pandas``.
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Sets the input limit on the data to be scanned
+        :return: :class:`pandas.DataFrame`
         """
+        try:
+            import pandas
+        except ImportError:
+            raise MissingDependency('pandas')
+        try:
+            import pyarrow
+        except ImportError:
+            resultset = self.execute_columnar(query, input_limit)
+            return pandas.DataFrame(dict((name, resultset.column(name)) for name in resultset.names), columns=resultset.names)
+        return self.execute_arrow(query, input_limit).to_pandas()
+
+    def iter_rows(self, query=None, input_limit=None, wait=WAIT_POLL, max_rows=None, deadline=None):
+        """
+        Streams the records of a query as each result page arrives instead of
+        accumulating the whole result in memory. The query is cancelled on
+        the server when it is still running once ``max_rows`` records were
+        fetched, at its deadline or when the generator is closed.
+
+        Examples:
+            for record in client.iter_rows(query, max_rows=100):
+                print(record)
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Sets the input limit on the data to be scanned
+        :param wait:  poll or webhook, see :meth:`execute`
+        :param max_rows:  Yields at most this many records
+        :param deadline:  Seconds after which no more results page is fetched
+        :return: generator of records
+        """
+        webhook = self._webhookReceiver(wait)
+        form_params = self._buildFormParams(query, input_limit, webhook)
+        q = Query(self, form_params, webhook=webhook)
+        q.max_rows = max_rows
+        if deadline is not None:
+            q.deadline = time.time() + deadline
+        return self._execute(q)
+
+    def execute_many(self, queries, input_limit=None, max_workers=MAX_WORKERS, wait=WAIT_POLL):
+        """
+        Fires many queries at once and waits for all of them. A failing query
+        does not stop the others: its error is kept on its result.
+
+        Examples:
+            for result in client.execute_many([query1, query2], max_workers=4):
+                print(result.query_id, result.records, result.error)
+            print(client.lastBatchStats)
+
+        :param queries:  list of SQL queries sent to the backend
+        :param input_limit:  Sets the input limit on the data scanned by every query
+        :param max_workers:  Number of threads polling the queries concurrently
+        :param wait:  poll or webhook, see :meth:`execute`
+        :return: list of :class:`BatchResult <mixnode.batch.BatchResult>` in the order of the queries
+        """
+        results = [None] * len(queries)
+        for result in self.iter_many(queries, input_limit, max_workers, wait):
+            results[result.index] = result
+        return results
+
+    def iter_many(self, queries, input_limit=None, max_workers=MAX_WORKERS, wait=WAIT_POLL):
+        """
+        Fires many queries at once and yields the result of each one as soon
+        as it completes. Every query is submitted to /queries up front, then
+        the queries are polled concurrently by a pool of threads, each with
+        its own isolated state. Aggregate throughput is kept on
+        ``self.lastBatchStats``. Closing the generator early cancels the
+        queries still running on the server.
+
+        :param queries:  list of SQL queries sent to the backend
+        :param input_limit:  Sets the input limit on the data scanned by every query
+        :param max_workers:  Number of threads polling the queries concurrently
+        :param wait:  poll or webhook, see :meth:`execute`
+        :return: generator of :class:`BatchResult <mixnode.batch.BatchResult>` in completion order
+        """
+        webhook = self._webhookReceiver(wait)
+        batch = [Query(self, self._buildFormParams(query, input_limit, webhook), webhook=webhook) for query in queries]
+        results = [BatchResult(index, query) for index, query in enumerate(queries)]
+        stats = self.lastBatchStats = BatchStats()
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        futures = {}
+        try:
+            # Submits every query before polling any of them, unless the
+            # queries in flight are bounded: each one is then submitted once
+            # it got a slot
+            if self.throttle.governor is None:
+                list(pool.map(self._submit, batch))
+            futures = dict((pool.submit(self._collect, query, result), (query, result)) for query, result in zip(batch, results))
+            for future in as_completed(futures):
+                query, result = futures[future]
+                stats.add(result, query)
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+            for query in batch:
+                if query.isRunning():
+                    self._cancel(query)
+            pool.shutdown(wait=False)
+
+    def execute_partitioned(self, template, partitions, input_limit=None, max_workers=MAX_WORKERS, aggregation=None, max_attempts=MAX_ATTEMPTS):
+        """
+        Runs a query as concurrent shards, each selecting a disjoint part of
+        its result, and merges their records. A shard failing on a memory or
+        output limit is split in two, and a shard failing otherwise is run
+        again, until it ran ``max_attempts`` times. Every shard scans the
+        whole input, within ``input_limit``.
 
+        Examples:
+            result = client.execute_partitioned(
+                "SELECT url_host, count(*) AS pages FROM pages WHERE {partition} GROUP BY url_host",
+                HashPartitions('url_host', 8))
+            print(result.records, result.retries)
+
+        :param template:  SQL query with a ``{partition}`` placeholder
+        :param partitions:  :class:`Partitions <mixnode.partition.Partitions>` plan
+        :param input_limit:  Sets the input limit on the data scanned by every shard
+        :param max_workers:  Number of shards run concurrently
+        :param aggregation:  :class:`Aggregation <mixnode.partition.Aggregation>`
+            merging the partial aggregates of the shards
+        :param max_attempts:  Runs of a shard, its halves included
+        :return: :class:`PartitionedResult <mixnode.partition.PartitionedResult>`
+        :raises: :exc:`PartitionError` when shards still failed
+        """
+        result = PartitionedResult(template)
+        pending = [(shard, 1) for shard in partitions.shards()]
+        while pending:
+            queries = [partitions.query(template, shard) for shard, attempt in pending]
+            retry = []
+            for (shard, attempt), batch_result in zip(pending, self.execute_many(queries, input_limit, max_workers)):
+                if batch_result.isSuccessful():
+                    result.shards.append((shard, batch_result))
+                    continue
+                if attempt >= max_attempts or not isRetryable(batch_result.error, batch_result.query_id is not None):
+                    result.failed.append((shard, batch_result))
+                    continue
+                halves = partitions.split(shard) if batch_result.error.status in SPLIT_STATUS else None
+                if halves:
+                    result.splits += 1
+                    retry.extend((half, attempt + 1) for half in halves)
+                else:
+                    result.retries += 1
+                    retry.append((shard, attempt + 1))
+            pending = retry
+        if result.failed:
+            raise PartitionError(result)
+        result.shards.sort(key=lambda shard: shard[0])
+        records = (record for shard, batch_result in result.shards for record in batch_result.records)
+        result.records = aggregation.merge(records) if aggregation is not None else list(records)
+        return result
+
+    def _submit(self, query):
+        """
+        Fires POST /queries for a query of a batch
+
+        :param query: :class:`Query <mixnode.query.Query>` to submit
+        """
+        try:
+            while query.state == PAGINATION_STATE['SUBMITTED']:
+                self._step(query)
+        except MixnodeError:
+            pass
+
+    def _collect(self, query, result):
+        """
+        Pages a submitted query of a batch to completion, keeping its records
+        or its error on the result
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        :param result: :class:`BatchResult <mixnode.batch.BatchResult>` to fill in
+        """
+        started = time.time()
+        try:
+            with self.throttle.query():
+                for payload in self._instrumentedPages(query, self._pages(query)):
+                    result.records.extend(self._buildrecords(self._decode(query, payload)))
+        except MixnodeError:
+            pass
+        result.query_id = query.query_id
+        result.error = query.error
+        result.timings = query.timings
+        result.retries = query.retries
+        result.elapsed = time.time() - started
+        return result
+
+    def _buildFormParams(self, query, input_limit, webhook=None):
+        """
+        Constructs the form parameters of POST /queries
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Sets the input limit on the data to be scanned
+        :param webhook:  :class:`WebhookReceiver <mixnode.webhook.WebhookReceiver>`
+            Mixnode server notifies once the query is over
+        """
         if (query is None):
           raise MissingQuery()
-          
+
         form_params = {
           'query_str': query
         };
 
         if (input_limit or input_limit == 0):
           form_params['input_limit'] = input_limit
+        if webhook is not None:
+          form_params['webhook_url'] = webhook.url
+        return form_params
 
-        return self._execute('/queries', 'POST', form_params)
+    def stream(self, query=None, input_limit=None, wait=WAIT_POLL, max_rows=None, deadline=None):
+        """
+        Alias of :meth:`iter_rows`.
 
-    def _execute(self, path, http_method, form_params):
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Sets the input limit on the data to be scanned
+        :param wait:  poll or webhook, see :meth:`execute`
+        :param max_rows:  Yields at most this many records
+        :param deadline:  Seconds after which no more results page is fetched
+        """
+        return self.iter_rows(query, input_limit, wait, max_rows, deadline)
+
+    def iter_download(self, query=None, input_limit=None):
+        """
+        Waits for a query to finish then streams its results file from
+        ``results_download_url``, parsing it incrementally into records.
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Sets the input limit on the data to be scanned
+        :return: generator of records
+        """
+        form_params = self._buildFormParams(query, input_limit)
+        return self._iterDownload(Query(self, form_params))
+
+    def download(self, query=None, path=None, input_limit=None):
+        """
+        Waits for a query to finish then streams its results file from
+        ``results_download_url`` to disk, chunk by chunk.
+
+        Examples:
+            client.download(query, '/tmp/results.csv')
+
+        :param query:  SQL query sent to the backend
+        :param path:  Path of the file written
+        :param input_limit:  Sets the input limit on the data to be scanned
+        :return: number of bytes written
+        """
+        q = Query(self, self._buildFormParams(query, input_limit))
+        written = 0
+        with self.throttle.query():
+            try:
+                with open(path, 'wb') as results_file:
+                    for chunk in self._stream(self._waitForResults(q), q):
+                        results_file.write(chunk)
+                        written += len(chunk)
+                q.finish()
+            finally:
+                self._endQuery(q)
+        return written
+
+    def attach(self, query_id, page=1):
+        """
+        Streams the records of an already submitted query, starting at the
+        given results page; used to resume an interrupted download.
+
+        Examples:
+            for record in client.attach(saved_query_id, saved_page):
+                print(record)
+
+        :param query_id: id of the query returned by Mixnode server
+        :param page: results page to start from
+        :return: generator of records
+        """
+        return self._execute(Query(self, query_id=query_id, page=page))
+
+    def resume(self, query_id):
+        """
+        Streams the records of a query interrupted while checkpointing:
+        replays the pages spooled by the earlier run, then continues paging
+        from the last completed page without submitting the query again.
+        Starts from the first results page when the query has no checkpoint.
+
+        Examples:
+            for query_id in client.checkpoint.queries():
+                for record in client.resume(query_id):
+                    print(record)
+
+        :param query_id: id of the query returned by Mixnode server
+        :return: generator of records
+        """
+        q = Query(self, query_id=query_id)
+        if self.checkpoint is not None:
+            q.checkpoint = self.checkpoint.load(query_id)
+        return self._execute(q)
+
+    def _execute(self, query):
+        """
+        Private function to implement execute workflow: yields at most
+        ``query.max_rows`` records and cancels the query on the server if it
+        is still running once they were yielded or the generator is closed.
+        A query with no row to return is never submitted.
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        :return: generator of records
+        """
+        if query.max_rows == 0:
+            query.stop()
+            return
+        records = self._iterDownload(query) if self.bulkDownload else self._iterRecords(query)
+        try:
+            for count, record in enumerate(records):
+                if query.max_rows is not None and count >= query.max_rows:
+                    break
+                yield record
+        finally:
+            if query.isRunning() and not self._isShared(query):
+                self._cancel(query)
+            records.close()
+
+    def _expired(self, query):
+        """
+        Stops a query which reached its deadline, and cancels then fails one
+        which outlived the query timeout
+
+        :param query: :class:`Query <mixnode.query.Query>` about to fire a request
+        :return: True when the query was stopped
+        :raises: :exc:`QueryTimeout` when the query timed out
+        """
+        if query.isTimedOut():
+            err = QueryTimeout()
+            if query.isRunning():
+                self._cancel(query)
+            query.fail(err)
+            raise err
+        if query.isExpired():
+            query.stop()
+            return True
+        return False
+
+    def _iterRecords(self, query):
+        """
+        Builds the records of the results pages of a query
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        :return: generator of records
+        """
+        for payload in self._request(query):
+            for record in self._buildrecords(self._decode(query, payload)):
+                yield record
+
+    def cancel(self, query_id):
+        """
+        Cancels a query on Mixnode server, e.g. one left running by another
+        process; cancelling a query which is already over does nothing.
+
+        Examples:
+            client.cancel(client.query_id)
+
+        :param query_id: id of the query returned by Mixnode server
+        :raises: :exc:`MixnodeError` when the query could not be cancelled
         """
-        Private function to implement execute workflow
+        try:
+            self.__request(Query(self, query_id=query_id).cancelRequest())
+        except ResponseServerError as err:
+            # The query object of a cancelled query has the USER_CANCELED status
+            if err.status != QUERY_ERROR_STATUS['USER_CANCELED']:
+                raise
+
+    def _cancel(self, query):
+        """
+        Stops a query and cancels it on the server, on a best effort basis:
+        a query which could not be cancelled is left to complete.
+
+        :param query: :class:`Query <mixnode.query.Query>` to cancel
+        """
+        query.stop()
+        try:
+            self.__request(query.cancelRequest(), query)
+        except ResponseServerError as err:
+            if err.status != QUERY_ERROR_STATUS['USER_CANCELED'] and self.isDebugMode:
+                print ('could not cancel query ' + query.query_id + ': ' + str(err))
+        except MixnodeError as err:
+            if self.isDebugMode:
+                print ('could not cancel query ' + query.query_id + ': ' + str(err))
+
+    def _iterDownload(self, query):
+        """
+        Streams and parses the results file of a query
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        :return: generator of records
+        """
+        with self.throttle.query():
+            try:
+                uri = self._waitForResults(query)
+                if uri is None:
+                    return
+                for record in iterRecords(self._stream(uri, query)):
+                    yield record
+                query.finish()
+            finally:
+                self._endQuery(query)
+
+    def _stream(self, uri, query):
+        """
+        Streams a results file through the transport, within the rate limits of the throttle
+
+        :param uri: results_download_url of a query
+        :param query: :class:`Query <mixnode.query.Query>` the file belongs to
+        """
+        self._sleep(self.throttle.requestDelay(), query, SLEEP_THROTTLE)
+        started = time.time()
+        received = 0
+        try:
+            for chunk in self.transport.stream(uri):
+                received += len(chunk)
+                yield chunk
+                self._sleep(self.throttle.responseDelay(len(chunk)), query, SLEEP_THROTTLE)
+        finally:
+            query.metrics.addRequest(time.time() - started, received, False)
+
+    def _waitForResults(self, query):
+        """
+        Submits a query if needed and polls its query object until it is no
+        longer in progress
+
+        :param query: :class:`Query <mixnode.query.Query>` to wait for
+        :return: results_download_url of the query, None if it reached its
+            deadline first
+        """
+        self._waitForInfo(query)
+        if query.state == PAGINATION_STATE['CANCELED']:
+            return None
+        if not (query.info and query.info.get('results_download_url')):
+            raise DownloadError(None, 'the query has no results_download_url')
+        return query.info['results_download_url']
+
+    def _waitForInfo(self, query):
+        """
+        Submits a query if needed and polls its query object until it is no
+        longer in progress, or until its deadline
+
+        :param query: :class:`Query <mixnode.query.Query>` to wait for
+        """
+        self.lastQuery = query
+        while query.state == PAGINATION_STATE['SUBMITTED']:
+            self._step(query)
+        while query.state == PAGINATION_STATE['POLLING']:
+            if query.webhook is not None:
+                self._waitForWebhook(query)
+                continue
+            self._sleep(query.delay(), query, SLEEP_POLLING)
+            if self._expired(query):
+                break
+            try:
+                info = self.__request(query.infoRequest(), query)
+            except MixnodeError as err:
+                query.fail(err)
+                raise
+            query.feedInfo(info)
+        self.query_id = query.query_id
 
-        :param path: URL to invoke.
-        :param http_method:  HTTP method to use 
-        :param form_params:  A map of form parameters and their values.
+    def _decode(self, query, payload):
         """
-        request_params = self._buildRequestParams(path, http_method, form_params) 
-        response = self._request(request_params)
-        return response
+        Decodes the rows of a results page when type decoding is enabled, with
+        the decoder compiled once per query from the columns of its first page
+
+        :param query: :class:`Query <mixnode.query.Query>` the page belongs to
+        :param payload: results page returned by Mixnode server
+        """
+        decoder = self._decoder(query, payload)
+        if decoder is None:
+            return payload
+        decoded = dict(payload)
+        decoded['rows'] = decoder.decodeRows(payload['rows'])
+        return decoded
+
+    def _decoder(self, query, payload):
+        """
+        Decoder of the rows of a results page, None when type decoding is
+        disabled or no column needs a conversion
+
+        :param query: :class:`Query <mixnode.query.Query>` the page belongs to
+        :param payload: results page returned by Mixnode server
+        """
+        if not self.decodeTypes or not payload.get('rows'):
+            return None
+        if query.decoder is None:
+            query.decoder = Decoder(payload['columns'])
+        if query.decoder.isIdentity:
+            return None
+        return query.decoder
 
     def _buildrecords(self, raw_response):
         """
@@ -152,51 +997,416 @@ class Mixnode(object):
         return records 
 
 
-    def _request(self, request_params):
+    def _request(self, query):
         """
-        Function to handle as below:
-        1. timeout if supplied by the user wants to cancel the query after certain period of time
-        2. handles paging response from Mixnode server.
-        Find more about it here https://www.mixnode.com/docs/sql-api/queries
+        Drives the pagination state machine of a query, see
+        https://www.mixnode.com/docs/sql-api/queries
 
-        :param request_params:  request parameters which will be needed for firing subsequent queries
+        Yields every results page returned by Mixnode server, one page at a
+        time, so callers only ever hold a single page in memory. The timings
+        spent in every state are kept on ``self.lastQuery.timings``.
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
         """
+        self.lastQuery = query
+        if self._isShared(query):
+            key = (self.credentials['api_key'], cacheKey(query.form_params['query_str'], query.form_params.get('input_limit')))
+            query, pages = self.singleFlight.join(key, query, self._sourcePages)
+            self.lastQuery = query
+        else:
+            pages = self._sourcePages(query)
+        for payload in pages:
+            self.query_id = query.query_id
+            yield payload
+        self.query_id = query.query_id
+        if self.isDebugMode:
+            print ('query ' + str(query.query_id) + ' ' + query.state)
+            print (query.timings)
 
-        # Fires first POST request with parameters
-        fragment = self.__request(request_params)
-        if (fragment.get('query_id') and fragment['query_id']):
-          self.query_id = fragment['query_id']
-          # Once we have the query id, fire page 1 GET request
-          queryPath = '/queries/' + fragment['query_id'] + '/results/1'
-          requestParams = self._buildRequestParams(queryPath, 'GET')
-          return self._request(requestParams)
-        # Subsequent requests should have next_page attribute along with the paging
-        # information to make subsequent calls.
-        if (fragment.get('next_page') and fragment['next_page']):
-            requestParams = self._buildRequestParams(fragment['next_page'], 'GET', None, True)
-            return self._request(requestParams)
-        # Returns the built response once the next_page attribute is not a part of response from previous requests
-        return self.response
+    def _isShared(self, query):
+        """
+        True when the pages of a query are shared with the identical queries
+        in flight; queries with a budget always run on their own.
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        """
+        return self.singleFlight is not None and bool(query.form_params) and not query.hasBudget()
 
-    def __request(self, request_params):
+    def _sourcePages(self, query):
         """
-        Synchronous function to make API calls using requests library
+        Results pages of a query, out of the cache when one is set
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        """
+        if self.cache is not None and query.form_params:
+            return self._cachedPages(query)
+        return self._fetchPages(query)
+
+    def _fetchPages(self, query):
+        """
+        Results pages of a query fetched from Mixnode server, checkpointed
+        when a checkpoint is set
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        """
+        if self.checkpoint is not None:
+            pages = self._checkpointedPages(query)
+        else:
+            pages = self._pages(query)
+        pages = self._instrumentedPages(query, pages)
+        if self.throttle.governor is not None:
+            return self._governedPages(pages)
+        return pages
+
+    def _instrumentedPages(self, query, pages):
+        """
+        Ends the metrics of a query once its pages were fetched
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        :param pages: generator of the results pages of the query
+        """
+        try:
+            for payload in pages:
+                yield payload
+        finally:
+            self._endQuery(query)
+
+    def _endQuery(self, query):
+        """
+        Completes the metrics of a query which is over, fetching its scan
+        statistics if enabled or kept in the cost store, and notifies the listeners
+
+        :param query: :class:`Query <mixnode.query.Query>` which is over
+        """
+        if self._fetchesScanStats(query):
+            try:
+                query.metrics.setServerStats(self.__request(query.infoRequest(), query))
+            except MixnodeError:
+                pass
+        self._recordCost(query)
+        self._finishMetrics(query)
+
+    def _fetchesScanStats(self, query):
+        return (self.scanStats or self.costStore is not None) and bool(query.query_id) and query.state == PAGINATION_STATE['DONE']
+
+    def _recordCost(self, query):
+        """
+        Keeps the scan statistics of a completed query in the cost store
+
+        :param query: :class:`Query <mixnode.query.Query>` which is over
+        """
+        if self.costStore is None or not query.form_params or not query.metrics.server:
+            return
+        self.costStore.record(query.form_params['query_str'], query.form_params.get('input_limit'), query.metrics.server, query.metrics.elapsed())
+
+    def _finishMetrics(self, query):
+        query.metrics.end()
+        self._emit('onQueryEnd', query)
+        if self.isDebugMode:
+            print (query.metrics)
+
+    def _emit(self, event, *args):
+        """
+        Notifies every listener of an event
+
+        :param event: name of the method of :class:`QueryListener <mixnode.metrics.QueryListener>` called
+        """
+        for listener in self.listeners:
+            getattr(listener, event)(*args)
+
+    def _sleep(self, seconds, query, reason):
+        """
+        Sleeps on behalf of a query, accounting it on its metrics
+
+        :param seconds: duration of the sleep, nothing is done when 0
+        :param query: :class:`Query <mixnode.query.Query>`, may be None
+        :param reason: SLEEP_POLLING, SLEEP_RETRY or SLEEP_THROTTLE
+        """
+        if not seconds:
+            return
+        if query is not None:
+            query.metrics.addSleep(seconds, reason)
+            self._emit('onSleep', query, seconds, reason)
+        time.sleep(seconds)
+
+    def _governedPages(self, pages):
+        """
+        Holds a query slot of the throttle while the pages of a query are fetched
+
+        :param pages: generator of the results pages of a query
+        """
+        with self.throttle.query():
+            for payload in pages:
+                yield payload
+
+    def _checkpointedPages(self, query):
+        """
+        Spools the results pages of a query as they arrive and removes its
+        checkpoint once they were all consumed. A resumed query first
+        replays the pages of its checkpoint, feeding them back to its state
+        machine to restore the page to fetch next.
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        """
+        while query.state == PAGINATION_STATE['SUBMITTED']:
+            self._step(query)
+        if query.query_id is None:
+            return
+        if query.checkpoint is not None:
+            for payload in self.checkpoint.pages(query.checkpoint):
+                query.feed(payload)
+                yield payload
+        writer = self.checkpoint.writer(query, query.checkpoint)
+        try:
+            for payload in self._pages(query):
+                writer.addPage(payload, query)
+                yield payload
+        finally:
+            writer.close()
+        self.checkpoint.remove(query.query_id)
+
+    def _cachedPages(self, query):
+        """
+        Replays the result of a query out of the cache, or runs it and stores
+        its pages once it completes
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        """
+        query_str = query.form_params['query_str']
+        input_limit = query.form_params.get('input_limit')
+        cached = self.cache.get(query_str, input_limit, self.credentials['api_key'])
+        if cached is not None:
+            query.query_id = cached.query_id
+            for payload in cached.pages():
+                query.rows += len(payload['rows'])
+                yield payload
+            query.finish()
+            return
+        writer = self.cache.writer(query_str, input_limit, self.credentials['api_key'])
+        try:
+            for payload in self._fetchPages(query):
+                writer.addPage(payload)
+                yield payload
+            if query.state == PAGINATION_STATE['DONE']:
+                writer.commit(query.query_id)
+        finally:
+            writer.discard()
+
+    def _pages(self, query):
+        """
+        Yields the results pages of a query, switching to :meth:`_prefetch`
+        once it is FINISHED when prefetching is enabled.
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        """
+        while not query.isDone():
+            if query.webhook is not None and query.state == PAGINATION_STATE['POLLING']:
+                self._waitForWebhook(query)
+                continue
+            if self.prefetch and query.state == PAGINATION_STATE['PAGING']:
+                for payload in self._prefetch(query):
+                    yield payload
+                continue
+            payload = self._step(query)
+            if payload is not None:
+                yield payload
+
+    def _waitForWebhook(self, query):
+        """
+        Blocks until the webhook receiver of a query is notified of its
+        completion, polling its query object once every ``poll_interval``
+        seconds in case the webhook was lost
+
+        :param query: :class:`Query <mixnode.query.Query>` in the POLLING state
+        """
+        started = time.time()
+        info = query.webhook.wait(query.query_id, self._webhookTimeout(query))
+        self._accountWebhook(query, time.time() - started)
+        if info is None and self._expired(query):
+            return
+        try:
+            if info is None:
+                info = self.__request(query.infoRequest(), query)
+            self._feedWebhook(query, info)
+        except MixnodeError as err:
+            query.fail(err)
+            raise
+
+    def _webhookTimeout(self, query):
+        """
+        Seconds to wait for the webhook of a query before polling it, or until its deadline
+        """
+        remaining = query.remaining()
+        if remaining is None:
+            return query.webhook.poll_interval
+        return min(query.webhook.poll_interval, remaining)
+
+    def _accountWebhook(self, query, seconds):
+        query.metrics.addSleep(seconds, SLEEP_WEBHOOK)
+        self._emit('onSleep', query, seconds, SLEEP_WEBHOOK)
+
+    def _feedWebhook(self, query, info):
+        """
+        Advances a query with the query object of its webhook, raising
+        :exc:`ResponseServerError` when it failed; the query is polled as
+        usual from then on.
+
+        :param query: :class:`Query <mixnode.query.Query>` in the POLLING state
+        :param info: query object
+        """
+        oError = GetError(info.get('status'), info.get('error_msg'))
+        if oError:
+            raise ResponseServerError(oError)
+        if query.feedInfo(info):
+            query.webhook = None
+
+    def _prefetch(self, query):
+        """
+        Yields the pages of a FINISHED query in order while keeping up to
+        ``self.prefetch`` of the following /queries/{id}/results/N pages in
+        flight. Pages requested past the last one are discarded unread, so
+        their errors never surface. Hands back to sequential paging if the
+        server links to a page other than the next one.
+
+        :param query: :class:`Query <mixnode.query.Query>` in the PAGING state
+        """
+        pool = ThreadPoolExecutor(max_workers=self.prefetch)
+        pending = deque()
+        page = query.page
+        try:
+            while not query.isDone():
+                if self._expired(query):
+                    return
+                while len(pending) < self.prefetch:
+                    request_params = self._buildRequestParams(query.pagePath(page), 'GET')
+                    pending.append((page, pool.submit(self.__request, request_params, query)))
+                    page += 1
+                expected, future = pending.popleft()
+                if expected != query.page:
+                    return
+                try:
+                    payload = future.result()
+                except MixnodeError as err:
+                    query.fail(err)
+                    raise
+                query.feed(payload)
+                yield payload
+        finally:
+            for _, future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    def _step(self, query):
+        """
+        Fires the next request of a query, waiting first if it is still in
+        progress, and feeds the response back to its state machine. Touches
+        no state of the client so it can run concurrently for many queries.
+
+        :param query: :class:`Query <mixnode.query.Query>` to advance
+        :return: the payload when it is a results page, None otherwise
+        """
+        request_params = query.next_request()
+        if request_params is None:
+            return None
+        if query.state == PAGINATION_STATE['SUBMITTED']:
+            self._emit('onQueryStart', query)
+        self._sleep(query.delay(), query, SLEEP_POLLING)
+        if self._expired(query):
+            return None
+        try:
+            payload = self.__request(request_params, query)
+        except MixnodeError as err:
+            query.fail(err)
+            raise
+        if query.feed(payload):
+            return payload
+        return None
+
+    def __request(self, request_params, query=None):
+        """
+        Synchronous function to make API calls using the transport of the
+        client, firing the request again on transient failures as decided
+        by the retry policy
 
         :param request_params:  request parameters which will be needed for firing subsequent queries
+        :param query: :class:`Query <mixnode.query.Query>` the retries are accounted on
+        """
+        attempt = 0
+        while True:
+            self._sleep(self.throttle.requestDelay(), query, SLEEP_THROTTLE)
+            try:
+                started = time.time()
+                response = self.transport.request(request_params['method'], request_params['uri'], data=request_params['form'], headers=request_params['headers'], auth=self.auth)
+                size = _responseSize(response)
+                self._account(request_params, query, time.time() - started, size)
+                self._sleep(self.throttle.responseDelay(size), query, SLEEP_THROTTLE)
+                return self._parseResponse(response)
+            except MixnodeError as err:
+                attempt += 1
+                delay = self._retryDelay(request_params, err, attempt, query)
+                if delay is None:
+                    raise
+            self._sleep(delay, query, SLEEP_RETRY)
+
+    def _account(self, request_params, query, latency, size):
+        """
+        Accounts a response on the metrics of its query and notifies the listeners
+
+        :param request_params: request parameters of the request
+        :param query: :class:`Query <mixnode.query.Query>` the request belongs to, may be None
+        :param latency: seconds between firing the request and reading its response
+        :param size: size in bytes of the body of the response
+        """
+        if query is None:
+            return
+        is_page = '/results/' in request_params['uri']
+        query.metrics.addRequest(latency, size, is_page)
+        self._emit('onRequest', query, request_params['method'], latency, size, is_page)
+
+    def _retryDelay(self, request_params, error, attempt, query=None):
+        """
+        Seconds to wait before firing a failed request again, None when its
+        error has to be raised; accounts the retry on the query
+
+        :param request_params: request parameters of the failed request
+        :param error: :class:`MixnodeError <MixnodeError>` raised by the request
+        :param attempt: number of the retry about to be made, starting at 1
+        :param query: :class:`Query <mixnode.query.Query>` the request belongs to
+        """
+        if self.retryPolicy is None:
+            return None
+        delay = self.retryPolicy.delay(request_params['method'], error, attempt)
+        if delay is None:
+            return None
+        if query is not None:
+            query.retries += 1
+        if self.isDebugMode:
+            print ('retrying ' + request_params['method'] + ' ' + request_params['uri'] + ' in ' + str(delay) + 's after ' + str(error))
+        return delay
+
+    def _parseResponse(self, response):
+        """
+        Maps a response of Mixnode server to its payload, raising
+        :exc:`ResponseError` or :exc:`ResponseServerError` accordingly.
+
+        :param response:  response object exposing ``status_code`` and
+            ``json()``; its raw ``content`` bytes are decoded with the JSON
+            backend of the client when available
         """
         try:
-            response = requests.request(request_params['method'], request_params['uri'], data=request_params['form'], auth=HTTPBasicAuth(self.credentials['api_key'],''))
             if response.status_code >= 400:
                  raise ResponseError(response)
-            payload = response.json()
+            content = getattr(response, 'content', None)
+            if isinstance(content, bytes):
+                payload = self.jsonBackend.loads(content)
+            else:
+                payload = response.json()
 
             oError = GetError(payload['status'], payload.get('error_msg') and payload['error_msg']);
 
             if oError:
                 raise ResponseServerError(oError)
             else:    
-                self.response = self.response + self._buildrecords(payload)
-                time.sleep(self.lag)
                 return payload
         except MixnodeError as err:
             raise err
\ No newline at end of file
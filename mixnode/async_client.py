@@ -0,0 +1,648 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+# Standard python packages
+import asyncio
+import base64
+import json
+import time
+
+
+# Internal imports
+from .api_client import (Mixnode, _responseSize)
+from .cache import cacheKey
+from .cost import (CostStore, PROBE_INPUT_LIMIT)
+from .error import (MixnodeError, MissingDependency, MissingQuery, NotSupported, Network, RequestTimeout, ResponseServerError, QueryTimeout, QUERY_ERROR_STATUS)
+from .metrics import (SLEEP_POLLING, SLEEP_RETRY, SLEEP_THROTTLE)
+from .webhook import WAIT_POLL
+from .query import (Query, PAGINATION_STATE)
+from .throttle import POLL_INTERVAL
+from .transport import (TransferStats, POOL_MAXSIZE, TIMEOUT, _splitTimeout)
+
+# Number of queries an AsyncMixnode client runs at the same time
+CONCURRENCY = 10
+
+def _unsupported(name):
+    """
+    Method of :class:`Mixnode <mixnode.api_client.Mixnode>` which
+    :class:`AsyncMixnode <AsyncMixnode>` does not implement, raising
+    :exc:`NotSupported <mixnode.error.NotSupported>` instead of running
+    synchronous code on the asynchronous transport.
+
+    :param name: name of the method
+    """
+    def method(self, *args, **kwargs):
+        raise NotSupported(name, self.__class__.__name__)
+    method.__name__ = name
+    method.__doc__ = 'Not supported by :class:`AsyncMixnode <AsyncMixnode>`, raises :exc:`NotSupported <mixnode.error.NotSupported>`'
+    return method
+
+class AsyncResponse(object):
+    """
+    Fully read HTTP response returned by the asynchronous transports.
+
+    :param status_code: HTTP status code.
+    :param content: Body of the response as bytes.
+    :param headers: A map of HTTP headers.
+    """
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+class AsyncTransport(object):
+    """
+    Base class for the HTTP transports used by :class:`AsyncMixnode <AsyncMixnode>`.
+    """
+    async def request(self, method, uri, data=None, headers=None, auth=None):
+        """
+        Fires a single HTTP request.
+
+        :param method: HTTP method to use
+        :param uri: Absolute URI to invoke.
+        :param data: A map of form parameters and their values.
+        :param headers: A map of HTTP headers.
+        :param auth: (username, password) tuple used for Basic Authentication.
+        :return: :class:`AsyncResponse <AsyncResponse>`
+        """
+        raise NotImplementedError()
+
+    async def close(self):
+        """
+        Releases the pooled connections.
+        """
+        pass
+
+class AiohttpTransport(AsyncTransport):
+    """
+    Keep-alive, connection pooled transport built on aiohttp; requires
+    ``pip install aiohttp``. The session is opened lazily inside the running
+    event loop. aiohttp advertises and decodes gzip and deflate, and brotli
+    when its package is installed; the wire size of a compressed response
+    is taken from its Content-Length, when sent.
+
+    :param pool_maxsize: Maximum number of keep-alive connections.
+    :param timeout: (connect, read) seconds after which a request raises
+        :exc:`RequestTimeout`, or a single number for both.
+    """
+    def __init__(self, pool_maxsize=POOL_MAXSIZE, timeout=TIMEOUT):
+        try:
+            import aiohttp
+        except ImportError:
+            raise MissingDependency('aiohttp')
+        connect, read = _splitTimeout(timeout)
+        self.aiohttp = aiohttp
+        self.pool_maxsize = pool_maxsize
+        self.timeout = aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+        self.session = None
+        self.stats = TransferStats()
+        self._authorization = {}
+
+    async def request(self, method, uri, data=None, headers=None, auth=None):
+        if self.session is None:
+            connector = self.aiohttp.TCPConnector(limit=self.pool_maxsize)
+            self.session = self.aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        if auth is not None:
+            headers = dict(headers or {})
+            headers['Authorization'] = self._basicAuthorization(auth)
+        try:
+            async with self.session.request(method, uri, data=data, headers=headers) as response:
+                content = await response.read()
+        except asyncio.TimeoutError as err:
+            raise RequestTimeout(more=err)
+        except self.aiohttp.ClientError as err:
+            raise Network(more=err)
+        self.stats.add(int(response.headers.get('Content-Length') or len(content)), len(content))
+        return AsyncResponse(response.status, content, response.headers)
+
+    def _basicAuthorization(self, auth):
+        """
+        Basic Authorization header of a (username, password) tuple, built
+        once per credentials; aiohttp.BasicAuth rejects the ':' which ends
+        Mixnode usernames.
+
+        :param auth: (username, password) tuple
+        """
+        if auth not in self._authorization:
+            token = base64.b64encode((auth[0] + ':' + auth[1]).encode('latin1'))
+            self._authorization[auth] = 'Basic ' + token.decode('ascii')
+        return self._authorization[auth]
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+class AsyncMixnode(Mixnode):
+    """
+    Constructs an asyncio :class:`AsyncMixnode <AsyncMixnode>` client which
+    shares the request building, pagination state machine, error mapping
+    and record building of :class:`Mixnode <Mixnode>`, so a single event loop
+    can drive many queries at once.
+
+    Prefetching, bulk downloads, the result cache, checkpoints, columnar,
+    Arrow, pandas and sink results, batch, partitioned and file downloads
+    run synchronous code and raise :exc:`NotSupported <mixnode.error.NotSupported>`;
+    use ``asyncio.gather`` to run many queries.
+
+    Examples:
+        async with AsyncMixnode('Your_API_KEY', concurrency=20) as client:
+            records = await client.execute(query)
+            async for record in client.stream(query):
+                print(record)
+
+    :param api_key: API Key obtained from Mixnode Portal.
+    :param transport: :class:`AsyncTransport <AsyncTransport>` shared by every
+        request of the client, defaults to :class:`AiohttpTransport <AiohttpTransport>`.
+    :param concurrency: Maximum number of queries in flight at the same time.
+    :param pool_maxsize: Keep-alive connections of the default transport.
+    :param timeout: (connect, read) timeout of the requests of the default transport.
+    """
+    def __init__(self, api_key=None, transport=None, concurrency=CONCURRENCY, pool_maxsize=POOL_MAXSIZE, timeout=TIMEOUT):
+        if transport is None and api_key is not None:
+            transport = AiohttpTransport(pool_maxsize, timeout)
+        super(AsyncMixnode, self).__init__(api_key, transport=transport)
+        self.concurrency = concurrency
+        self._semaphore = None
+
+    setPrefetch = _unsupported('setPrefetch')
+    setBulkDownload = _unsupported('setBulkDownload')
+    setCache = _unsupported('setCache')
+    setCheckpoint = _unsupported('setCheckpoint')
+    execute_columnar = _unsupported('execute_columnar')
+    execute_to = _unsupported('execute_to')
+    execute_arrow = _unsupported('execute_arrow')
+    stream_arrow = _unsupported('stream_arrow')
+    execute_df = _unsupported('execute_df')
+    execute_many = _unsupported('execute_many')
+    iter_many = _unsupported('iter_many')
+    execute_partitioned = _unsupported('execute_partitioned')
+    iter_download = _unsupported('iter_download')
+    download = _unsupported('download')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """
+        Closes the connections pooled by the transport of the client
+        """
+        await self.transport.close()
+
+    async def execute(self, query=None, input_limit=None, wait=WAIT_POLL, max_rows=None, deadline=None):
+        """
+        Fires a query and waits for all of its records
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Sets the input limit on the data to be scanned
+        :param wait:  poll or webhook, see :meth:`Mixnode.execute`
+        :param max_rows:  Returns at most this many records
+        :param deadline:  Seconds after which the query is stopped
+        """
+        records = []
+        async for record in self.iter_rows(query, input_limit, wait, max_rows, deadline):
+            records.append(record)
+        return records
+
+    async def estimate(self, query=None, input_limit=None, probe=False, probe_limit=PROBE_INPUT_LIMIT):
+        """
+        Predicts the cost of a query out of the past runs of queries of the
+        same shape, running a probe without blocking the event loop, see
+        :meth:`Mixnode.estimate`
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Input limit the query would run with
+        :param probe:  Runs the query with a small input limit first when no
+            query of its shape ran yet; its results are not fetched
+        :param probe_limit:  Input limit of the probe in bytes
+        :return: :class:`CostEstimate <mixnode.cost.CostEstimate>`, None when
+            nothing is known of the shape of the query
+        """
+        if query is None:
+            raise MissingQuery()
+        store = self.costStore if self.costStore is not None else CostStore()
+        try:
+            estimate = store.estimate(query, input_limit)
+            if estimate is None and probe:
+                if input_limit is not None:
+                    probe_limit = min(probe_limit, input_limit)
+                await self._aprobe(query, probe_limit, store)
+                estimate = store.estimate(query, input_limit)
+            return estimate
+        finally:
+            if store is not self.costStore:
+                store.close()
+
+    async def _aprobe(self, query, input_limit, store):
+        """
+        Runs a query until it is over without fetching its results and
+        records its scan statistics, see :meth:`Mixnode._probe`
+
+        :param query:  SQL query sent to the backend
+        :param input_limit:  Input limit of the probe
+        :param store:  :class:`CostStore <mixnode.cost.CostStore>` recording them
+        """
+        q = Query(self, self._buildFormParams(query, input_limit))
+        self.lastQuery = q
+        try:
+            request_params = q.next_request()
+            while request_params and q.state in (PAGINATION_STATE['SUBMITTED'], PAGINATION_STATE['POLLING']):
+                if q.state == PAGINATION_STATE['SUBMITTED']:
+                    self._emit('onQueryStart', q)
+                else:
+                    request_params = q.infoRequest()
+                await self._asleep(q.delay(), q, SLEEP_POLLING)
+                if await self._aexpired(q):
+                    break
+                try:
+                    payload = await self._fire(request_params, q)
+                except MixnodeError as err:
+                    q.fail(err)
+                    raise
+                if q.state == PAGINATION_STATE['SUBMITTED']:
+                    q.feed(payload)
+                else:
+                    q.feedInfo(payload)
+                request_params = q.next_request()
+        finally:
+            self._finishMetrics(q)
+        self.query_id = q.query_id
+        if q.info is not None:
+            store.record(query, input_limit, q.info, q.metrics.elapsed())
+
+    async def _execute(self, query):
+        """
+        Private function to implement execute workflow, :meth:`iter_rows`,
+        :meth:`stream` and :meth:`attach` return this asynchronous generator.
+        Cancels the query on the server if it is still running once
+        ``query.max_rows`` records were yielded or the generator is closed.
+        A query with no row to return is never submitted.
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        :return: asynchronous generator of records
+        """
+        if query.max_rows == 0:
+            query.stop()
+            return
+        records = self._iterRecords(query)
+        count = 0
+        try:
+            async for record in records:
+                if query.max_rows is not None and count >= query.max_rows:
+                    break
+                count += 1
+                yield record
+        finally:
+            if query.isRunning() and not self._isShared(query):
+                await self._acancel(query)
+            await records.aclose()
+
+    async def _iterRecords(self, query):
+        async for payload in self._request(query):
+            for record in self._buildrecords(self._decode(query, payload)):
+                yield record
+
+    async def _aexpired(self, query):
+        """
+        Stops a query which reached its deadline, and cancels then fails one
+        which outlived the query timeout, the asynchronous counterpart of
+        :meth:`Mixnode._expired` which the inherited synchronous paths keep
+        calling
+
+        :param query: :class:`Query <mixnode.query.Query>` about to fire a request
+        """
+        if query.isTimedOut():
+            err = QueryTimeout()
+            if query.isRunning():
+                await self._acancel(query)
+            query.fail(err)
+            raise err
+        if query.isExpired():
+            query.stop()
+            return True
+        return False
+
+    async def cancel(self, query_id):
+        """
+        Cancels a query on Mixnode server, see :meth:`Mixnode.cancel`
+
+        :param query_id: id of the query returned by Mixnode server
+        """
+        try:
+            query = Query(self, query_id=query_id)
+            await self._fire(query.cancelRequest(), query)
+        except ResponseServerError as err:
+            if err.status != QUERY_ERROR_STATUS['USER_CANCELED']:
+                raise
+
+    async def _acancel(self, query):
+        """
+        Stops a query and cancels it on the server, on a best effort basis,
+        the asynchronous counterpart of :meth:`Mixnode._cancel`
+
+        :param query: :class:`Query <mixnode.query.Query>` to cancel
+        """
+        query.stop()
+        try:
+            await self._fire(query.cancelRequest(), query)
+        except ResponseServerError as err:
+            if err.status != QUERY_ERROR_STATUS['USER_CANCELED'] and self.isDebugMode:
+                print ('could not cancel query ' + query.query_id + ': ' + str(err))
+        except MixnodeError as err:
+            if self.isDebugMode:
+                print ('could not cancel query ' + query.query_id + ': ' + str(err))
+
+    async def _request(self, query):
+        """
+        Yields the results pages of a query, sharing them with the identical
+        requests in flight when single-flight is enabled.
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        """
+        self.lastQuery = query
+        if self._isShared(query):
+            key = (self.credentials['api_key'], cacheKey(query.form_params['query_str'], query.form_params.get('input_limit')))
+            query, pages = self.singleFlight.join(key, query, self._pages)
+            self.lastQuery = query
+        else:
+            pages = self._pages(query)
+        async for payload in pages:
+            self.query_id = query.query_id
+            yield payload
+        self.query_id = query.query_id
+
+    async def _pages(self, query):
+        """
+        Drives the pagination state machine of a query, holding a slot of the
+        concurrency semaphore, and of the throttle when it bounds the queries
+        in flight, for its whole lifetime.
+
+        :param query: :class:`Query <mixnode.query.Query>` to run
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            slot = await self._acquireQuerySlot()
+            try:
+                request_params = query.next_request()
+                while request_params:
+                    if query.webhook is not None and query.state == PAGINATION_STATE['POLLING']:
+                        await self._awaitWebhook(query)
+                        request_params = query.next_request()
+                        continue
+                    if query.state == PAGINATION_STATE['SUBMITTED']:
+                        self._emit('onQueryStart', query)
+                    await self._asleep(query.delay(), query, SLEEP_POLLING)
+                    if await self._aexpired(query):
+                        break
+                    try:
+                        payload = await self._fire(request_params, query)
+                    except MixnodeError as err:
+                        query.fail(err)
+                        raise
+                    if query.feed(payload):
+                        yield payload
+                    request_params = query.next_request()
+                if self._fetchesScanStats(query):
+                    try:
+                        query.metrics.setServerStats(await self._fire(query.infoRequest(), query))
+                    except MixnodeError:
+                        pass
+                    self._recordCost(query)
+            finally:
+                if slot is not None:
+                    self.throttle.governor.release(slot)
+                self._finishMetrics(query)
+
+    async def _awaitWebhook(self, query):
+        """
+        Waits without blocking the event loop for the webhook receiver of a
+        query to be notified of its completion, polling its query object once
+        every ``poll_interval`` seconds in case the webhook was lost
+
+        :param query: :class:`Query <mixnode.query.Query>` in the POLLING state
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        def resolve(info):
+            if not future.done():
+                future.set_result(info)
+        def notify(info):
+            loop.call_soon_threadsafe(resolve, info)
+        started = time.time()
+        query.webhook.subscribe(query.query_id, notify)
+        try:
+            info = await asyncio.wait_for(future, self._webhookTimeout(query))
+        except asyncio.TimeoutError:
+            query.webhook.unsubscribe(query.query_id, notify)
+            info = None
+        self._accountWebhook(query, time.time() - started)
+        if info is None and await self._aexpired(query):
+            return
+        try:
+            if info is None:
+                info = await self._fire(query.infoRequest(), query)
+            self._feedWebhook(query, info)
+        except MixnodeError as err:
+            query.fail(err)
+            raise
+
+    async def _acquireQuerySlot(self):
+        """
+        Takes a query slot of the throttle without blocking the event loop,
+        None when the queries in flight are not bounded
+        """
+        governor = self.throttle.governor
+        if governor is None:
+            return None
+        slot = governor.tryAcquire()
+        while slot is None:
+            await asyncio.sleep(POLL_INTERVAL)
+            slot = governor.tryAcquire()
+        return slot
+
+    async def _fire(self, request_params, query):
+        """
+        Fires a request, firing it again on transient failures as decided by
+        the retry policy
+
+        :param request_params: request parameters built by the query
+        :param query: :class:`Query <mixnode.query.Query>` the retries are accounted on
+        """
+        attempt = 0
+        while True:
+            await self._asleep(self.throttle.requestDelay(), query, SLEEP_THROTTLE)
+            try:
+                started = time.time()
+                response = await self.transport.request(request_params['method'], request_params['uri'], data=request_params['form'], headers=request_params['headers'], auth=self.auth)
+                size = _responseSize(response)
+                self._account(request_params, query, time.time() - started, size)
+                await self._asleep(self.throttle.responseDelay(size), query, SLEEP_THROTTLE)
+                return self._parseResponse(response)
+            except MixnodeError as err:
+                attempt += 1
+                delay = self._retryDelay(request_params, err, attempt, query)
+                if delay is None:
+                    raise
+            await self._asleep(delay, query, SLEEP_RETRY)
+
+    async def _asleep(self, seconds, query, reason):
+        """
+        Sleeps on behalf of a query without blocking the event loop,
+        accounting it on its metrics
+
+        :param seconds: duration of the sleep, nothing is done when 0
+        :param query: :class:`Query <mixnode.query.Query>`
+        :param reason: SLEEP_POLLING, SLEEP_RETRY or SLEEP_THROTTLE
+        """
+        if not seconds:
+            return
+        query.metrics.addSleep(seconds, reason)
+        self._emit('onSleep', query, seconds, reason)
+        await asyncio.sleep(seconds)
+
+class AsyncFlight(object):
+    """
+    Pages of an in-flight query fanned out to its subscribers, the asyncio
+    counterpart of :class:`Flight <mixnode.singleflight.Flight>`.
+
+    :param key: Key of the flight in its :class:`AsyncSingleFlight <AsyncSingleFlight>` group.
+    :param query: :class:`Query <mixnode.query.Query>` run by the flight.
+    :param source: Asynchronous generator of the results pages of the query.
+    """
+    def __init__(self, key, query, source):
+        self.key = key
+        self.query = query
+        self.source = source
+        self.condition = asyncio.Condition()
+        self.pages = []
+        self.base = 0
+        self.positions = {}
+        self.fetching = False
+        self.done = False
+        self.error = None
+
+    def subscribe(self):
+        if self.done or self.base:
+            return None
+        token = object()
+        self.positions[token] = 0
+        return token
+
+    def _release(self):
+        if not self.positions:
+            return
+        oldest = min(self.positions.values())
+        if oldest > self.base:
+            del self.pages[:oldest - self.base]
+            self.base = oldest
+
+    async def _fetch(self):
+        try:
+            payload = await self.source.__anext__()
+        except StopAsyncIteration:
+            self.done = True
+            return
+        except BaseException as err:
+            self.error = err
+            self.done = True
+            raise
+        finally:
+            self.fetching = False
+            async with self.condition:
+                self.condition.notify_all()
+        self.pages.append(payload)
+
+    async def iterate(self, token):
+        try:
+            while True:
+                position = self.positions[token]
+                if position < self.base + len(self.pages):
+                    self.positions[token] = position + 1
+                    page = self.pages[position - self.base]
+                    self._release()
+                    yield page
+                    continue
+                if self.error is not None:
+                    raise self.error
+                if self.done:
+                    return
+                if not self.fetching:
+                    self.fetching = True
+                    await self._fetch()
+                    continue
+                async with self.condition:
+                    await self.condition.wait_for(lambda: not self.fetching)
+        finally:
+            del self.positions[token]
+            self._release()
+            if not self.positions and not self.done:
+                self.done = True
+                await self.source.aclose()
+
+class AsyncSingleFlight(object):
+    """
+    Group of in-flight queries of :class:`AsyncMixnode <AsyncMixnode>` clients
+    running on the same event loop, see :class:`SingleFlight <mixnode.singleflight.SingleFlight>`.
+
+    Examples:
+        client.setSingleFlight(AsyncSingleFlight())
+    """
+    def __init__(self):
+        self._flights = {}
+
+    def join(self, key, query, run):
+        """
+        Joins the flight of a key, starting it when there is none
+
+        :param key: key of identical requests
+        :param query: :class:`Query <mixnode.query.Query>` run if a flight is started
+        :param run: callable returning the asynchronous generator of the results pages of a query
+        :return: (query run by the flight, asynchronous generator of its pages)
+        """
+        flight = self._flights.get(key)
+        token = flight.subscribe() if flight is not None else None
+        if token is None:
+            flight = self._flights[key] = AsyncFlight(key, query, run(query))
+            token = flight.subscribe()
+        return flight.query, self._iterate(flight, token)
+
+    async def _iterate(self, flight, token):
+        try:
+            async for page in flight.iterate(token):
+                if flight.base:
+                    self._forget(flight)
+                yield page
+        finally:
+            self._forget(flight)
+
+    def _forget(self, flight):
+        if self._flights.get(flight.key) is flight and (flight.done or flight.base):
+            del self._flights[flight.key]
+
+    def __len__(self):
+        return len(self._flights)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+# Standard python packages
+import time
+
+# Number of threads used by Mixnode.execute_many to poll queries
+MAX_WORKERS = 8
+
+class BatchResult(object):
+    """
+    Outcome of one query of a batch fired by :meth:`Mixnode.execute_many`.
+
+    :param index: Position of the query in the batch.
+    :param query: SQL query sent to the backend.
+    """
+    def __init__(self, index, query):
+        self.index = index
+        self.query = query
+        self.query_id = None
+        self.records = []
+        self.error = None
+        self.timings = None
+        self.retries = 0
+        self.elapsed = 0.0
+
+    def isSuccessful(self):
+        return self.error is None
+
+    def __repr__(self):
+        return '<BatchResult index={index} query_id={query_id} records={records} error={error}>'.format(
+            index=self.index,
+            query_id=self.query_id,
+            records=len(self.records),
+            error=self.error
+        )
+
+class BatchStats(object):
+    """
+    Aggregate throughput of a batch fired by :meth:`Mixnode.execute_many`.
+    """
+    def __init__(self):
+        self.queries = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.pages = 0
+        self.rows = 0
+        self.retries = 0
+        self.started = time.time()
+        self.elapsed = 0.0
+
+    def add(self, result, query):
+        """
+        Accounts a completed query
+
+        :param result: :class:`BatchResult <BatchResult>` of the query
+        :param query: :class:`Query <mixnode.query.Query>` which produced it
+        """
+        self.queries += 1
+        if result.isSuccessful():
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self.pages += query.pages
+        self.rows += query.rows
+        self.retries += query.retries
+        self.elapsed = time.time() - self.started
+
+    def rowsPerSecond(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def queriesPerSecond(self):
+        return self.queries / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return '<BatchStats queries={queries} failed={failed} rows={rows} pages={pages} elapsed={elapsed:.3f}s rows/s={rate:.1f}>'.format(
+            queries=self.queries,
+            failed=self.failed,
+            rows=self.rows,
+            pages=self.pages,
+            elapsed=self.elapsed,
+            rate=self.rowsPerSecond()
+        )
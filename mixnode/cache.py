@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Opt-in on-disk cache of query results, keyed by the normalized SQL text
+and the input limit of the query, and a hash of the credentials it ran with.
+
+Every result is stored in its own file: length-prefixed ``marshal``
+records, one per row, followed by a JSON footer (query, columns, creation
+time) so that the rows are written only once, as pages arrive. Rows are
+read back through a memory map without loading the whole file. Files are written under a temporary name and renamed into place, so
+concurrent processes sharing a cache directory never see a partial entry;
+eviction tolerates entries removed by another process. The modification
+time of an entry is its creation time, which its expiry counts from, and
+its access time is the time it was last used, which eviction goes by.
+"""
+
+# Standard python packages
+import errno
+import hashlib
+import json
+import marshal
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+
+MAGIC = b'MXRC'
+# Bumped whenever the layout of the files changes
+FORMAT_VERSION = 1
+SUFFIX = '.mxr'
+# Number of rows in the pages replayed out of the cache
+PAGE_ROWS = 1000
+# Seconds after which the temporary file of an uncommitted entry is
+# considered left behind by a dead process
+TMP_MAX_AGE = 86400
+
+_PREFIX = struct.Struct('<4sHH')
+_TRAILER = struct.Struct('<QI')
+_LENGTH = struct.Struct('<I')
+_replace = getattr(os, 'replace', os.rename)
+_TOKENS = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|(\s+)")
+
+def normalizeQuery(query):
+    """
+    Normalizes a SQL query so that formatting differences map to the same
+    cache entry: runs of whitespace outside quoted literals and identifiers
+    collapse to one space, and surrounding whitespace and trailing
+    semicolons are dropped.
+
+    :param query: SQL query
+    """
+    normalized = _TOKENS.sub(lambda match: match.group(1) or ' ', query)
+    return normalized.strip().rstrip(';').strip()
+
+def cacheKey(query, input_limit=None, credentials=None):
+    """
+    Content address of a query
+
+    :param query: SQL query
+    :param input_limit: input limit of the query
+    :param credentials: API key the query runs with, so that accounts with
+        different permissions never share results
+    """
+    text = normalizeQuery(query) + '\n' + str(input_limit)
+    if credentials is not None:
+        text += '\n' + hashlib.sha256(credentials.encode('utf-8')).hexdigest()
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class CachedResult(object):
+    """
+    Result read back from the cache through a memory map.
+
+    :param path: Path of the cache entry.
+    :param header: Decoded footer of the entry.
+    :param end: Offset right after the last record.
+    """
+    def __init__(self, path, header, end):
+        self.path = path
+        self.header = header
+        self.end = end
+        self.query_id = header.get('query_id')
+        self.columns = header['columns']
+
+    def pages(self, page_rows=PAGE_ROWS):
+        """
+        Replays the result as FINISHED results pages
+
+        :param page_rows: number of rows per page
+        """
+        with open(self.path, 'rb') as entry:
+            mapped = mmap.mmap(entry.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                offset = _PREFIX.size
+                rows = []
+                while offset < self.end:
+                    length, = _LENGTH.unpack_from(mapped, offset)
+                    offset += _LENGTH.size
+                    rows.append(marshal.loads(mapped[offset:offset + length]))
+                    offset += length
+                    if len(rows) == page_rows:
+                        yield {'status': 'FINISHED', 'columns': self.columns, 'rows': rows}
+                        rows = []
+                if rows or not self.header['rows']:
+                    yield {'status': 'FINISHED', 'columns': self.columns, 'rows': rows}
+            finally:
+                mapped.close()
+
+class CacheWriter(object):
+    """
+    Spools the pages of a running query into a temporary file which only
+    becomes visible in the cache once :meth:`commit` is called.
+
+    :param cache: :class:`ResultCache <ResultCache>` written to.
+    :param key: Content address of the query, see :func:`cacheKey`.
+    :param query: SQL query.
+    :param input_limit: Input limit of the query.
+    """
+    def __init__(self, cache, key, query, input_limit):
+        self.cache = cache
+        self.key = key
+        self.header = {
+            'query': query,
+            'input_limit': input_limit,
+            'columns': [],
+            'rows': 0
+        }
+        descriptor, self.tmpPath = tempfile.mkstemp(suffix='.tmp', dir=cache.directory)
+        self.body = os.fdopen(descriptor, 'wb')
+        self.body.write(_PREFIX.pack(MAGIC, FORMAT_VERSION, marshal.version))
+
+    def addPage(self, payload):
+        """
+        Appends the rows of a results page
+
+        :param payload: results page returned by Mixnode server
+        """
+        rows = payload.get('rows')
+        if payload.get('columns') and not self.header['columns']:
+            self.header['columns'] = payload['columns']
+        if not rows:
+            return
+        for row in rows:
+            record = marshal.dumps(row)
+            self.body.write(_LENGTH.pack(len(record)))
+            self.body.write(record)
+        self.header['rows'] += len(rows)
+
+    def commit(self, query_id=None):
+        """
+        Writes the footer and moves the entry into place
+
+        :param query_id: id of the query which produced the result
+        """
+        self.header['query_id'] = query_id
+        self.header['created'] = time.time()
+        header = json.dumps(self.header).encode('utf-8')
+        try:
+            end = self.body.tell()
+            self.body.write(header)
+            self.body.write(_TRAILER.pack(end, len(header)))
+            self.body.close()
+            _replace(self.tmpPath, self.cache.path(self.key))
+        finally:
+            self.discard()
+        self.cache.evict()
+
+    def discard(self):
+        """
+        Drops the spooled pages, if not committed
+        """
+        if not self.body.closed:
+            self.body.close()
+        _remove(self.tmpPath)
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class ResultCache(object):
+    """
+    Persistent, size bounded LRU cache of query results consulted by
+    :meth:`Mixnode.execute` before submitting a query.
+
+    Examples:
+        client.setCache(ResultCache('/var/cache/mixnode', ttl=3600, max_bytes=10 << 30))
+
+    :param directory: Directory holding the cache entries, created if missing.
+    :param ttl: Seconds after which an entry expires, never when None.
+    :param max_bytes: Total size above which least recently used entries are evicted, unbounded when None.
+    """
+    def __init__(self, directory, ttl=None, max_bytes=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError as err:
+                # Created meanwhile by another process sharing the cache
+                if err.errno != errno.EEXIST:
+                    raise
+
+    def path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, query, input_limit=None, credentials=None):
+        """
+        Cached result of a query, None on a miss or an expired entry
+
+        :param query: SQL query
+        :param input_limit: input limit of the query
+        :param credentials: API key the query runs with
+        :return: :class:`CachedResult <CachedResult>`
+        """
+        path = self.path(cacheKey(query, input_limit, credentials))
+        try:
+            created = os.stat(path).st_mtime
+            with open(path, 'rb') as entry:
+                magic, version, marshalVersion = _PREFIX.unpack(entry.read(_PREFIX.size))
+                if magic != MAGIC or version != FORMAT_VERSION or marshalVersion != marshal.version:
+                    return None
+                entry.seek(-_TRAILER.size, os.SEEK_END)
+                end, length = _TRAILER.unpack(entry.read(_TRAILER.size))
+                entry.seek(end)
+                header = json.loads(entry.read(length).decode('utf-8'))
+        except (IOError, OSError, struct.error, ValueError):
+            return None
+        if self._isExpired(created):
+            _remove(path)
+            return None
+        try:
+            # Marks the entry as recently used for eviction, keeping its creation time
+            os.utime(path, (time.time(), created))
+        except OSError:
+            return None
+        return CachedResult(path, header, end)
+
+    def writer(self, query, input_limit=None, credentials=None):
+        """
+        Writer spooling the result of a query into the cache
+
+        :param query: SQL query
+        :param input_limit: input limit of the query
+        :param credentials: API key the query runs with
+        :return: :class:`CacheWriter <CacheWriter>`
+        """
+        return CacheWriter(self, cacheKey(query, input_limit, credentials), query, input_limit)
+
+    def _isExpired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def entries(self):
+        """
+        (last use, size, path, creation time) of every entry, least recently
+        used first
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path, stat.st_mtime))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        """
+        Removes expired entries, then least recently used ones until the
+        cache fits in ``max_bytes``
+        """
+        self._removeStaleTemporaryFiles()
+        entries = self.entries()
+        for entry in [entry for entry in entries if self._isExpired(entry[3])]:
+            _remove(entry[2])
+            entries.remove(entry)
+        if self.max_bytes is None:
+            return
+        total = sum(entry[1] for entry in entries)
+        for used, size, path, created in entries:
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+    def _removeStaleTemporaryFiles(self):
+        horizon = time.time() - TMP_MAX_AGE
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith('.tmp') and os.stat(path).st_mtime < horizon:
+                    _remove(path)
+            except OSError:
+                continue
+
+    def clear(self):
+        """
+        Removes every entry
+        """
+        for used, size, path, created in self.entries():
+            _remove(path)
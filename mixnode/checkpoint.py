@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Checkpoints of long running downloads, so that a process which died while
+paging through a result can resume it instead of submitting the query again.
+
+Every query has two files named after its id: an append-only spool of the
+results pages already fetched, as length-prefixed ``marshal`` records, and
+a small JSON state (query, page and ``next_page`` URL to fetch next, size of
+the spool) replaced atomically after each page. The state is only written
+once the page is in the spool, so a crash between the two leaves a spool
+tail which is truncated on resume.
+"""
+
+# Standard python packages
+import json
+import marshal
+import os
+import struct
+
+STATE_SUFFIX = '.json'
+SPOOL_SUFFIX = '.spool'
+
+_LENGTH = struct.Struct('<I')
+_replace = getattr(os, 'replace', os.rename)
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class CheckpointWriter(object):
+    """
+    Records the progress of a running query after every results page.
+
+    :param checkpoint: :class:`Checkpoint <Checkpoint>` written to.
+    :param query: :class:`Query <mixnode.query.Query>` being run, already submitted.
+    :param state: State loaded from an earlier run of the query, None for a new one.
+    """
+    def __init__(self, checkpoint, query, state=None):
+        self.checkpoint = checkpoint
+        if state is None:
+            form_params = query.form_params or {}
+            state = {
+                'query_id': query.query_id,
+                'query': form_params.get('query_str'),
+                'input_limit': form_params.get('input_limit'),
+                'page': query.page,
+                'next_page': query.next_uri,
+                'pages': 0,
+                'rows': 0,
+                'spooled': 0
+            }
+        self.state = state
+        spool_path = checkpoint.path(query.query_id, SPOOL_SUFFIX)
+        self.spool = open(spool_path, 'r+b' if os.path.exists(spool_path) else 'w+b')
+        # Drops a page spooled by a process which died before recording it
+        self.spool.truncate(state['spooled'])
+        self.spool.seek(state['spooled'])
+        self._save()
+
+    def addPage(self, payload, query):
+        """
+        Spools a results page, then records the page to fetch next
+
+        :param payload: results page returned by Mixnode server
+        :param query: :class:`Query <mixnode.query.Query>` the page belongs to, already fed with it
+        """
+        record = marshal.dumps(payload)
+        self.spool.write(_LENGTH.pack(len(record)))
+        self.spool.write(record)
+        self.spool.flush()
+        if self.checkpoint.fsync:
+            os.fsync(self.spool.fileno())
+        self.state['page'] = query.page
+        self.state['next_page'] = query.next_uri
+        self.state['pages'] += 1
+        self.state['rows'] += len(payload.get('rows') or [])
+        self.state['spooled'] = self.spool.tell()
+        self._save()
+
+    def _save(self):
+        path = self.checkpoint.path(self.state['query_id'], STATE_SUFFIX)
+        with open(path + '.tmp', 'w') as state_file:
+            json.dump(self.state, state_file)
+            state_file.flush()
+            if self.checkpoint.fsync:
+                os.fsync(state_file.fileno())
+        _replace(path + '.tmp', path)
+
+    def close(self):
+        self.spool.close()
+
+class Checkpoint(object):
+    """
+    Directory of the checkpoints of the queries run by a client, consulted
+    by :meth:`Mixnode.resume`. The checkpoint of a query is removed once all
+    its pages were consumed.
+
+    Examples:
+        client.setCheckpoint(Checkpoint('/var/lib/mixnode'))
+        for query_id in client.checkpoint.queries():
+            for record in client.resume(query_id):
+                print(record)
+
+    :param directory: Directory holding the checkpoints, created if missing.
+    :param fsync: Flushes every page to disk, surviving a crash of the
+        machine rather than only of the process, at the cost of a sync per page.
+    """
+    def __init__(self, directory, fsync=False):
+        self.directory = directory
+        self.fsync = fsync
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def path(self, query_id, suffix):
+        return os.path.join(self.directory, query_id + suffix)
+
+    def load(self, query_id):
+        """
+        State of the checkpoint of a query, None when there is none
+
+        :param query_id: id of the query returned by Mixnode server
+        """
+        try:
+            with open(self.path(query_id, STATE_SUFFIX)) as state_file:
+                return json.load(state_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def writer(self, query, state=None):
+        """
+        Writer recording the progress of a query
+
+        :param query: :class:`Query <mixnode.query.Query>` being run, already submitted
+        :param state: state returned by :meth:`load` when resuming the query
+        :return: :class:`CheckpointWriter <CheckpointWriter>`
+        """
+        return CheckpointWriter(self, query, state)
+
+    def pages(self, state):
+        """
+        Replays the results pages spooled for a query
+
+        :param state: state returned by :meth:`load`
+        :return: generator of results pages
+        """
+        with open(self.path(state['query_id'], SPOOL_SUFFIX), 'rb') as spool:
+            while spool.tell() < state['spooled']:
+                length, = _LENGTH.unpack(spool.read(_LENGTH.size))
+                yield marshal.loads(spool.read(length))
+
+    def queries(self):
+        """
+        Ids of the queries which have a checkpoint, i.e. were not consumed to the end
+        """
+        return sorted(name[:-len(STATE_SUFFIX)] for name in os.listdir(self.directory) if name.endswith(STATE_SUFFIX))
+
+    def remove(self, query_id):
+        """
+        Drops the checkpoint of a query
+
+        :param query_id: id of the query returned by Mixnode server
+        """
+        _remove(self.path(query_id, STATE_SUFFIX))
+        _remove(self.path(query_id, SPOOL_SUFFIX))
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Cost estimation of queries out of the scan statistics of past runs.
+
+The scan statistics of every completed query are kept in a SQLite store
+under the shape of the query: its SQL text without literals, comments or
+formatting, so that the runs of a query differing only by its constants
+inform each other. Estimates extrapolate the bytes, rows and time per
+byte scanned of the recent runs of a shape to another input limit.
+"""
+
+# Standard python packages
+import re
+import sqlite3
+import threading
+import time
+
+# Input limit in bytes of the probes run by Mixnode.estimate
+PROBE_INPUT_LIMIT = 1 << 30
+# Runs of a shape an estimate is based on, the most recent first
+MAX_SAMPLES = 20
+
+_SHAPE_TOKENS = re.compile(r"('(?:[^']|'')*')|(\"(?:[^\"]|\"\")*\")|((?:--[^\n]*|/\*.*?\*/|\s)+)|(\b\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b)", re.S)
+
+def _shapeToken(match):
+    if match.group(1) or match.group(4):
+        return '?'
+    if match.group(2):
+        return match.group(2)
+    return ' '
+
+def queryShape(query):
+    """
+    Shape of a SQL query: string and numeric literals are replaced by ``?``,
+    comments and runs of whitespace by one space, and the text is lowercased
+
+    :param query: SQL query
+    """
+    return _SHAPE_TOKENS.sub(_shapeToken, query).strip().rstrip(';').strip().lower()
+
+class CostEstimate(object):
+    """
+    Expected cost of a query, see :meth:`CostStore.estimate`.
+
+    :param data_scanned: bytes scanned.
+    :param rows_scanned: rows scanned.
+    :param output_rows: rows returned.
+    :param elapsed: wall clock seconds from submission to the last page.
+    :param samples: number of past runs the estimate is based on.
+    :param exact: True when a past run scanned the whole input, so the
+        bytes scanned are known rather than bounded by the input limit.
+    """
+    def __init__(self, data_scanned, rows_scanned, output_rows, elapsed, samples, exact):
+        self.data_scanned = data_scanned
+        self.rows_scanned = rows_scanned
+        self.output_rows = output_rows
+        self.elapsed = elapsed
+        self.samples = samples
+        self.exact = exact
+
+    def bytesPerSecond(self):
+        return self.data_scanned / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return '<CostEstimate data_scanned={data_scanned} rows_scanned={rows_scanned} output_rows={output_rows} elapsed={elapsed:.1f}s samples={samples} exact={exact}>'.format(
+            data_scanned=self.data_scanned,
+            rows_scanned=self.rows_scanned,
+            output_rows=self.output_rows,
+            elapsed=self.elapsed,
+            samples=self.samples,
+            exact=self.exact
+        )
+
+class CostStore(object):
+    """
+    SQLite store of the scan statistics of queries, shared by the threads
+    of a client; set it with :meth:`Mixnode.setCostStore`.
+
+    Examples:
+        client.setCostStore(CostStore('/var/cache/mixnode/costs.db'))
+        print(client.estimate(query, input_limit=1 << 40))
+
+    :param path: Path of the database, in memory by default.
+    """
+    def __init__(self, path=':memory:'):
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS scans (shape TEXT, input_limit INTEGER, data_scanned INTEGER, rows_scanned INTEGER, output_rows INTEGER, elapsed REAL, created REAL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS scans_shape ON scans (shape, created)')
+        self.connection.commit()
+
+    def record(self, query, input_limit, stats, elapsed):
+        """
+        Keeps the scan statistics of a completed query
+
+        :param query: SQL query
+        :param input_limit: input limit of the query, None for the default one
+        :param stats: query object, or scan statistics, of the query
+        :param elapsed: wall clock seconds the query took
+        """
+        if stats.get('data_scanned') is None:
+            return
+        row = (queryShape(query), input_limit, stats['data_scanned'], stats.get('rows_scanned') or 0, stats.get('output_rows') or 0, elapsed, time.time())
+        with self._lock:
+            self.connection.execute('INSERT INTO scans VALUES (?, ?, ?, ?, ?, ?, ?)', row)
+            self.connection.commit()
+
+    def samples(self, query):
+        """
+        Most recent runs of the shape of a query, as
+        (input_limit, data_scanned, rows_scanned, output_rows, elapsed) tuples
+
+        :param query: SQL query
+        """
+        with self._lock:
+            return self.connection.execute(
+                'SELECT input_limit, data_scanned, rows_scanned, output_rows, elapsed FROM scans WHERE shape = ? ORDER BY created DESC LIMIT ?',
+                (queryShape(query), MAX_SAMPLES)).fetchall()
+
+    def estimate(self, query, input_limit=None):
+        """
+        Expected cost of a query with an input limit, None when no query of
+        its shape ran yet. A run which scanned less than its input limit
+        read the whole input, whose size then bounds the bytes scanned;
+        otherwise a query is expected to scan up to its input limit. Rows
+        and time scale with the bytes scanned.
+
+        :param query: SQL query
+        :param input_limit: input limit of the query, None for the default one
+        """
+        samples = self.samples(query)
+        if not samples:
+            return None
+        whole = [data for limit, data, rows, output, elapsed in samples if limit is None or data < limit]
+        scanned = sum(sample[1] for sample in samples)
+        if whole:
+            data_scanned = max(whole) if input_limit is None else min(input_limit, max(whole))
+        elif input_limit is not None:
+            data_scanned = input_limit
+        else:
+            data_scanned = max(sample[1] for sample in samples)
+        ratio = float(data_scanned) / scanned if scanned else 0.0
+        return CostEstimate(
+            data_scanned,
+            int(round(sum(sample[2] for sample in samples) * ratio)),
+            int(round(sum(sample[3] for sample in samples) * ratio)),
+            sum(sample[4] for sample in samples) * ratio,
+            len(samples),
+            bool(whole))
+
+    def close(self):
+        self.connection.close()
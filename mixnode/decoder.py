@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Decoding of the JSON values returned by Mixnode SQL engine into Python
+types, driven by the ``type`` / ``typeSignature`` of every column.
+
+A :class:`Decoder <Decoder>` compiles one converter per column once per
+query; columns whose JSON value already is the right Python type (varchar,
+bigint, boolean...) get no converter at all and cost nothing, the others
+are converted a whole column at a time with ``map``.
+"""
+
+# Standard python packages
+import base64
+import datetime
+from decimal import Decimal
+
+SPECIAL_FLOATS = {
+  'NaN': float('nan'),
+  'Infinity': float('inf'),
+  '-Infinity': float('-inf')
+}
+
+def _double(value):
+    return SPECIAL_FLOATS.get(value, value)
+
+def _decimal(value):
+    return None if value is None else Decimal(value)
+
+def _date(value):
+    return None if value is None else datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+def _microseconds(value):
+    # %f takes at most 6 digits: timestamp(p) and time(p) values with p > 6
+    # are truncated to microseconds, the precision of datetime
+    head, dot, fraction = value.partition('.')
+    return head + dot + fraction[:6]
+
+def _parseTimestamp(value):
+    if '.' in value:
+        return datetime.datetime.strptime(_microseconds(value), '%Y-%m-%d %H:%M:%S.%f')
+    return datetime.datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+def _timestamp(value):
+    return None if value is None else _parseTimestamp(value)
+
+class _UTC(datetime.tzinfo):
+    def utcoffset(self, dt):
+        return datetime.timedelta(0)
+
+    def tzname(self, dt):
+        return 'UTC'
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+UTC = _UTC()
+
+def _timestampWithTimeZone(value):
+    # Only UTC values are converted, named zones are kept as text
+    if value is None or not value.endswith(' UTC'):
+        return value
+    return _parseTimestamp(value[:-4]).replace(tzinfo=UTC)
+
+def _time(value):
+    if value is None:
+        return None
+    if '.' in value:
+        return datetime.datetime.strptime(_microseconds(value), '%H:%M:%S.%f').time()
+    return datetime.datetime.strptime(value, '%H:%M:%S').time()
+
+def _varbinary(value):
+    return None if value is None else base64.b64decode(value)
+
+CONVERTERS = {
+  'double': _double,
+  'real': _double,
+  'decimal': _decimal,
+  'date': _date,
+  'timestamp': _timestamp,
+  'timestamp with time zone': _timestampWithTimeZone,
+  'time': _time,
+  'varbinary': _varbinary
+}
+
+def typeArguments(signature):
+    """
+    Nested type signatures of a parametrized type such as array(T) or map(K, V)
+
+    :param signature: typeSignature of a column
+    """
+    nested = []
+    for argument in signature.get('arguments') or []:
+        value = argument.get('value')
+        if isinstance(value, dict) and 'rawType' in value:
+            nested.append(value)
+        elif isinstance(value, dict) and isinstance(value.get('typeSignature'), dict):
+            # NAMED_TYPE_SIGNATURE of row fields
+            nested.append(value['typeSignature'])
+    if not nested:
+        nested = [argument for argument in signature.get('typeArguments') or [] if isinstance(argument, dict)]
+    return nested
+
+def compileConverter(signature):
+    """
+    Builds the converter of a type signature
+
+    :param signature: typeSignature of a column, or a dict holding only its rawType
+    :return: function converting a JSON value, None when no conversion is needed
+    """
+    rawType = signature.get('rawType')
+    if rawType in CONVERTERS:
+        return CONVERTERS[rawType]
+    nested = [compileConverter(argument) for argument in typeArguments(signature)]
+    if rawType == 'array' and nested and nested[0]:
+        element = nested[0]
+        return lambda value: None if value is None else [element(item) for item in value]
+    if rawType == 'map' and len(nested) == 2 and nested[1]:
+        item = nested[1]
+        return lambda value: None if value is None else dict((key, item(entry)) for key, entry in value.items())
+    if rawType == 'row' and any(nested):
+        fields = [converter or (lambda entry: entry) for converter in nested]
+        return lambda value: None if value is None else [field(entry) for field, entry in zip(fields, value)]
+    return None
+
+def columnSignature(column):
+    """
+    Type signature of a column, falling back on its ``type`` when missing
+
+    :param column: ``columns`` entry returned by Mixnode server
+    """
+    signature = column.get('typeSignature')
+    if signature and signature.get('rawType'):
+        return signature
+    rawType = column.get('type') or ''
+    return {'rawType': rawType.split('(')[0]}
+
+class Decoder(object):
+    """
+    Per query decoder compiled from the ``columns`` of its first page.
+
+    :param columns: ``columns`` metadata returned by Mixnode server.
+    """
+    def __init__(self, columns):
+        self.columns = columns
+        self.converters = [compileConverter(columnSignature(column)) for column in columns]
+        self.isIdentity = not any(self.converters)
+
+    def decodeColumns(self, rows):
+        """
+        Transposes and decodes rows
+
+        :param rows: ``rows`` of a results page
+        :return: list of columns of decoded values
+        """
+        columns = [list(values) for values in zip(*rows)]
+        for position, converter in enumerate(self.converters):
+            if converter is not None and columns:
+                columns[position] = list(map(converter, columns[position]))
+        return columns
+
+    def decodeRows(self, rows):
+        """
+        Decodes rows, returned as-is when no column needs a conversion
+
+        :param rows: ``rows`` of a results page
+        :return: list of rows of decoded values
+        """
+        if self.isIdentity or not rows:
+            return rows
+        return [list(row) for row in zip(*self.decodeColumns(rows))]
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Incremental parsing of the results file served from ``results_download_url``.
+The file is CSV with a header row naming the columns, so the records built
+from it hold the raw text of every value.
+"""
+
+# Standard python packages
+import codecs
+import csv
+
+# Largest value accepted in a CSV field; pages' HTML content is much larger
+# than the default limit of the csv module
+FIELD_SIZE_LIMIT = 1 << 30
+
+def iterLines(chunks, encoding='utf-8'):
+    """
+    Decodes a stream of bytes into lines, keeping their line endings, without
+    ever holding more than one chunk and one partial line in memory
+
+    :param chunks: iterable of bytes
+    :param encoding: encoding of the stream
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    for chunk in chunks:
+        parts = (pending + decoder.decode(chunk)).split('\n')
+        pending = parts.pop()
+        for part in parts:
+            yield part + '\n'
+    pending = pending + decoder.decode(b'', True)
+    if pending:
+        yield pending
+
+def iterRecords(chunks, encoding='utf-8'):
+    """
+    Parses a streamed CSV results file into records keyed by column name.
+    Quoted values spanning several lines are supported.
+
+    :param chunks: iterable of bytes
+    :param encoding: encoding of the stream
+    """
+    if csv.field_size_limit() < FIELD_SIZE_LIMIT:
+        csv.field_size_limit(FIELD_SIZE_LIMIT)
+    reader = csv.reader(iterLines(chunks, encoding))
+    header = next(reader, None)
+    if header is None:
+        return
+    for row in reader:
+        yield dict(zip(header, row))
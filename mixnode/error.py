@@ -47,9 +47,13 @@ class ResponseError(MixnodeError):
     """
     def __init__(self, response):
         super(ResponseError, self).__init__(message='', status_code='', status='')
-        raw_response = response.json()
         self.status_code = response.status_code
-        self.message = raw_response['errors']['message']
+        self.headers = getattr(response, 'headers', None) or {}
+        try:
+            self.message = response.json()['errors']['message']
+        except (ValueError, TypeError, KeyError):
+            # Errors of proxies and load balancers don't carry a JSON body
+            self.message = getattr(response, 'reason', None) or ''
 
 class ResponseServerError(MixnodeError):
     """
@@ -64,11 +68,62 @@ class ResponseServerError(MixnodeError):
         self.status = response['status']
         self.message = response['message']
 
+class DownloadError(MixnodeError):
+    """
+    DownloadError is raised when the results file of a query can't be downloaded.
+
+    :param status_code: HTTP status code returned by the download server.
+    :param reason: Reason phrase returned by the download server.
+    """
+    def __init__(self, status_code, reason=''):
+        super(DownloadError, self).__init__(message='Could not download the results file: ' + str(reason), status_code=status_code)
+
+class MissingDependency(MixnodeError):
+    """
+    MissingDependency is raised when an optional feature needs a package
+    which is not installed.
+
+    :param package: Name of the missing package.
+    """
+    def __init__(self, package):
+        super(MissingDependency, self).__init__(message='Missing optional dependency ' + package + ', install it with: pip install ' + package)
+        self.package = package
+
+class NotSupported(MixnodeError):
+    """
+    NotSupported is raised when a feature of :class:`Mixnode <mixnode.api_client.Mixnode>`
+    is not available on a client, e.g. on :class:`AsyncMixnode <mixnode.async_client.AsyncMixnode>`.
+
+    :param feature: Name of the unsupported method.
+    :param client: Name of the client class.
+    """
+    def __init__(self, feature, client):
+        super(NotSupported, self).__init__(message=feature + ' is not supported by ' + client)
+        self.feature = feature
+        self.client = client
+
+class PartitionError(MixnodeError):
+    """
+    PartitionError is raised when shards of a partitioned query still fail
+    once run again, so that their records would be missing from the result.
+
+    :param result: :class:`PartitionedResult <mixnode.partition.PartitionedResult>`
+        keeping the failed shards on ``failed``.
+    """
+    def __init__(self, result):
+        shard, batch_result = result.failed[0]
+        super(PartitionError, self).__init__(message=str(len(result.failed)) + ' shard(s) failed, first ' + str(shard) + ': ' + str(batch_result.error))
+        self.result = result
+
 # Common error responses listed here
 
 class KnownMixnodeError(MixnodeError):
-    def __init__(self, **kwargs):
+    """
+    :param more: Underlying exception, e.g. of the HTTP client.
+    """
+    def __init__(self, more=None, **kwargs):
         super(KnownMixnodeError, self).__init__(message=self.message, **kwargs)
+        self.more = more
 
 class RequestTimeout(KnownMixnodeError):
     message = 'Request timed out before getting a response'
@@ -85,6 +140,9 @@ class MissingConfiguration(KnownMixnodeError):
 class MissingQuery(KnownMixnodeError):
     message = 'Missing the required parameter (query) on calling execute'
 
+class MissingWebhook(KnownMixnodeError):
+    message = 'Missing webhook receiver reachable by Mixnode server, set one with setWebhook before waiting for webhooks'
+
 class QueryTimeout(KnownMixnodeError):
     message = 'Query was cancelled due to user defined timeout'
 
@@ -97,6 +155,7 @@ KNOWN_ERRORS = {
     'MissingApiKey': MissingApiKey,
     'MissingConfiguration': MissingConfiguration,
     'MissingQuery': MissingQuery,
+    'MissingWebhook': MissingWebhook,
     'QueryTimeout': QueryTimeout,
     'Unknown': Unknown
 }
@@ -108,7 +167,7 @@ QUERY_STATUS = {
 }
 
 QUERY_ERROR_STATUS = {
-  'USER_CANCELED'
+  'USER_CANCELED': 'USER_CANCELED',
   'FAILED': 'FAILED',
   'SYNTAX_ERROR': 'SYNTAX_ERROR',
   'GENERIC_INTERNAL_ERROR': 'GENERIC_INTERNAL_ERROR',
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Arrow and pandas export of query results: every results page is turned
+straight into an Arrow record batch, with the schema derived from the
+``columns`` / ``typeSignature`` metadata, and the batches are concatenated
+without a copy at the end. Requires ``pip install pyarrow``.
+"""
+
+# Standard python packages
+import json
+import re
+
+
+# Internal imports
+from .decoder import (Decoder, columnSignature, typeArguments)
+from .error import MissingDependency
+
+DECIMAL_TYPE = re.compile(r'^decimal\((\d+),\s*(\d+)\)$')
+
+def importPyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise MissingDependency('pyarrow')
+    return pyarrow
+
+def _json(value):
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value)
+
+def arrowType(pa, signature, typeName=''):
+    """
+    Arrow type of a type signature, None for the types kept as text
+
+    :param pa: the pyarrow module
+    :param signature: typeSignature of a column
+    :param typeName: ``type`` of the column, e.g. decimal(10,2)
+    """
+    rawType = signature.get('rawType')
+    scalars = {
+      'varchar': pa.string(),
+      'char': pa.string(),
+      'bigint': pa.int64(),
+      'integer': pa.int32(),
+      'smallint': pa.int16(),
+      'tinyint': pa.int8(),
+      'double': pa.float64(),
+      'real': pa.float32(),
+      'boolean': pa.bool_(),
+      'date': pa.date32(),
+      'timestamp': pa.timestamp('us'),
+      'time': pa.time64('us'),
+      'varbinary': pa.binary()
+    }
+    if rawType in scalars:
+        return scalars[rawType]
+    if rawType == 'decimal':
+        match = DECIMAL_TYPE.match(typeName.replace(' ', ''))
+        if match:
+            return pa.decimal128(int(match.group(1)), int(match.group(2)))
+        return None
+    nested = typeArguments(signature)
+    if rawType == 'array' and len(nested) == 1:
+        element = arrowType(pa, nested[0])
+        return pa.list_(element) if element is not None else None
+    if rawType == 'map' and len(nested) == 2:
+        key, item = arrowType(pa, nested[0]), arrowType(pa, nested[1])
+        if key is not None and item is not None:
+            return pa.map_(key, item)
+    return None
+
+class ArrowBuilder(object):
+    """
+    Builds Arrow record batches out of the rows of results pages.
+
+    Columns of a type without an Arrow counterpart (row, json, timestamp
+    with time zone...) are kept as text, JSON encoded when needed.
+
+    :param columns: ``columns`` metadata returned by Mixnode server.
+    """
+    def __init__(self, columns):
+        self.pa = importPyarrow()
+        self.decoder = Decoder(columns)
+        fields = []
+        for position, column in enumerate(columns):
+            signature = columnSignature(column)
+            dataType = arrowType(self.pa, signature, column.get('type') or '')
+            if dataType is None:
+                dataType = self.pa.string()
+                self.decoder.converters[position] = _json
+            fields.append(self.pa.field(column['name'], dataType))
+        self.decoder.isIdentity = not any(self.decoder.converters)
+        self.schema = self.pa.schema(fields)
+
+    def recordBatch(self, rows):
+        """
+        Record batch of the rows of a results page
+
+        :param rows: ``rows`` of a results page
+        """
+        if self.decoder.isIdentity:
+            columns = [list(values) for values in zip(*rows)]
+        else:
+            columns = self.decoder.decodeColumns(rows)
+        arrays = [self.pa.array(values, type=field.type) for values, field in zip(columns, self.schema)]
+        return self.pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+def iterBatches(pages):
+    """
+    Yields the ArrowBuilder of the query once its columns are known, then a
+    record batch per non-empty results page
+
+    :param pages: iterable of results pages
+    """
+    builder = None
+    for payload in pages:
+        if builder is None and payload.get('columns'):
+            builder = ArrowBuilder(payload['columns'])
+            yield builder
+        if payload.get('rows'):
+            yield builder.recordBatch(payload['rows'])
+
+def toTable(pages):
+    """
+    Arrow table of a query, concatenating its record batches without a copy
+
+    :param pages: iterable of results pages
+    """
+    pa = importPyarrow()
+    batches = iterBatches(pages)
+    builder = next(batches, None)
+    if builder is None:
+        return pa.table({})
+    return pa.Table.from_batches(list(batches), schema=builder.schema)
+
+def toReader(pages):
+    """
+    Streaming :class:`pyarrow.RecordBatchReader` of a query; pages are only
+    fetched as the reader is consumed
+
+    :param pages: iterable of results pages
+    """
+    pa = importPyarrow()
+    batches = iterBatches(pages)
+    builder = next(batches, None)
+    if builder is None:
+        return pa.RecordBatchReader.from_batches(pa.schema([]), iter([]))
+    return pa.RecordBatchReader.from_batches(builder.schema, batches)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+JSON backends decoding the bodies of the responses of Mixnode server
+straight from their raw bytes, without building an intermediate str. The
+fastest installed one is picked by default: orjson, then ujson, then
+pysimdjson, falling back on the standard json module.
+"""
+
+# Standard python packages
+import importlib
+import json
+import sys
+
+
+# Internal imports
+from .error import MissingDependency
+
+# Backends by order of preference
+BACKENDS = ('orjson', 'ujson', 'simdjson', 'json')
+
+def _stdlibLoads(content):
+    # json.loads only accepts bytes from Python 3.6 on
+    if isinstance(content, bytes) and sys.version_info < (3, 6):
+        content = content.decode('utf-8')
+    return json.loads(content)
+
+def loader(name):
+    """
+    Function decoding a JSON document out of bytes with a backend
+
+    :param name: one of BACKENDS
+    """
+    if name == 'json':
+        return _stdlibLoads
+    if name not in BACKENDS:
+        raise ValueError('Unknown JSON backend ' + name + ', expected one of ' + ', '.join(BACKENDS))
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        raise MissingDependency(name)
+    return module.loads
+
+class JsonBackend(object):
+    """
+    JSON backend used to decode the responses of Mixnode server; its
+    ``loads`` attribute decodes a JSON document out of bytes or str.
+
+    Examples:
+        client.setJsonBackend('ujson')
+
+    :param name: One of BACKENDS, the fastest installed one when None.
+    """
+    def __init__(self, name=None):
+        if name is None:
+            for candidate in BACKENDS:
+                try:
+                    self.loads = loader(candidate)
+                except MissingDependency:
+                    continue
+                name = candidate
+                break
+        else:
+            self.loads = loader(name)
+        self.name = name
+
+    def __repr__(self):
+        return 'JsonBackend(' + repr(self.name) + ')'
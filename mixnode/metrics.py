@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Instrumentation of the lifecycle of queries.
+
+Every :class:`Query <mixnode.query.Query>` accounts its requests, results
+pages, bytes received, sleeps and the time it was seen in every status of
+the server on ``query.metrics``; once it is over, the scan statistics of
+the query object (``data_scanned``, ``rows_scanned``, ``output_size``,
+``output_rows``, ``created_ts``, ``ended_ts``) can be fetched too. The
+listeners added to a client are notified of the same events as they
+happen, e.g. to export them to Prometheus.
+"""
+
+# Standard python packages
+import threading
+import time
+
+
+# Internal imports
+from .error import MissingDependency
+
+# Fields of the query object kept as scan statistics
+SERVER_STATS = ('data_scanned', 'rows_scanned', 'output_size', 'output_rows', 'created_ts', 'ended_ts')
+
+# Reasons of a sleep
+SLEEP_POLLING = 'polling'
+SLEEP_RETRY = 'retry'
+SLEEP_THROTTLE = 'throttle'
+SLEEP_WEBHOOK = 'webhook'
+
+class QueryMetrics(object):
+    """
+    Metrics of a single query; updated by the threads fetching its pages.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.ended = None
+        self.requests = 0
+        self.requestTime = 0.0
+        self.pages = 0
+        self.pageTime = 0.0
+        self.pageLatencyMax = 0.0
+        self.bytes = 0
+        self.sleeps = {}
+        self.statusTimes = {}
+        self.server = {}
+        self._status = None
+        self._statusSince = None
+
+    def end(self):
+        self.ended = time.time()
+        self.observe(None)
+
+    def addRequest(self, latency, size, is_page):
+        """
+        Accounts a response
+
+        :param latency: seconds between firing the request and reading its response
+        :param size: size in bytes of the body of the response
+        :param is_page: True for a results page
+        """
+        with self._lock:
+            self.requests += 1
+            self.requestTime += latency
+            self.bytes += size
+            if is_page:
+                self.pages += 1
+                self.pageTime += latency
+                self.pageLatencyMax = max(self.pageLatencyMax, latency)
+
+    def addSleep(self, seconds, reason):
+        """
+        Accounts a sleep
+
+        :param seconds: duration of the sleep
+        :param reason: SLEEP_POLLING, SLEEP_RETRY, SLEEP_THROTTLE or SLEEP_WEBHOOK
+        """
+        with self._lock:
+            self.sleeps[reason] = self.sleeps.get(reason, 0.0) + seconds
+
+    def observe(self, status):
+        """
+        Accounts the time the query spent in the status it was last seen in
+
+        :param status: status of the query returned by the server, None once it is over
+        """
+        now = time.time()
+        with self._lock:
+            if self._status is not None:
+                self.statusTimes[self._status] = self.statusTimes.get(self._status, 0.0) + now - self._statusSince
+            self._status = status
+            self._statusSince = now
+
+    def setServerStats(self, info):
+        """
+        Keeps the scan statistics of a query object
+
+        :param info: query object returned by Mixnode server
+        """
+        self.server = dict((field, info[field]) for field in SERVER_STATS if field in info)
+
+    def elapsed(self):
+        """
+        Wall clock seconds from the submission of the query to its end
+        """
+        return (self.ended or time.time()) - self.started
+
+    def sleepTime(self):
+        return sum(self.sleeps.values())
+
+    def __repr__(self):
+        return '<QueryMetrics elapsed={elapsed:.3f}s pages={pages} bytes={bytes} sleep={sleep:.3f}s statuses={statuses} server={server}>'.format(
+            elapsed=self.elapsed(),
+            pages=self.pages,
+            bytes=self.bytes,
+            sleep=self.sleepTime(),
+            statuses=self.statusTimes,
+            server=self.server
+        )
+
+class QueryListener(object):
+    """
+    Base class of the listeners notified of the lifecycle of the queries of
+    a client, see :meth:`Mixnode.addListener`. Listeners are called from the
+    threads fetching the pages, so they have to be thread safe and quick.
+    """
+    def onQueryStart(self, query):
+        """
+        Called before a query is submitted
+
+        :param query: :class:`Query <mixnode.query.Query>`
+        """
+        pass
+
+    def onRequest(self, query, method, latency, size, is_page):
+        """
+        Called once the response of a request was read
+
+        :param query: :class:`Query <mixnode.query.Query>`
+        :param method: HTTP method of the request
+        :param latency: seconds between firing the request and reading its response
+        :param size: size in bytes of the body of the response
+        :param is_page: True for a results page
+        """
+        pass
+
+    def onSleep(self, query, seconds, reason):
+        """
+        Called before the client sleeps on behalf of a query
+
+        :param query: :class:`Query <mixnode.query.Query>`
+        :param seconds: duration of the sleep
+        :param reason: SLEEP_POLLING, SLEEP_RETRY, SLEEP_THROTTLE or SLEEP_WEBHOOK
+        """
+        pass
+
+    def onQueryEnd(self, query):
+        """
+        Called once a query is over, successful or not, with its metrics complete
+
+        :param query: :class:`Query <mixnode.query.Query>`
+        """
+        pass
+
+class PrometheusListener(QueryListener):
+    """
+    Exports the metrics of the queries to Prometheus; requires
+    ``pip install prometheus_client``.
+
+    Examples:
+        client.addListener(PrometheusListener())
+        prometheus_client.start_http_server(8000)
+
+    :param registry: Registry the metrics are added to, the default one when None.
+    :param namespace: Prefix of the names of the metrics.
+    """
+    def __init__(self, registry=None, namespace='mixnode'):
+        try:
+            import prometheus_client
+        except ImportError:
+            raise MissingDependency('prometheus_client')
+        options = {'namespace': namespace}
+        if registry is not None:
+            options['registry'] = registry
+        self.queries = prometheus_client.Counter('queries', 'Queries run, by final state', ['state'], **options)
+        self.duration = prometheus_client.Histogram('query_duration_seconds', 'Wall clock duration of the queries', **options)
+        self.statusTime = prometheus_client.Counter('query_status_seconds', 'Time the queries were seen in every status of the server', ['status'], **options)
+        self.latency = prometheus_client.Histogram('request_latency_seconds', 'Latency of the requests', ['method', 'kind'], **options)
+        self.received = prometheus_client.Counter('received_bytes', 'Bytes of responses received', **options)
+        self.rows = prometheus_client.Counter('rows', 'Rows received', **options)
+        self.sleep = prometheus_client.Counter('sleep_seconds', 'Time slept, by reason', ['reason'], **options)
+        self.dataScanned = prometheus_client.Counter('data_scanned_bytes', 'Bytes scanned by the queries, from their scan statistics', **options)
+        self.rowsScanned = prometheus_client.Counter('rows_scanned', 'Rows scanned by the queries, from their scan statistics', **options)
+
+    def onRequest(self, query, method, latency, size, is_page):
+        self.latency.labels(method, 'page' if is_page else 'query').observe(latency)
+        self.received.inc(size)
+
+    def onSleep(self, query, seconds, reason):
+        self.sleep.labels(reason).inc(seconds)
+
+    def onQueryEnd(self, query):
+        metrics = query.metrics
+        self.queries.labels(query.state).inc()
+        self.duration.observe(metrics.elapsed())
+        self.rows.inc(query.rows)
+        for status, seconds in metrics.statusTimes.items():
+            self.statusTime.labels(status).inc(seconds)
+        if metrics.server.get('data_scanned'):
+            self.dataScanned.inc(metrics.server['data_scanned'])
+        if metrics.server.get('rows_scanned'):
+            self.rowsScanned.inc(metrics.server['rows_scanned'])
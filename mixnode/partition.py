@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Partitioned execution of big queries: a query template is run as many
+shards, each selecting a disjoint part of the result, whose records are
+merged back together, see :meth:`Mixnode.execute_partitioned`.
+
+The ``{partition}`` placeholder of the template is replaced by the clause
+of every shard: a predicate on a hash of a key for :class:`HashPartitions`,
+an ``ORDER BY ... OFFSET ... LIMIT ...`` clause for :class:`OffsetPartitions`.
+A shard failing on a resource limit is split in two and the halves run
+again; shards failing otherwise are run again as they are.
+"""
+
+# Internal imports
+from .error import (ResponseError, ResponseServerError, QUERY_ERROR_STATUS)
+from .retry import isTransient
+
+# Placeholder of a query template replaced by the clause of each shard
+PLACEHOLDER = '{partition}'
+# Runs of a shard, including its retries and the runs of its halves
+MAX_ATTEMPTS = 3
+# Statuses of a shard which is split in two before being run again
+SPLIT_STATUS = (
+    QUERY_ERROR_STATUS['EXCEEDED_MEMORY_LIMIT'],
+    QUERY_ERROR_STATUS['OUTPUT_LIMIT_EXCEEDED'],
+)
+# Statuses of a shard which would fail the same way if run again; every
+# shard scans the whole input so INPUT_LIMIT_EXCEEDED is one of them
+FATAL_STATUS = (
+    QUERY_ERROR_STATUS['SYNTAX_ERROR'],
+    QUERY_ERROR_STATUS['PERMISSION_DENIED'],
+    QUERY_ERROR_STATUS['USER_ERROR'],
+    QUERY_ERROR_STATUS['DIVISION_BY_ZERO'],
+    QUERY_ERROR_STATUS['INPUT_LIMIT_EXCEEDED'],
+    QUERY_ERROR_STATUS['USER_CANCELED'],
+)
+# Largest bigint, masking the sign bit of a hash
+_MAX_BIGINT = 9223372036854775807
+
+class Partitions(object):
+    """
+    Base class of the partitioning plans of :meth:`Mixnode.execute_partitioned`.
+    A shard is a tuple; sorting the shards orders their records.
+    """
+    def shards(self):
+        """
+        Shards of the plan
+        """
+        raise NotImplementedError()
+
+    def clause(self, shard):
+        """
+        SQL replacing the placeholder of the template for a shard
+        """
+        raise NotImplementedError()
+
+    def split(self, shard):
+        """
+        Two shards selecting the records of a shard, None if it can't be split
+        """
+        return None
+
+    def query(self, template, shard):
+        """
+        Query of a shard
+
+        :param template: SQL query containing the ``{partition}`` placeholder
+        :param shard: shard of the plan
+        """
+        if PLACEHOLDER not in template:
+            raise ValueError('the query template has no ' + PLACEHOLDER + ' placeholder')
+        return template.replace(PLACEHOLDER, self.clause(shard))
+
+class HashPartitions(Partitions):
+    """
+    Shards the rows of a query on the xxhash64 of a key, e.g. ``url_host``:
+    a shard keeps the rows whose hash modulo the number of shards is its
+    remainder, so that all the rows of a key fall in the same shard and a
+    GROUP BY on the key needs no merge. A shard is split in two by doubling
+    its modulus.
+
+    Examples:
+        client.execute_partitioned("SELECT url FROM pages WHERE {partition}", HashPartitions('url_host', 8))
+
+    :param key: SQL expression hashed, cast to varchar.
+    :param shards: Number of shards.
+    """
+    def __init__(self, key, shards):
+        self.key = key
+        self.count = shards
+
+    def shards(self):
+        return [(remainder, self.count) for remainder in range(self.count)]
+
+    def clause(self, shard):
+        remainder, modulus = shard
+        return 'mod(bitwise_and(from_big_endian_64(xxhash64(to_utf8(CAST({key} AS varchar)))), {mask}), {modulus}) = {remainder}'.format(
+            key=self.key,
+            mask=_MAX_BIGINT,
+            modulus=modulus,
+            remainder=remainder
+        )
+
+    def split(self, shard):
+        remainder, modulus = shard
+        return [(remainder, modulus * 2), (remainder + modulus, modulus * 2)]
+
+class OffsetPartitions(Partitions):
+    """
+    Shards the first ``rows`` rows of a query in the order of ``order_by``
+    into consecutive ranges fetched with OFFSET and LIMIT; the order has to
+    be total for the shards not to overlap. The template ends with the
+    placeholder, which replaces its ORDER BY clause. A shard is split in two
+    halves of its range.
+
+    Examples:
+        client.execute_partitioned("SELECT url FROM pages {partition}", OffsetPartitions('url', 100000, 4))
+
+    :param order_by: ORDER BY expression of the query.
+    :param rows: Number of rows fetched.
+    :param shards: Number of shards.
+    """
+    def __init__(self, order_by, rows, shards):
+        self.order_by = order_by
+        self.rows = rows
+        self.count = shards
+
+    def shards(self):
+        size = -(-self.rows // self.count)
+        return [(offset, min(size, self.rows - offset)) for offset in range(0, self.rows, size)]
+
+    def clause(self, shard):
+        offset, limit = shard
+        return 'ORDER BY {order_by} OFFSET {offset} LIMIT {limit}'.format(order_by=self.order_by, offset=offset, limit=limit)
+
+    def split(self, shard):
+        offset, limit = shard
+        if limit < 2:
+            return None
+        half = limit // 2
+        return [(offset, half), (offset + half, limit - half)]
+
+class Aggregation(object):
+    """
+    Merges the partial aggregates computed by every shard into the
+    aggregates of the whole query: the records sharing the values of the
+    ``group_by`` columns are merged into one, adding their ``sum`` and
+    ``count`` columns and keeping the least ``min`` and greatest ``max``.
+    An average has to be computed from a sum and a count once merged.
+
+    Examples:
+        Aggregation(group_by=['url_host'], count=['pages'], max=['last_seen'])
+
+    :param group_by: Names of the grouping columns.
+    :param sum: Names of the columns of SUM aggregates.
+    :param count: Names of the columns of COUNT aggregates.
+    :param min: Names of the columns of MIN aggregates.
+    :param max: Names of the columns of MAX aggregates.
+    """
+    def __init__(self, group_by=(), sum=(), count=(), min=(), max=()):
+        self.group_by = tuple(group_by)
+        self.additive = tuple(sum) + tuple(count)
+        self.least = tuple(min)
+        self.greatest = tuple(max)
+
+    def merge(self, records):
+        """
+        Merged records, in the order their groups were first seen
+
+        :param records: iterable of the records of every shard
+        """
+        groups = {}
+        merged = []
+        for record in records:
+            key = tuple(record.get(name) for name in self.group_by)
+            current = groups.get(key)
+            if current is None:
+                groups[key] = current = dict(record)
+                merged.append(current)
+                continue
+            for name in self.additive:
+                current[name] = _combine(current.get(name), record.get(name), lambda a, b: a + b)
+            for name in self.least:
+                current[name] = _combine(current.get(name), record.get(name), lambda a, b: a if a <= b else b)
+            for name in self.greatest:
+                current[name] = _combine(current.get(name), record.get(name), lambda a, b: a if a >= b else b)
+        return merged
+
+def _combine(a, b, operator):
+    """
+    Combines two aggregates, NULL being the aggregate of no row
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return operator(a, b)
+
+class PartitionedResult(object):
+    """
+    Outcome of :meth:`Mixnode.execute_partitioned`.
+
+    :param template: SQL query template of the shards.
+    """
+    def __init__(self, template):
+        self.template = template
+        self.records = []
+        self.shards = []
+        self.failed = []
+        self.retries = 0
+        self.splits = 0
+
+    def isSuccessful(self):
+        return not self.failed
+
+    def __repr__(self):
+        return '<PartitionedResult shards={shards} records={records} retries={retries} splits={splits} failed={failed}>'.format(
+            shards=len(self.shards),
+            records=len(self.records),
+            retries=self.retries,
+            splits=self.splits,
+            failed=len(self.failed)
+        )
+
+def isRetryable(error, submitted=True):
+    """
+    True when a shard failing with an error may succeed once run again: a
+    query which failed on the server unless it would fail the same way, or
+    a request which failed for a transient reason. A shard whose submission
+    failed is only run again when the server turned it down with 429, as
+    it may have been submitted nonetheless.
+
+    :param error: :class:`MixnodeError <MixnodeError>` of the shard
+    :param submitted: False when the shard failed before getting a query id
+    """
+    if isinstance(error, ResponseServerError):
+        return error.status not in FATAL_STATUS
+    if not submitted:
+        return isinstance(error, ResponseError) and error.status_code == 429
+    return isTransient(error)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+# Standard python packages
+import math
+import random
+
+# Initial delay in seconds before polling a query which is still in progress
+INITIAL_DELAY = 0.5
+# Upper bound of the delay in seconds between two polls
+MAX_DELAY = 30
+
+class PollingPolicy(object):
+    """
+    Base class for the policies deciding how long to wait before polling a
+    query which is still PLANNING or RUNNING. Pages of a FINISHED query are
+    fetched back-to-back and never consult the policy.
+
+    Policies are stateless so a single instance can be shared by every query
+    of a client.
+    """
+    def delay(self, attempt):
+        """
+        Returns the delay in seconds before the next poll.
+
+        :param attempt: Number of consecutive polls which found the query in progress, starting at 1.
+        """
+        raise NotImplementedError()
+
+class ConstantPolling(PollingPolicy):
+    """
+    Waits the same amount of time between every poll.
+
+    :param interval: Delay in seconds.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+
+    def delay(self, attempt):
+        return self.interval
+
+class ExponentialBackoff(PollingPolicy):
+    """
+    Waits ``initial * factor ** (attempt - 1)`` seconds, capped at ``maximum``,
+    with a random jitter of +/- ``jitter`` (as a fraction of the delay) so that
+    many clients polling at once spread out their requests.
+
+    Examples:
+        client.setPollingPolicy(ExponentialBackoff(initial=1, factor=1.5, maximum=10))
+
+    :param initial: Delay in seconds of the first poll.
+    :param factor: Multiplier applied on every consecutive poll.
+    :param maximum: Upper bound of the delay in seconds.
+    :param jitter: Fraction of the delay randomly added or removed.
+    """
+    def __init__(self, initial=INITIAL_DELAY, factor=2, maximum=MAX_DELAY, jitter=0.1):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+
+    def delay(self, attempt):
+        exponent = attempt - 1
+        if self.factor > 1 and self.initial > 0 and self.maximum > 0:
+            # The delay is capped past this exponent, and overflows far beyond it
+            exponent = min(exponent, max(0, int(math.ceil(math.log(self.maximum / float(self.initial), self.factor)))))
+        delay = min(self.maximum, self.initial * self.factor ** exponent)
+        if self.jitter:
+            delay = delay * (1 + self.jitter * (2 * random.random() - 1))
+        return min(self.maximum, max(0, delay))
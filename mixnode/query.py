@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+# Standard python packages
+import time
+
+
+# Internal imports
+from .error import QUERY_STATUS
+from .metrics import QueryMetrics
+
+# Statuses of a query which is still in progress and needs to be polled
+IN_PROGRESS_STATUS = (QUERY_STATUS['PLANNING'], QUERY_STATUS['RUNNING'])
+
+PAGINATION_STATE = {
+  'SUBMITTED': 'SUBMITTED',
+  'POLLING': 'POLLING',
+  'PAGING': 'PAGING',
+  'DONE': 'DONE',
+  'FAILED': 'FAILED',
+  'CANCELED': 'CANCELED'
+}
+
+def _pageNumber(uri):
+    """
+    Extracts N out of a /queries/{query_id}/results/N URI, None if it has another shape
+
+    :param uri: URI of a results page
+    """
+    try:
+        return int(uri.rstrip('/').rsplit('/', 1)[1])
+    except (ValueError, IndexError):
+        return None
+
+class Query(object):
+    """
+    Pagination state machine of a single query:
+
+        SUBMITTED -> POLLING -> PAGING -> DONE
+        (any state) -> FAILED
+        (any state) -> CANCELED, once its budget or deadline is spent or it is cancelled
+
+    A query does no I/O itself: the driver asks it for the next request with
+    :meth:`next_request`, fires it and hands the payload back to :meth:`feed`.
+    All the per-query state lives here, so the client itself stays shareable
+    and the loop runs in constant stack however many pages there are.
+
+    :param client: :class:`Mixnode <Mixnode>` client used to build request parameters.
+    :param form_params: Form parameters of POST /queries, None when attaching to a submitted query.
+    :param query_id: Id of an already submitted query to attach to.
+    :param page: Results page to resume from when attaching.
+    :param webhook: :class:`WebhookReceiver <mixnode.webhook.WebhookReceiver>`
+        notified of the completion of the query, which is then waited for
+        instead of polled.
+    """
+    def __init__(self, client, form_params=None, query_id=None, page=1, webhook=None):
+        self.client = client
+        self.form_params = form_params
+        self.query_id = query_id
+        self.info = None
+        self.page = page
+        self.next_uri = None
+        self.attempt = 0
+        self.retries = 0
+        self.pages = 0
+        self.rows = 0
+        self.error = None
+        self.decoder = None
+        self.checkpoint = None
+        self.webhook = webhook
+        self.status = None
+        self.max_rows = None
+        self.deadline = None
+        self.expires = None
+        if getattr(client, 'queryTimeout', None):
+            self.expires = time.time() + client.queryTimeout
+        self.metrics = QueryMetrics()
+        self.timings = dict((state, 0.0) for state in PAGINATION_STATE)
+        self.state = None
+        self._since = time.time()
+        if query_id is None:
+            self._transition(PAGINATION_STATE['SUBMITTED'])
+        else:
+            self._transition(PAGINATION_STATE['POLLING'])
+
+    def _transition(self, state):
+        """
+        Moves to another state and accounts the time spent in the current one
+
+        :param state: one of PAGINATION_STATE
+        """
+        now = time.time()
+        if self.state is not None:
+            self.timings[self.state] += now - self._since
+        self.state = state
+        self._since = now
+
+    def isDone(self):
+        """
+        True once the query reached DONE, FAILED or CANCELED
+        """
+        return self.state in (PAGINATION_STATE['DONE'], PAGINATION_STATE['FAILED'], PAGINATION_STATE['CANCELED'])
+
+    def isRunning(self):
+        """
+        True while the query was submitted and last seen in progress on the
+        server, so it still consumes server resources
+        """
+        return bool(self.query_id) and self.status in IN_PROGRESS_STATUS and self.state != PAGINATION_STATE['FAILED']
+
+    def hasBudget(self):
+        """
+        True when the query stops after ``max_rows`` rows or at ``deadline``
+        """
+        return self.max_rows is not None or self.deadline is not None
+
+    def remaining(self):
+        """
+        Seconds left until the deadline or the timeout of the query, None
+        without any
+        """
+        ends = [end for end in (self.deadline, self.expires) if end is not None]
+        if not ends:
+            return None
+        return max(0.0, min(ends) - time.time())
+
+    def isExpired(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def isTimedOut(self):
+        """
+        True once the query outlived the query timeout of its client
+        """
+        return self.expires is not None and time.time() >= self.expires
+
+    def isSpent(self):
+        """
+        True once the query fetched ``max_rows`` rows or reached its deadline
+        """
+        return self.isExpired() or (self.max_rows is not None and self.rows >= self.max_rows)
+
+    def pagePath(self, page):
+        """
+        Path of a results page of this query
+
+        :param page: page number, starting at 1
+        """
+        return '/queries/' + self.query_id + '/results/' + str(page)
+
+    def infoRequest(self):
+        """
+        Request parameters fetching the query object, which carries the status
+        of the query, its scan statistics and its results_download_url
+        """
+        return self.client._buildRequestParams('/queries/' + self.query_id, 'GET')
+
+    def cancelRequest(self):
+        """
+        Request parameters cancelling the query on the server
+        """
+        return self.client._buildRequestParams('/queries/' + self.query_id, 'DELETE')
+
+    def feedInfo(self, payload):
+        """
+        Advances the state machine with a query object polled by
+        :meth:`infoRequest`: the query stays POLLING while it is in progress
+        and moves to PAGING once its results are ready.
+
+        :param payload: query object
+        :return: True once the query is no longer in progress
+        """
+        if self.isDone():
+            # Stopped by another thread while the request was in flight
+            return True
+        self.info = payload
+        self._observe(payload)
+        if payload.get('status') in IN_PROGRESS_STATUS:
+            self.attempt += 1
+            return False
+        self.attempt = 0
+        self._transition(PAGINATION_STATE['PAGING'])
+        return True
+
+    def _observe(self, payload):
+        self.status = payload.get('status')
+        self.metrics.observe(self.status)
+
+    def finish(self):
+        """
+        Moves the query to DONE once its results were consumed out of band
+        """
+        self._transition(PAGINATION_STATE['DONE'])
+
+    def next_request(self):
+        """
+        Request parameters of the next call to fire, None once the query is over
+        """
+        if self.isDone():
+            return None
+        if self.isExpired():
+            self.stop()
+            return None
+        if self.state == PAGINATION_STATE['SUBMITTED']:
+            return self.client._buildRequestParams('/queries', 'POST', self.form_params)
+        if self.next_uri:
+            return self.client._buildRequestParams(self.next_uri, 'GET', None, True)
+        return self.client._buildRequestParams(self.pagePath(self.page), 'GET')
+
+    def delay(self):
+        """
+        Seconds to wait before the next request: only a query found in progress
+        by the previous poll is waited for.
+        """
+        if self.state == PAGINATION_STATE['POLLING'] and self.attempt:
+            delay = self.client.pollingPolicy.delay(self.attempt)
+            remaining = self.remaining()
+            if remaining is not None:
+                delay = min(delay, remaining)
+            return delay
+        return 0
+
+    def feed(self, payload):
+        """
+        Advances the state machine with a payload returned by Mixnode server
+
+        :param payload: query object or results page
+        :return: True when the payload is a results page
+        """
+        if self.isDone():
+            # Stopped by another thread while the request was in flight
+            return False
+        if self.state == PAGINATION_STATE['SUBMITTED']:
+            self.info = payload
+            self._observe(payload)
+            self.query_id = payload.get('query_id')
+            if self.query_id:
+                self._transition(PAGINATION_STATE['POLLING'])
+            else:
+                self._transition(PAGINATION_STATE['DONE'])
+            return False
+        self.pages += 1
+        self.rows += len(payload.get('rows') or [])
+        self._observe(payload)
+        if payload.get('status') in IN_PROGRESS_STATUS:
+            self.attempt += 1
+            if self.state != PAGINATION_STATE['POLLING']:
+                self._transition(PAGINATION_STATE['POLLING'])
+        else:
+            self.attempt = 0
+            if self.state != PAGINATION_STATE['PAGING']:
+                self._transition(PAGINATION_STATE['PAGING'])
+        next_page = payload.get('next_page')
+        if next_page:
+            self.next_uri = next_page
+            self.page = _pageNumber(next_page) or self.page + 1
+            if self.isSpent():
+                self.stop()
+        else:
+            self._transition(PAGINATION_STATE['DONE'])
+        return True
+
+    def stop(self):
+        """
+        Moves the query to CANCELED: no more request is fired for it
+        """
+        if not self.isDone():
+            self._transition(PAGINATION_STATE['CANCELED'])
+
+    def fail(self, error):
+        """
+        Moves the query to FAILED
+
+        :param error: :class:`MixnodeError <MixnodeError>` which stopped the query
+        """
+        self.error = error
+        self._transition(PAGINATION_STATE['FAILED'])
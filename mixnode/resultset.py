@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+# Standard python packages
+from array import array
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+# Internal imports
+from .error import MissingDependency
+
+# Typecodes of the arrays storing columns of fixed width types; a column
+# falls back to a list as soon as it holds a NULL or an out of range value
+ARRAY_TYPECODES = {
+  'bigint': 'q',
+  'integer': 'i',
+  'smallint': 'h',
+  'tinyint': 'b',
+  'double': 'd',
+  'real': 'f'
+}
+
+# NumPy dtypes of the columns stored as lists
+NUMPY_DTYPES = {
+  'bigint': 'int64',
+  'integer': 'int32',
+  'smallint': 'int16',
+  'tinyint': 'int8',
+  'double': 'float64',
+  'real': 'float32',
+  'boolean': 'bool',
+  'date': 'datetime64[D]',
+  'timestamp': 'datetime64[us]'
+}
+
+class Row(Mapping):
+    """
+    Lazy, read-only view of a row of a :class:`ResultSet <ResultSet>`; behaves
+    like the dict built for the same row by :meth:`Mixnode.execute`.
+
+    :param resultset: :class:`ResultSet <ResultSet>` the row belongs to.
+    :param index: Position of the row.
+    """
+    __slots__ = ('_resultset', '_index')
+
+    def __init__(self, resultset, index):
+        self._resultset = resultset
+        self._index = index
+
+    def __getitem__(self, name):
+        return self._resultset.column(name)[self._index]
+
+    def __iter__(self):
+        return iter(self._resultset.names)
+
+    def __len__(self):
+        return len(self._resultset.names)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+class ResultSet(object):
+    """
+    Columnar container for the results of a query: one array or list per
+    column, filled page by page from the ``columns`` and ``rows`` returned
+    by Mixnode server, so no dict is built per row.
+
+    Examples:
+        results = client.execute_columnar(query)
+        len(results)          # number of rows
+        results['url']        # the whole url column
+        results[0]['url']     # lazy view of the first row
+        results.to_records()  # list of dicts, as returned by execute
+
+    :param columns: ``columns`` metadata of the query, taken from the first page when omitted.
+    """
+    def __init__(self, columns=None):
+        self.columns = []
+        self.names = []
+        self._data = []
+        self._positions = {}
+        self._length = 0
+        if columns:
+            self._setColumns(columns)
+
+    def _setColumns(self, columns):
+        """
+        Allocates the storage of every column
+
+        :param columns: ``columns`` metadata returned by Mixnode server
+        """
+        self.columns = columns
+        self.names = [column['name'] for column in columns]
+        self._positions = dict((name, position) for position, name in enumerate(self.names))
+        self._data = []
+        for column in columns:
+            typecode = ARRAY_TYPECODES.get(column.get('type'))
+            self._data.append(array(typecode) if typecode else [])
+
+    def addPage(self, payload, decoder=None):
+        """
+        Appends the rows of a results page
+
+        :param payload: results page returned by Mixnode server
+        :param decoder: :class:`Decoder <mixnode.decoder.Decoder>` converting the values, if any
+        """
+        rows = payload.get('rows')
+        if not rows:
+            return
+        if not self.names:
+            self._setColumns(payload['columns'])
+        if decoder is None:
+            self.extend(rows)
+        else:
+            self._extendColumns(decoder.decodeColumns(rows), len(rows))
+
+    def extend(self, rows):
+        """
+        Appends rows given as lists of values in column order
+
+        :param rows: list of rows
+        """
+        self._extendColumns(zip(*rows), len(rows))
+
+    def _extendColumns(self, columns, length):
+        """
+        Appends the values of every column
+
+        :param columns: iterable of the values of every column, in column order
+        :param length: number of rows appended
+        """
+        for position, values in enumerate(columns):
+            storage = self._data[position]
+            kept = len(storage)
+            try:
+                storage.extend(values)
+            except (TypeError, OverflowError):
+                # array.extend stops at the first bad value, drop what it kept
+                del storage[kept:]
+                self._data[position] = list(storage)
+                self._data[position].extend(values)
+        self._length += length
+
+    def column(self, name):
+        """
+        Values of a column, as an array for fixed width types without NULLs
+        and as a list otherwise
+
+        :param name: name of the column
+        """
+        return self._data[self._positions[name]]
+
+    def to_numpy(self, name):
+        """
+        Values of a column as a NumPy array; requires ``pip install numpy``.
+        Columns stored as arrays are wrapped without a copy, so the result set
+        must not grow while the returned array is alive.
+
+        :param name: name of the column
+        """
+        try:
+            import numpy
+        except ImportError:
+            raise MissingDependency('numpy')
+        storage = self.column(name)
+        if isinstance(storage, array):
+            return numpy.frombuffer(storage, dtype=storage.typecode)
+        dtype = NUMPY_DTYPES.get(self.columns[self._positions[name]].get('type'))
+        try:
+            return numpy.array(storage, dtype=dtype)
+        except (TypeError, ValueError):
+            return numpy.array(storage, dtype=object)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [Row(self, index) for index in range(*key.indices(self._length))]
+        if isinstance(key, int):
+            if key < 0:
+                key += self._length
+            if not 0 <= key < self._length:
+                raise IndexError('ResultSet index out of range')
+            return Row(self, key)
+        return self.column(key)
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield Row(self, index)
+
+    def to_records(self):
+        """
+        Converts the result to a list of dicts, as returned by :meth:`Mixnode.execute`
+        """
+        return [dict(zip(self.names, values)) for values in zip(*self._data)]
+
+    def __repr__(self):
+        return '<ResultSet columns={names} rows={rows}>'.format(names=self.names, rows=self._length)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Retries of the requests which failed for a transient reason.
+
+Failures are classified as transient (network errors, timeouts, HTTP 408,
+429 and 5xx) or permanent (any other HTTP error). A query error, e.g.
+INSUFFICIENT_RESOURCES or SYNTAX_ERROR, is the final status of the query:
+fetching its page again returns the same error, so it is never retried here. Only idempotent
+requests are retried: results pages and query objects are fetched with GET,
+while POST /queries is retried only when the server turned it down with
+429, since retrying it after any other failure could submit the query twice.
+"""
+
+# Standard python packages
+import email.utils
+import time
+
+
+# Internal imports
+from .error import (ResponseError, Network, RequestTimeout)
+from .polling import ExponentialBackoff
+
+# Retries of a single request before its error is raised
+MAX_RETRIES = 5
+# Upper bound in seconds of the delay asked by a Retry-After header
+MAX_RETRY_AFTER = 120
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+TRANSIENT_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+def isTransient(error):
+    """
+    True when a request which failed with an error may succeed if fired again
+
+    :param error: :class:`MixnodeError <MixnodeError>` raised by the request
+    """
+    if isinstance(error, (Network, RequestTimeout)):
+        return True
+    if isinstance(error, ResponseError):
+        return error.status_code in TRANSIENT_STATUS_CODES
+    return False
+
+def retryAfter(error):
+    """
+    Seconds to wait asked by the Retry-After header of a response, in
+    seconds or as an HTTP date, None when there is none
+
+    :param error: :class:`MixnodeError <MixnodeError>` raised by the request
+    """
+    value = (getattr(error, 'headers', None) or {}).get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(parsed) - time.time())
+
+class RetryPolicy(object):
+    """
+    Decides whether a failed request is fired again and how long to wait
+    first. Stateless, so a single instance can be shared by every query.
+
+    Examples:
+        client.setRetryPolicy(RetryPolicy(max_retries=10, backoff=ExponentialBackoff(initial=1, maximum=60)))
+
+    :param max_retries: Retries of a single request, 0 disables retrying.
+    :param backoff: :class:`PollingPolicy <mixnode.polling.PollingPolicy>`
+        giving the delay before the n-th retry; a Retry-After header sent
+        by the server takes precedence.
+    :param max_retry_after: Upper bound in seconds of a delay asked by Retry-After.
+    """
+    def __init__(self, max_retries=MAX_RETRIES, backoff=None, max_retry_after=MAX_RETRY_AFTER):
+        self.max_retries = max_retries
+        self.backoff = backoff if backoff is not None else ExponentialBackoff()
+        self.max_retry_after = max_retry_after
+
+    def isRetryable(self, method, error):
+        """
+        True when a request may be fired again after failing with an error
+
+        :param method: HTTP method of the request
+        :param error: :class:`MixnodeError <MixnodeError>` raised by the request
+        """
+        if not isTransient(error):
+            return False
+        if method in IDEMPOTENT_METHODS:
+            return True
+        return isinstance(error, ResponseError) and error.status_code == 429
+
+    def delay(self, method, error, attempt):
+        """
+        Seconds to wait before firing a failed request again, None when its
+        error has to be raised
+
+        :param method: HTTP method of the request
+        :param error: :class:`MixnodeError <MixnodeError>` raised by the request
+        :param attempt: Number of the retry about to be made, starting at 1
+        """
+        if attempt > self.max_retries or not self.isRetryable(method, error):
+            return None
+        delay = retryAfter(error)
+        if delay is not None:
+            return min(delay, self.max_retry_after)
+        return self.backoff.delay(attempt)
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Single-flight execution: concurrent identical queries share one
+server-side query and one download.
+
+The first caller of a key starts a flight; callers arriving before the
+flight released its first page join it and receive every page from the
+start. Whichever subscriber needs a page nobody has fetched yet fetches it,
+so there is no background thread, and a page is released as soon as every
+subscriber went past it. When every subscriber went away the underlying
+query is closed.
+"""
+
+# Standard python packages
+import threading
+
+_FETCH = object()
+
+class Flight(object):
+    """
+    Pages of an in-flight query fanned out to its subscribers.
+
+    :param key: Key of the flight in its :class:`SingleFlight <SingleFlight>` group.
+    :param query: :class:`Query <mixnode.query.Query>` run by the flight.
+    :param source: Generator of the results pages of the query.
+    """
+    def __init__(self, key, query, source):
+        self.key = key
+        self.query = query
+        self.source = source
+        self.condition = threading.Condition()
+        self.pages = []
+        self.base = 0
+        self.positions = {}
+        self.fetching = False
+        self.done = False
+        self.error = None
+
+    def subscribe(self):
+        """
+        Registers a new subscriber, None once the flight can't be joined
+        anymore because it is over or already released pages
+        """
+        with self.condition:
+            if self.done or self.base:
+                return None
+            token = object()
+            self.positions[token] = 0
+            return token
+
+    def _release(self):
+        """
+        Drops the pages every subscriber went past; called with the condition held
+        """
+        if not self.positions:
+            return
+        oldest = min(self.positions.values())
+        if oldest > self.base:
+            del self.pages[:oldest - self.base]
+            self.base = oldest
+
+    def _next(self, token):
+        """
+        Next page of a subscriber, _FETCH when it has to fetch it, None at the end
+        """
+        with self.condition:
+            while True:
+                position = self.positions[token]
+                if position < self.base + len(self.pages):
+                    self.positions[token] = position + 1
+                    page = self.pages[position - self.base]
+                    self._release()
+                    return page
+                if self.error is not None:
+                    raise self.error
+                if self.done:
+                    return None
+                if not self.fetching:
+                    self.fetching = True
+                    return _FETCH
+                self.condition.wait()
+
+    def _fetch(self):
+        """
+        Advances the underlying query by one page on behalf of every subscriber
+        """
+        try:
+            payload = next(self.source)
+        except StopIteration:
+            with self.condition:
+                self.done = True
+                self.fetching = False
+                self.condition.notify_all()
+            return
+        except BaseException as err:
+            with self.condition:
+                self.error = err
+                self.done = True
+                self.fetching = False
+                self.condition.notify_all()
+            raise
+        with self.condition:
+            self.pages.append(payload)
+            self.fetching = False
+            self.condition.notify_all()
+
+    def iterate(self, token):
+        """
+        Generator of the pages of a subscriber
+
+        :param token: token returned by :meth:`subscribe`
+        """
+        try:
+            while True:
+                page = self._next(token)
+                if page is _FETCH:
+                    self._fetch()
+                    continue
+                if page is None:
+                    return
+                yield page
+        finally:
+            with self.condition:
+                del self.positions[token]
+                self._release()
+                abandoned = not self.positions and not self.done
+                if abandoned:
+                    self.done = True
+            if abandoned:
+                self.source.close()
+
+class SingleFlight(object):
+    """
+    Group of in-flight queries keyed by their normalized text and input
+    limit. A group can be shared by several clients of the same account.
+
+    Examples:
+        client.setSingleFlight(SingleFlight())
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def join(self, key, query, run):
+        """
+        Joins the flight of a key, starting it when there is none
+
+        :param key: key of identical requests
+        :param query: :class:`Query <mixnode.query.Query>` run if a flight is started
+        :param run: callable returning the generator of the results pages of a query
+        :return: (query run by the flight, generator of its pages)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            token = flight.subscribe() if flight is not None else None
+            if token is None:
+                flight = self._flights[key] = Flight(key, query, run(query))
+                token = flight.subscribe()
+        return flight.query, self._iterate(flight, token)
+
+    def _iterate(self, flight, token):
+        try:
+            for page in flight.iterate(token):
+                if flight.base:
+                    self._forget(flight)
+                yield page
+        finally:
+            self._forget(flight)
+
+    def _forget(self, flight):
+        """
+        Stops routing new callers to a flight which can't be joined anymore
+        """
+        with self._lock:
+            if self._flights.get(flight.key) is flight and (flight.done or flight.base):
+                del self._flights[flight.key]
+
+    def __len__(self):
+        return len(self._flights)
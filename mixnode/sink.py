@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Sinks the results pages of a query are written to as they arrive, so that
+results larger than memory can be extracted on small machines: only the
+page being written and the write buffer are ever held in memory.
+
+File sinks buffer their writes (``buffer_size`` bytes, or ``row_group_rows``
+rows for Parquet and ``batch_rows`` rows per transaction for SQLite) and
+sync the file to disk according to their ``fsync`` policy: never, once on
+close, or after every results page.
+"""
+
+# Standard python packages
+import base64
+import csv
+import datetime
+import io
+import json
+import os
+import sqlite3
+from decimal import Decimal
+
+
+# Internal imports
+from .decoder import columnSignature
+from .export import (ArrowBuilder, importPyarrow)
+
+FSYNC_NEVER = 'never'
+FSYNC_CLOSE = 'close'
+FSYNC_PAGE = 'page'
+# Size in bytes of the write buffer of file sinks
+BUFFER_SIZE = 1 << 20
+# Rows buffered in a Parquet row group
+ROW_GROUP_ROWS = 1 << 16
+# Rows inserted per SQLite transaction
+BATCH_ROWS = 1 << 14
+
+def _jsonDefault(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode('ascii')
+    raise TypeError(repr(value) + ' is not JSON serializable')
+
+def _text(value):
+    """
+    Value of a cell in a text file: nested values are JSON encoded
+    """
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_jsonDefault)
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+def _sqlValue(value):
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if isinstance(value, bytearray):
+        return bytes(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_jsonDefault)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+SQLITE_AFFINITIES = {
+  'bigint': 'INTEGER',
+  'integer': 'INTEGER',
+  'smallint': 'INTEGER',
+  'tinyint': 'INTEGER',
+  'boolean': 'INTEGER',
+  'double': 'REAL',
+  'real': 'REAL',
+  'varbinary': 'BLOB'
+}
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+class Sink(object):
+    """
+    Base class of the destinations of :meth:`Mixnode.execute_to`.
+
+    :meth:`write` is called once per results page, in order, then
+    :meth:`close` once the query is over, whether it succeeded or not.
+    """
+    # False when the sink converts the raw JSON values itself, whatever the
+    # setDecodeTypes setting of the client
+    decode = True
+
+    def __init__(self):
+        self.rows = 0
+
+    def write(self, columns, rows):
+        """
+        Writes the rows of a results page
+
+        :param columns: ``columns`` metadata of the query
+        :param rows: ``rows`` of the page, lists of values in column order
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Flushes the buffered rows and releases the sink
+        """
+        pass
+
+class MemorySink(Sink):
+    """
+    Keeps the records in a list, as :meth:`Mixnode.execute` does.
+    """
+    def __init__(self):
+        super(MemorySink, self).__init__()
+        self.records = []
+
+    def write(self, columns, rows):
+        names = [column['name'] for column in columns]
+        self.records.extend(dict(zip(names, row)) for row in rows)
+        self.rows += len(rows)
+
+class FileSink(Sink):
+    """
+    Base class of the sinks writing to a text file.
+
+    :param path: Path of the file written, truncated if it exists.
+    :param buffer_size: Size in bytes of the write buffer.
+    :param fsync: One of FSYNC_NEVER, FSYNC_CLOSE or FSYNC_PAGE.
+    :param encoding: Encoding of the file.
+    """
+    def __init__(self, path, buffer_size=BUFFER_SIZE, fsync=FSYNC_CLOSE, encoding='utf-8'):
+        super(FileSink, self).__init__()
+        self.path = path
+        self.fsync = fsync
+        self.file = io.open(path, 'w', buffering=buffer_size, encoding=encoding, newline='')
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def write(self, columns, rows):
+        self._writeRows(columns, rows)
+        self.rows += len(rows)
+        if self.fsync == FSYNC_PAGE:
+            self._sync()
+
+    def _writeRows(self, columns, rows):
+        raise NotImplementedError()
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.fsync != FSYNC_NEVER:
+            self._sync()
+        self.file.close()
+
+class NdjsonSink(FileSink):
+    """
+    Writes a JSON object per record and per line. Dates and times are
+    written in ISO 8601, decimals as strings and binary values in base64.
+
+    Examples:
+        client.execute_to(NdjsonSink('/data/results.ndjson'), query)
+    """
+    def _writeRows(self, columns, rows):
+        names = [column['name'] for column in columns]
+        encode = json.JSONEncoder(default=_jsonDefault, ensure_ascii=False).encode
+        self.file.write(u''.join(encode(dict(zip(names, row))) + u'\n' for row in rows))
+
+class CsvSink(FileSink):
+    """
+    Writes a CSV file with a header row naming the columns; nested values
+    are JSON encoded and null values are left empty.
+
+    Examples:
+        client.execute_to(CsvSink('/data/results.csv'), query)
+    """
+    def __init__(self, path, buffer_size=BUFFER_SIZE, fsync=FSYNC_CLOSE, encoding='utf-8'):
+        super(CsvSink, self).__init__(path, buffer_size, fsync, encoding)
+        self.writer = csv.writer(self.file)
+        self.header = False
+
+    def _writeRows(self, columns, rows):
+        if not self.header:
+            self.writer.writerow([column['name'] for column in columns])
+            self.header = True
+        self.writer.writerows([_text(value) for value in row] for row in rows)
+
+class ParquetSink(Sink):
+    """
+    Writes a Parquet file with the Arrow schema derived from the columns of
+    the query; requires ``pip install pyarrow``.
+
+    Examples:
+        client.execute_to(ParquetSink('/data/results.parquet', compression='zstd'), query)
+
+    :param path: Path of the file written.
+    :param row_group_rows: Rows buffered before a row group is written.
+    :param fsync: One of FSYNC_NEVER, FSYNC_CLOSE or FSYNC_PAGE; FSYNC_PAGE
+        syncs after every row group.
+    :param compression: Compression codec of the columns.
+    """
+    decode = False
+
+    def __init__(self, path, row_group_rows=ROW_GROUP_ROWS, fsync=FSYNC_CLOSE, compression='snappy'):
+        super(ParquetSink, self).__init__()
+        self.pa = importPyarrow()
+        import pyarrow.parquet
+        self.parquet = pyarrow.parquet
+        self.path = path
+        self.row_group_rows = row_group_rows
+        self.fsync = fsync
+        self.compression = compression
+        self.builder = None
+        self.writer = None
+        self.file = None
+        self.batches = []
+        self.buffered = 0
+
+    def write(self, columns, rows):
+        if self.builder is None:
+            self.builder = ArrowBuilder(columns)
+            self.file = open(self.path, 'wb')
+            self.writer = self.parquet.ParquetWriter(self.file, self.builder.schema, compression=self.compression)
+        if not rows:
+            return
+        self.batches.append(self.builder.recordBatch(rows))
+        self.buffered += len(rows)
+        self.rows += len(rows)
+        if self.buffered >= self.row_group_rows:
+            self._flush()
+
+    def _flush(self):
+        if self.batches:
+            self.writer.write_table(self.pa.Table.from_batches(self.batches, schema=self.builder.schema))
+            self.batches = []
+            self.buffered = 0
+            if self.fsync == FSYNC_PAGE:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.writer is None or self.file.closed:
+            return
+        self._flush()
+        self.writer.close()
+        if self.fsync != FSYNC_NEVER:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.file.close()
+
+class SqliteSink(Sink):
+    """
+    Inserts the records into a SQLite table, created if missing, with a
+    column affinity matching the type of every column.
+
+    Examples:
+        client.execute_to(SqliteSink('/data/results.db', 'homepages'), query)
+
+    :param path: Path of the database.
+    :param table: Name of the table.
+    :param batch_rows: Rows inserted per transaction.
+    :param fsync: FSYNC_NEVER turns off the synchronous writes of SQLite,
+        FSYNC_PAGE commits after every results page.
+    """
+    def __init__(self, path, table='results', batch_rows=BATCH_ROWS, fsync=FSYNC_CLOSE):
+        super(SqliteSink, self).__init__()
+        self.connection = sqlite3.connect(path)
+        if fsync == FSYNC_NEVER:
+            self.connection.execute('PRAGMA synchronous = OFF')
+        self.table = table
+        self.batch_rows = batch_rows
+        self.fsync = fsync
+        self.insert = None
+        self.pending = 0
+
+    def write(self, columns, rows):
+        if self.insert is None:
+            definitions = [_quote(column['name']) + ' ' + SQLITE_AFFINITIES.get(columnSignature(column).get('rawType'), 'TEXT') for column in columns]
+            self.connection.execute('CREATE TABLE IF NOT EXISTS ' + _quote(self.table) + ' (' + ', '.join(definitions) + ')')
+            self.insert = 'INSERT INTO ' + _quote(self.table) + ' VALUES (' + ', '.join('?' * len(columns)) + ')'
+        self.connection.executemany(self.insert, ([_sqlValue(value) for value in row] for row in rows))
+        self.rows += len(rows)
+        self.pending += len(rows)
+        if self.fsync == FSYNC_PAGE or self.pending >= self.batch_rows:
+            self.connection.commit()
+            self.pending = 0
+
+    def close(self):
+        if self.connection is None:
+            return
+        self.connection.commit()
+        self.connection.close()
+        self.connection = None
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Client side throttling, so that many clients can run at the rate allowed
+by a plan without tripping the limits of the server.
+
+Rates are enforced by token buckets: every request, or every byte received,
+takes a token and callers wait until the bucket refilled enough. Buckets
+hand out reservations, so concurrent callers queue up fairly, and the
+number of queries in flight is bounded by a governor. A :class:`Throttle
+<Throttle>` can be shared by every client of a process, and by several
+processes through files locked with ``flock`` (POSIX only).
+"""
+
+# Standard python packages
+import json
+import threading
+import time
+
+# Seconds between two attempts to take a query slot held by another process
+POLL_INTERVAL = 0.05
+# Seconds of unused rate a bucket accumulates while idle
+BURST = 1.0
+
+_clock = getattr(time, 'monotonic', time.time)
+
+def _flock():
+    import fcntl
+    return fcntl
+
+class TokenBucket(object):
+    """
+    Token bucket refilled at ``rate`` tokens per second, holding up to
+    ``capacity`` tokens.
+
+    :param rate: Tokens added per second.
+    :param capacity: Size of the bucket, i.e. the largest burst, defaults to a second of rate.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate * BURST))
+        self.tokens = self.capacity
+        self.updated = _clock()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens, available, updated, now):
+        """
+        Tokens left after taking ``tokens`` out of a bucket last updated at
+        ``updated``; negative when the caller has to wait for them
+        """
+        available = min(self.capacity, available + (now - updated) * self.rate)
+        return available - tokens
+
+    def reserve(self, tokens=1):
+        """
+        Takes tokens out of the bucket, going into debt when there are not
+        enough of them
+
+        :param tokens: number of tokens taken
+        :return: seconds to wait before using them
+        """
+        with self._lock:
+            now = _clock()
+            self.tokens = self._take(tokens, self.tokens, self.updated, now)
+            self.updated = now
+            return max(0.0, -self.tokens / self.rate)
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket whose state lives in a file locked while it is updated, so
+    that processes sharing the file share the rate.
+
+    :param path: Path of the state file, created if missing.
+    :param rate: Tokens added per second.
+    :param capacity: Size of the bucket, defaults to a second of rate.
+    """
+    def __init__(self, path, rate, capacity=None):
+        super(FileTokenBucket, self).__init__(rate, capacity)
+        self.path = path
+        self.fcntl = _flock()
+
+    def reserve(self, tokens=1):
+        with self._lock:
+            with open(self.path, 'a+') as state_file:
+                self.fcntl.flock(state_file.fileno(), self.fcntl.LOCK_EX)
+                try:
+                    state_file.seek(0)
+                    now = time.time()
+                    try:
+                        state = json.loads(state_file.read())
+                        left = self._take(tokens, state['tokens'], state['updated'], now)
+                    except (ValueError, KeyError, TypeError):
+                        left = self.capacity - tokens
+                    state_file.seek(0)
+                    state_file.truncate()
+                    state_file.write(json.dumps({'tokens': left, 'updated': now}))
+                    state_file.flush()
+                finally:
+                    self.fcntl.flock(state_file.fileno(), self.fcntl.LOCK_UN)
+        return max(0.0, -left / self.rate)
+
+class QueryGovernor(object):
+    """
+    Bounds the number of queries in flight at once.
+
+    :param max_queries: Number of queries allowed in flight.
+    """
+    def __init__(self, max_queries):
+        self.max_queries = max_queries
+        self._semaphore = threading.BoundedSemaphore(max_queries)
+
+    def tryAcquire(self):
+        """
+        Takes a slot if one is free
+
+        :return: the slot, None when every slot is taken
+        """
+        return True if self._semaphore.acquire(False) else None
+
+    def acquire(self):
+        """
+        Takes a slot, waiting for one to be released
+
+        :return: the slot, to hand back to :meth:`release`
+        """
+        self._semaphore.acquire()
+        return True
+
+    def release(self, slot):
+        self._semaphore.release()
+
+class FileQueryGovernor(QueryGovernor):
+    """
+    Bounds the number of queries in flight across processes: every slot is a
+    file, held while locked.
+
+    :param path: Prefix of the slot files, ``path.0`` to ``path.N-1``.
+    :param max_queries: Number of queries allowed in flight.
+    """
+    def __init__(self, path, max_queries):
+        super(FileQueryGovernor, self).__init__(max_queries)
+        self.path = path
+        self.fcntl = _flock()
+
+    def tryAcquire(self):
+        for index in range(self.max_queries):
+            slot = open(self.path + '.' + str(index), 'a')
+            try:
+                self.fcntl.flock(slot.fileno(), self.fcntl.LOCK_EX | self.fcntl.LOCK_NB)
+            except (IOError, OSError):
+                slot.close()
+                continue
+            return slot
+        return None
+
+    def acquire(self):
+        while True:
+            slot = self.tryAcquire()
+            if slot is not None:
+                return slot
+            time.sleep(POLL_INTERVAL)
+
+    def release(self, slot):
+        try:
+            self.fcntl.flock(slot.fileno(), self.fcntl.LOCK_UN)
+        finally:
+            slot.close()
+
+class _QuerySlot(object):
+    def __init__(self, governor):
+        self.governor = governor
+        self.slot = None
+
+    def __enter__(self):
+        if self.governor is not None:
+            self.slot = self.governor.acquire()
+        return self
+
+    def __exit__(self, *args):
+        if self.slot is not None:
+            self.governor.release(self.slot)
+            self.slot = None
+
+class Throttle(object):
+    """
+    Rate limits and bound of the queries in flight shared by the clients it
+    is set on, see :meth:`Mixnode.setThrottle`. Every limit is optional.
+
+    Examples:
+        throttle = Throttle(requests_per_second=10, bytes_per_second=50 << 20, max_queries=4)
+        for client in clients:
+            client.setThrottle(throttle)
+
+    :param requests_per_second: Requests fired per second.
+    :param bytes_per_second: Bytes of responses received per second.
+    :param max_queries: Queries in flight at once.
+    :param burst: Seconds of unused rate accumulated while idle.
+    :param path: Prefix of the files shared with other processes, the
+        limits only apply to the current process when None.
+    """
+    def __init__(self, requests_per_second=None, bytes_per_second=None, max_queries=None, burst=BURST, path=None):
+        self.requests = self._bucket(path, '.requests', requests_per_second, burst)
+        self.bytes = self._bucket(path, '.bytes', bytes_per_second, burst)
+        self.governor = None
+        if max_queries:
+            if path is None:
+                self.governor = QueryGovernor(max_queries)
+            else:
+                self.governor = FileQueryGovernor(path + '.queries', max_queries)
+
+    def _bucket(self, path, suffix, rate, burst):
+        if not rate:
+            return None
+        capacity = max(1.0, rate * burst)
+        if path is None:
+            return TokenBucket(rate, capacity)
+        return FileTokenBucket(path + suffix, rate, capacity)
+
+    def requestDelay(self):
+        """
+        Seconds to wait before firing a request
+        """
+        return self.requests.reserve() if self.requests is not None else 0.0
+
+    def responseDelay(self, size):
+        """
+        Seconds to wait after receiving bytes, before firing the next request
+
+        :param size: number of bytes received
+        """
+        return self.bytes.reserve(size) if self.bytes is not None and size else 0.0
+
+    def query(self):
+        """
+        Context manager holding a query slot, waiting for one if needed
+        """
+        return _QuerySlot(self.governor)
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# Standard python packages
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.request import ACCEPT_ENCODING
+
+
+# Internal imports
+from .error import (MissingDependency, DownloadError, Network, RequestTimeout)
+
+# Number of host pools kept by the connection pool
+POOL_CONNECTIONS = 10
+# Number of keep-alive connections kept per host
+POOL_MAXSIZE = 10
+# Size in bytes of the chunks read from streamed downloads
+CHUNK_SIZE = 1 << 16
+# Seconds to wait for a connection to be established
+CONNECT_TIMEOUT = 10
+# Seconds to wait for the server to send data, between two reads
+READ_TIMEOUT = 120
+# (connect, read) timeout of every request
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+def _splitTimeout(timeout):
+    """
+    (connect, read) seconds of a timeout given as a tuple or as a single
+    number applying to both; None waits forever
+    """
+    if isinstance(timeout, tuple):
+        return timeout
+    return (timeout, timeout)
+
+class TransferStats(object):
+    """
+    Bytes received by a transport, as sent on the wire and once decompressed,
+    to verify the savings of compressed transfers. Shared by the threads of
+    a client.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.wireBytes = 0
+        self.decodedBytes = 0
+
+    def add(self, wire_bytes, decoded_bytes):
+        """
+        Accounts a response
+
+        :param wire_bytes: size of the body as received
+        :param decoded_bytes: size of the body once decompressed
+        """
+        with self._lock:
+            self.responses += 1
+            self.wireBytes += wire_bytes
+            self.decodedBytes += decoded_bytes
+
+    def compressionRatio(self):
+        """
+        Decoded bytes per byte received, 1.0 before any response
+        """
+        if not self.wireBytes:
+            return 1.0
+        return float(self.decodedBytes) / self.wireBytes
+
+    def __repr__(self):
+        return 'TransferStats(responses=%d, wireBytes=%d, decodedBytes=%d)' % (self.responses, self.wireBytes, self.decodedBytes)
+
+# Errors of requests raised while sending a request or reading its body
+_REQUESTS_ERRORS = (requests.exceptions.Timeout, requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError)
+
+def _requestsError(err):
+    """
+    :exc:`RequestTimeout` or :exc:`Network` error of a requests exception;
+    a read timeout hit while reading a body is raised by requests as a
+    ConnectionError wrapping the ReadTimeoutError of urllib3.
+
+    :param err: exception raised by requests
+    """
+    if isinstance(err, requests.exceptions.Timeout) or (err.args and isinstance(err.args[0], ReadTimeoutError)):
+        return RequestTimeout(more=err)
+    return Network(more=err)
+
+def _wireBytes(response, decoded_bytes):
+    """
+    Bytes of a requests response read from the socket, before decompression
+    """
+    try:
+        wire_bytes = response.raw.tell()
+    except (AttributeError, TypeError, ValueError):
+        return decoded_bytes
+    return wire_bytes if isinstance(wire_bytes, int) else decoded_bytes
+
+class Transport(object):
+    """
+    Base class for the HTTP transports used by :class:`Mixnode <Mixnode>`.
+
+    A transport owns its connections and is reused for the POST to /queries
+    and for every results page of every query fired by the client. Any object
+    exposing the same ``request``, ``stream`` and ``close`` methods can be
+    plugged in; transports exposing a ``stats`` attribute
+    (:class:`TransferStats <TransferStats>`) have it reported on
+    ``Mixnode.transferStats``.
+    """
+    def request(self, method, uri, data=None, headers=None, auth=None):
+        """
+        Fires a single HTTP request.
+
+        :param method: HTTP method to use
+        :param uri: Absolute URI to invoke.
+        :param data: A map of form parameters and their values.
+        :param headers: A map of HTTP headers.
+        :param auth: (username, password) tuple used for Basic Authentication.
+        :return: response object exposing ``status_code`` and ``json()``
+        :raises: :exc:`RequestTimeout` or :exc:`Network` when no response
+            could be read, so that the request can be retried
+        """
+        raise NotImplementedError()
+
+    def stream(self, uri, chunk_size=CHUNK_SIZE):
+        """
+        Downloads a file with a GET request, chunk by chunk, without holding
+        it in memory; raises :exc:`DownloadError` on an HTTP error.
+
+        :param uri: Absolute URI to download.
+        :param chunk_size: Size in bytes of the chunks read.
+        :return: generator of bytes
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Releases the pooled connections.
+        """
+        pass
+
+class RequestsTransport(Transport):
+    """
+    Keep-alive, connection pooled transport built on :class:`requests.Session`.
+    Advertises every content encoding urllib3 can decode (gzip and deflate,
+    brotli and zstd when ``brotli`` / ``zstandard`` are installed) and
+    decompresses responses as they are read.
+
+    Examples:
+        transport = RequestsTransport(pool_maxsize=20, max_retries=Retry(total=3))
+        client = Mixnode('Your_API_KEY', transport=transport)
+
+    :param pool_connections: Number of host pools to cache.
+    :param pool_maxsize: Maximum number of keep-alive connections per host.
+    :param max_retries: Retries of the underlying adapter, an int or a
+        :class:`urllib3.util.retry.Retry` instance.
+    :param adapter: Custom :class:`requests.adapters.HTTPAdapter` mounted
+        instead of the default one; overrides the other parameters.
+    :param timeout: (connect, read) seconds after which a request raises
+        :exc:`RequestTimeout`, or a single number for both.
+    """
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=0, adapter=None, timeout=TIMEOUT):
+        self.session = requests.Session()
+        self.timeout = _splitTimeout(timeout)
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.stats = TransferStats()
+        if adapter is None:
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=max_retries)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, uri, data=None, headers=None, auth=None):
+        try:
+            response = self.session.request(method, uri, data=data, headers=headers, auth=auth, timeout=self.timeout)
+        except _REQUESTS_ERRORS as err:
+            raise _requestsError(err)
+        content = getattr(response, 'content', None)
+        if isinstance(content, bytes):
+            self.stats.add(_wireBytes(response, len(content)), len(content))
+        return response
+
+    def stream(self, uri, chunk_size=CHUNK_SIZE):
+        try:
+            response = self.session.get(uri, stream=True, timeout=self.timeout)
+        except _REQUESTS_ERRORS as err:
+            raise _requestsError(err)
+        decoded = 0
+        try:
+            if response.status_code >= 400:
+                raise DownloadError(response.status_code, response.reason)
+            for chunk in response.iter_content(chunk_size):
+                decoded += len(chunk)
+                yield chunk
+        except _REQUESTS_ERRORS as err:
+            raise _requestsError(err)
+        finally:
+            self.stats.add(_wireBytes(response, decoded), decoded)
+            response.close()
+
+    def close(self):
+        self.session.close()
+
+class HttpxTransport(Transport):
+    """
+    HTTP/2 capable transport built on httpx; requires ``pip install httpx[http2]``.
+    httpx advertises and decodes gzip and deflate, and brotli and zstd when
+    their packages are installed.
+
+    Examples:
+        client = Mixnode('Your_API_KEY', transport=HttpxTransport())
+
+    :param http2: Negotiates HTTP/2 with the server when True.
+    :param pool_maxsize: Maximum number of keep-alive connections.
+    :param timeout: (connect, read) seconds after which a request raises
+        :exc:`RequestTimeout`, or a single number for both.
+    """
+    def __init__(self, http2=True, pool_maxsize=POOL_MAXSIZE, timeout=TIMEOUT):
+        try:
+            import httpx
+        except ImportError:
+            raise MissingDependency('httpx')
+        limits = httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize)
+        connect, read = _splitTimeout(timeout)
+        self.httpx = httpx
+        self.session = httpx.Client(http2=http2, limits=limits, timeout=httpx.Timeout(read, connect=connect))
+        self.stats = TransferStats()
+
+    def request(self, method, uri, data=None, headers=None, auth=None):
+        try:
+            response = self.session.request(method, uri, data=data, headers=headers, auth=auth)
+        except self.httpx.TimeoutException as err:
+            raise RequestTimeout(more=err)
+        except self.httpx.TransportError as err:
+            raise Network(more=err)
+        self.stats.add(response.num_bytes_downloaded, len(response.content))
+        return response
+
+    def stream(self, uri, chunk_size=CHUNK_SIZE):
+        decoded = 0
+        try:
+            with self.session.stream('GET', uri) as response:
+                try:
+                    if response.status_code >= 400:
+                        raise DownloadError(response.status_code, response.reason_phrase)
+                    for chunk in response.iter_bytes(chunk_size):
+                        decoded += len(chunk)
+                        yield chunk
+                finally:
+                    self.stats.add(response.num_bytes_downloaded, decoded)
+        except self.httpx.TimeoutException as err:
+            raise RequestTimeout(more=err)
+        except (self.httpx.TransportError, self.httpx.DecodingError) as err:
+            raise Network(more=err)
+
+    def close(self):
+        self.session.close()
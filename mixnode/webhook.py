@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+"""
+Embedded receiver of the webhooks Mixnode server calls once a query is
+over, so that queries can be waited for without polling them.
+
+The receiver is a small threaded HTTP server listening on a secret path;
+the query object POSTed to it (JSON, or form encoded) is handed to whoever
+waits for the query, or kept until someone does since the webhook may
+arrive before the waiter is registered.
+"""
+
+# Standard python packages
+import binascii
+import json
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs
+
+# Ways of waiting for a query to be over
+WAIT_POLL = 'poll'
+WAIT_WEBHOOK = 'webhook'
+# Seconds waited for a webhook before polling the query object once, in
+# case the webhook was lost
+POLL_INTERVAL = 300
+# Seconds it takes at most to stop listening
+SHUTDOWN_POLL = 0.1
+# Notifications kept for queries nobody waits for yet
+MAX_PENDING = 10000
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        receiver = self.server.receiver
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if self.path.split('?', 1)[0] != receiver.path:
+            return self._send(404)
+        try:
+            info = receiver.parse(body, self.headers.get('Content-Type') or '')
+        except ValueError:
+            return self._send(400)
+        if not info.get('query_id'):
+            return self._send(400)
+        self._send(204)
+        receiver.deliver(info)
+
+    def _send(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class WebhookReceiver(object):
+    """
+    Receives the completion webhooks of queries submitted with
+    ``wait='webhook'``, see :meth:`Mixnode.setWebhook`.
+
+    Examples:
+        receiver = WebhookReceiver(port=8080, public_url='https://hooks.example.com/mixnode')
+        client.setWebhook(receiver)
+        records = client.execute(query, wait='webhook')
+
+    :param host: Interface listened on.
+    :param port: Port listened on, any free port when 0.
+    :param public_url: URL at which Mixnode server reaches the receiver,
+        e.g. through a reverse proxy; defaults to the address listened on.
+    :param poll_interval: Seconds waited for a webhook before polling the
+        query object once, in case the webhook was lost.
+    """
+    def __init__(self, host='127.0.0.1', port=0, public_url=None, poll_interval=POLL_INTERVAL):
+        self.token = binascii.hexlify(os.urandom(16)).decode('ascii')
+        self.path = '/' + self.token
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()
+        self._callbacks = {}
+        self.server = _Server((host, port), _Handler)
+        self.server.receiver = self
+        if public_url is None:
+            public_url = 'http://%s:%d' % (host, self.server.server_address[1])
+        self.url = public_url.rstrip('/') + self.path
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(SHUTDOWN_POLL,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def parse(self, body, content_type):
+        """
+        Query object of the body of a webhook
+
+        :param body: body of the request, as bytes
+        :param content_type: Content-Type of the request
+        """
+        text = body.decode('utf-8')
+        if content_type.startswith('application/x-www-form-urlencoded'):
+            return dict((key, values[0]) for key, values in parse_qs(text).items())
+        info = json.loads(text)
+        if not isinstance(info, dict):
+            raise ValueError('the webhook is not a query object')
+        return info
+
+    def deliver(self, info):
+        """
+        Hands the query object of a webhook to its waiter, or keeps it
+
+        :param info: query object
+        """
+        with self._lock:
+            callbacks = self._callbacks.pop(info['query_id'], None)
+            if not callbacks:
+                self._pending[info['query_id']] = info
+                while len(self._pending) > MAX_PENDING:
+                    self._pending.popitem(last=False)
+        for callback in callbacks or []:
+            callback(info)
+
+    def subscribe(self, query_id, callback):
+        """
+        Calls ``callback(info)`` once the webhook of a query arrives, right
+        away if it already did; the callback runs in a thread of the receiver.
+        Every callback subscribed to the query is called.
+
+        :param query_id: id of the query returned by Mixnode server
+        :param callback: callable taking the query object
+        """
+        with self._lock:
+            info = self._pending.pop(query_id, None)
+            if info is None:
+                self._callbacks.setdefault(query_id, []).append(callback)
+        if info is not None:
+            callback(info)
+
+    def unsubscribe(self, query_id, callback):
+        """
+        Stops calling a callback subscribed to a query
+
+        :param query_id: id of the query returned by Mixnode server
+        :param callback: callable passed to :meth:`subscribe`
+        """
+        with self._lock:
+            callbacks = self._callbacks.get(query_id, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self._callbacks.pop(query_id, None)
+
+    def wait(self, query_id, timeout=None):
+        """
+        Blocks until the webhook of a query arrives
+
+        :param query_id: id of the query returned by Mixnode server
+        :param timeout: seconds to wait at most, forever when None
+        :return: the query object, None on timeout
+        """
+        received = []
+        event = threading.Event()
+        def notify(info):
+            received.append(info)
+            event.set()
+        self.subscribe(query_id, notify)
+        if not event.wait(timeout):
+            self.unsubscribe(query_id, notify)
+        return received[0] if received else None
+
+    def close(self):
+        """
+        Stops listening
+        """
+        self.server.shutdown()
+        self.server.server_close()
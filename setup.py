@@ -45,9 +45,21 @@ packages = [
 ]
 
 requires = [
-    'requests'
+    'requests',
+    'futures; python_version < "3"'
 ]
 
+extras_requires = {
+    'async': ['aiohttp'],
+    'http2': ['httpx[http2]'],
+    'numpy': ['numpy'],
+    'arrow': ['pyarrow'],
+    'pandas': ['pandas', 'pyarrow'],
+    'fastjson': ['orjson'],
+    'compression': ['brotli', 'zstandard'],
+    'prometheus': ['prometheus_client']
+}
+
 tests_requires = [
     'nose',
     'mock'
@@ -64,6 +76,7 @@ setup(
     package_dir={' mixnode': 'mixnode'},
     packages=packages,
     install_requires=requires,
+    extras_require=extras_requires,
     tests_require=tests_requires,
     classifiers=[
         'Natural Language :: English',
@@ -0,0 +1,39 @@
+"""
+Stand-ins for the responses of Mixnode server shared by the unit tests
+"""
+
+import copy
+
+from tests.fixtures import ApiClientJsonData
+
+endpointUrl = 'https://api.mixnode.com'
+query_id = ApiClientJsonData.data['dummyQueryObject']['query_id']
+
+class MockResponse(object):
+    def __init__(self, json_data, status_code=200, headers=None, reason=''):
+        self.json_data = json_data
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.reason = reason
+
+    def json(self):
+        if self.json_data is None:
+            raise ValueError('No JSON object could be decoded')
+        return self.json_data
+
+def mocked_query_object(fallback, calls=None, **stats):
+    """
+    Mixnode server whose query object is FINISHED with the given scan
+    statistics, answering the other requests with fallback and recording
+    the (method, uri) of every request in calls
+    """
+    def request(*args, **kwargs):
+        if calls is not None:
+            calls.append((args[0], args[1]))
+        if args[0] == 'GET' and args[1] == endpointUrl + '/queries/' + query_id:
+            info = copy.deepcopy(ApiClientJsonData.data['dummyQueryObject'])
+            info['status'] = 'FINISHED'
+            info.update(stats)
+            return MockResponse(info)
+        return fallback(*args, **kwargs)
+    return request
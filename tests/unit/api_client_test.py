@@ -118,14 +118,33 @@ class ExecuteTest(TestCase):
         assert_equal(records[0]['col1'], "val1")
         assert_equal(records[1]['col1'], "val2")
 
-    @mock.patch('mixnode.api_client.requests.request', side_effect=mocked_requests)
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests)
     def test_execute_should_provide_response(self, mock_get):
         query = "SELECT * from homepages LIMIT 5"
         response = self.client.execute(query)
         assert_equal(response[0]['url'], ApiClientJsonData.data['dummyPage2Response']['rows'][0][0])
         assert_equal(response[1]['url'], ApiClientJsonData.data['dummyPage2Response']['rows'][1][0])
     
-    @mock.patch('mixnode.api_client.requests.request', side_effect=mocked_requests_server_error)
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests)
+    def test_iter_rows_should_yield_records(self, mock_get):
+        rows = self.client.iter_rows(query)
+        assert_equal(mock_get.call_count, 0)
+        first = next(rows)
+        assert_equal(first['url'], ApiClientJsonData.data['dummyPage2Response']['rows'][0][0])
+        assert_equal(len(list(rows)), 1)
+        assert_equal(self.client.query_id, ApiClientJsonData.data['dummyQueryObject']['query_id'])
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests)
+    def test_execute_should_not_accumulate_previous_responses(self, mock_get):
+        self.client.execute(query)
+        response = self.client.execute(query)
+        assert_equal(len(response), 2)
+
+    @raises(MixnodeError)
+    def test_stream_missing_query_error(self):
+        self.client.stream()
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests_server_error)
     @raises(MixnodeError)
     def test_response_server_error(self, mock_get):
         self.client.execute(query)
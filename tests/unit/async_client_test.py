@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import asyncio
+import sys
+import time
+from nose.tools import raises, assert_equal, assert_true
+from unittest import TestCase, skipIf
+
+from mixnode import CostStore
+from mixnode.error import MixnodeError, NotSupported, QueryTimeout
+from mixnode.polling import ConstantPolling
+from mixnode.query import Query
+
+from tests.fixtures import ApiClientJsonData
+from tests.unit.cost_test import GB, mocked_stats
+from tests.unit.api_client_test import mocked_requests, mocked_requests_server_error, query
+from tests.unit.query_test import mocked_running_pages
+
+if sys.version_info >= (3, 6):
+    from mixnode.async_client import AsyncMixnode, AsyncTransport
+
+    class MockAsyncTransport(AsyncTransport):
+        def __init__(self, side_effect):
+            self.side_effect = side_effect
+            self.in_flight = 0
+            self.max_in_flight = 0
+            self.closed = False
+
+        async def request(self, method, uri, data=None, headers=None, auth=None):
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0)
+            self.in_flight -= 1
+            return self.side_effect(method, uri)
+
+        async def close(self):
+            self.closed = True
+
+def run(coroutine):
+    return asyncio.get_event_loop_policy().new_event_loop().run_until_complete(coroutine)
+
+@skipIf(sys.version_info < (3, 6), 'asyncio client requires Python 3.6')
+class AsyncMixnodeTest(TestCase):
+    def setUp(self):
+        self.transport = MockAsyncTransport(mocked_requests)
+        self.client = AsyncMixnode('XXXXX', transport=self.transport)
+        self.client.setLag(0)
+
+    def test_execute(self):
+        response = run(self.client.execute(query))
+        assert_equal(response[0]['url'], ApiClientJsonData.data['dummyPage2Response']['rows'][0][0])
+        assert_equal(len(response), 2)
+
+    def test_stream(self):
+        async def collect():
+            records = []
+            async for record in self.client.stream(query):
+                records.append(record)
+            return records
+        assert_equal(len(run(collect())), 2)
+
+    @raises(MixnodeError)
+    def test_response_server_error(self):
+        self.client = AsyncMixnode('XXXXX', transport=MockAsyncTransport(mocked_requests_server_error))
+        self.client.setLag(0)
+        run(self.client.execute(query))
+
+    def test_concurrency_semaphore(self):
+        self.client.concurrency = 2
+        async def many():
+            return await asyncio.gather(*[self.client.execute(query) for _ in range(10)])
+        responses = run(many())
+        assert_equal(len(responses), 10)
+        assert_true(self.transport.max_in_flight <= 2)
+
+    def test_context_manager_closes_transport(self):
+        async def use():
+            async with self.client:
+                pass
+        run(use())
+        assert_true(self.transport.closed)
+
+    def test_max_rows_cancels_a_running_query(self):
+        calls = []
+        self.client = AsyncMixnode('XXXXX', transport=MockAsyncTransport(mocked_running_pages(calls)))
+        self.client.setLag(0)
+        response = run(self.client.execute(query, max_rows=2))
+        assert_equal([record['page'] for record in response], [1, 2])
+        assert_equal([method for method, uri in calls], ['POST', 'GET', 'GET', 'DELETE'])
+
+    def test_no_rows_wanted_does_not_submit(self):
+        calls = []
+        self.client = AsyncMixnode('XXXXX', transport=MockAsyncTransport(mocked_running_pages(calls)))
+        assert_equal(run(self.client.execute(query, max_rows=0)), [])
+        assert_equal(calls, [])
+
+    @raises(QueryTimeout)
+    def test_query_timeout(self):
+        self.client = AsyncMixnode('XXXXX', transport=MockAsyncTransport(mocked_running_pages([], 'PLANNING')))
+        self.client.setPollingPolicy(ConstantPolling(0.01))
+        self.client.setQueryTimeout(0.05)
+        run(self.client.execute(query))
+
+    @raises(QueryTimeout)
+    def test_inherited_sync_step_times_out(self):
+        timed_out = Query(self.client, {'query_str': query})
+        timed_out.expires = time.time() - 1
+        self.client._step(timed_out)
+
+    def test_sync_only_features_are_not_supported(self):
+        for name, args in [('setCache', (None,)), ('setPrefetch', (4,)), ('setBulkDownload', (True,)),
+                           ('setCheckpoint', (None,)), ('execute_columnar', (query,)), ('execute_arrow', (query,)),
+                           ('execute_df', (query,)), ('execute_to', (None, query)), ('execute_many', ([query],)),
+                           ('iter_many', ([query],)), ('download', (query, 'results.csv'))]:
+            try:
+                getattr(self.client, name)(*args)
+            except NotSupported as err:
+                assert_equal(err.feature, name)
+                assert_equal(err.client, 'AsyncMixnode')
+            else:
+                raise AssertionError(name + ' did not raise NotSupported')
+        assert_equal(self.transport.max_in_flight, 0)
+
+    def test_estimate_probe(self):
+        calls = []
+        self.client = AsyncMixnode('XXXXX', transport=MockAsyncTransport(mocked_stats(calls, GB // 2)))
+        self.client.setLag(0)
+        self.client.setCostStore(CostStore())
+        estimate = run(self.client.estimate(query, 100 * GB, probe=True, probe_limit=GB))
+        assert_equal([method for method, uri in calls], ['POST', 'GET'])
+        assert_equal(estimate.data_scanned, GB // 2)
+        assert_equal(len(self.client.costStore.samples(query)), 1)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import mock
+from nose.tools import assert_equal, assert_true
+from unittest import TestCase
+
+from mixnode import Mixnode
+from mixnode.error import ResponseServerError
+
+from tests.fixtures import ApiClientJsonData
+from tests.fixtures.MockServer import MockResponse
+from tests.unit.api_client_test import endpointUrl
+
+def mocked_batch_requests(*args, **kwargs):
+    # Every query gets its own id taken from its SQL text; queries named
+    # running are planned until they are cancelled
+    if args[0] == 'DELETE':
+        query_object = dict(ApiClientJsonData.data['dummyQueryObject'])
+        query_object['status'] = 'USER_CANCELED'
+        return MockResponse(query_object, 200)
+    if args[1] == endpointUrl + '/queries':
+        query_object = dict(ApiClientJsonData.data['dummyQueryObject'])
+        query_object['query_id'] = kwargs['data']['query_str']
+        return MockResponse(query_object, 200)
+    query_id = args[1].split('/')[-3]
+    if query_id == 'failing':
+        return MockResponse(ApiClientJsonData.data['dummyServerErrorResponse'], 200)
+    if query_id.startswith('running'):
+        return MockResponse({'status': 'PLANNING', 'next_page': args[1]}, 200)
+    return MockResponse(ApiClientJsonData.data['dummyPage2Response'], 200)
+
+class ExecuteManyTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_batch_requests)
+    def test_execute_many_keeps_query_order(self, mock_request):
+        queries = ['q' + str(index) for index in range(10)]
+        results = self.client.execute_many(queries, max_workers=4)
+        assert_equal([result.query_id for result in results], queries)
+        assert_true(all(len(result.records) == 2 for result in results))
+        stats = self.client.lastBatchStats
+        assert_equal(stats.queries, 10)
+        assert_equal(stats.rows, 20)
+        assert_equal(stats.pages, 10)
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_batch_requests)
+    def test_failing_query_does_not_stop_the_batch(self, mock_request):
+        results = self.client.execute_many(['q1', 'failing', 'q2'])
+        assert_equal([result.isSuccessful() for result in results], [True, False, True])
+        assert_true(isinstance(results[1].error, ResponseServerError))
+        assert_equal(self.client.lastBatchStats.failed, 1)
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_batch_requests)
+    def test_queries_are_submitted_up_front(self, mock_request):
+        list(self.client.iter_many(['q1', 'q2', 'q3'], max_workers=1))
+        methods = [call[0][0] for call in mock_request.call_args_list]
+        assert_equal(methods[:3], ['POST', 'POST', 'POST'])
+        assert_equal(methods[3:], ['GET', 'GET', 'GET'])
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_batch_requests)
+    def test_closing_the_batch_cancels_running_queries(self, mock_request):
+        for result in self.client.iter_many(['q1', 'running1', 'running2'], max_workers=3):
+            assert_equal(result.query_id, 'q1')
+            break
+        deleted = [call[0][1] for call in mock_request.call_args_list if call[0][0] == 'DELETE']
+        assert_equal(sorted(deleted), [endpointUrl + '/queries/running1', endpointUrl + '/queries/running2'])
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import errno
+import os
+import shutil
+import tempfile
+import time
+
+import mock
+from nose.tools import assert_equal, assert_true, assert_not_equal
+from unittest import TestCase
+
+from mixnode import Mixnode
+from mixnode.cache import ResultCache, normalizeQuery, cacheKey
+
+from tests.fixtures import ApiClientJsonData
+from tests.unit.api_client_test import mocked_requests, query
+from tests.unit.query_test import mocked_many_pages
+
+class NormalizeQueryTest(TestCase):
+    def test_whitespace_outside_literals(self):
+        assert_equal(normalizeQuery("  SELECT  url\n FROM pages\tWHERE title = 'a  b' ;"), "SELECT url FROM pages WHERE title = 'a  b'")
+
+    def test_cache_key(self):
+        assert_equal(cacheKey('SELECT 1', 10), cacheKey(' SELECT   1; ', 10))
+        assert_not_equal(cacheKey('SELECT 1', 10), cacheKey('SELECT 1', 20))
+        assert_not_equal(cacheKey("SELECT 'a b'"), cacheKey("SELECT 'a  b'"))
+        assert_not_equal(cacheKey('SELECT 1', 10, 'A:'), cacheKey('SELECT 1', 10, 'B:'))
+
+class ResultCacheTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+        self.client.setCache(ResultCache(self.directory))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def cached(self, query):
+        return self.client.cache.get(query, credentials=self.client.credentials['api_key'])
+
+    def test_hit_does_not_submit_the_query(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests) as mock_request:
+            first = self.client.execute(query)
+            calls = mock_request.call_count
+            second = self.client.execute(query + ' ;')
+            assert_equal(mock_request.call_count, calls)
+        assert_equal(first, second)
+        assert_equal(self.client.query_id, ApiClientJsonData.data['dummyQueryObject']['query_id'])
+
+    def test_multiple_pages_are_replayed(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_many_pages(30)):
+            first = self.client.execute(query)
+        with mock.patch('mixnode.cache.PAGE_ROWS', 7):
+            with mock.patch('mixnode.transport.requests.Session.request') as mock_request:
+                second = list(self.client.iter_rows(query))
+                assert_equal(mock_request.call_count, 0)
+        assert_equal(first, second)
+
+    def test_input_limit_is_part_of_the_key(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests) as mock_request:
+            self.client.execute(query, 10)
+            calls = mock_request.call_count
+            self.client.execute(query, 20)
+            assert_equal(mock_request.call_count, calls * 2)
+
+    def test_abandoned_query_is_not_cached(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_many_pages(5)):
+            rows = self.client.iter_rows(query)
+            next(rows)
+            rows.close()
+        assert_equal(os.listdir(self.directory), [])
+        assert_equal(self.cached(query), None)
+
+    def test_ttl(self):
+        self.client.cache.ttl = 60
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests):
+            self.client.execute(query)
+        assert_true(self.cached(query) is not None)
+        with mock.patch('mixnode.cache.time.time', return_value=time.time() + 120):
+            assert_equal(self.cached(query), None)
+        assert_equal(os.listdir(self.directory), [])
+
+    def test_lru_eviction(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests):
+            self.client.execute('SELECT 1')
+            size = self.client.cache.entries()[0][1]
+            self.client.cache.max_bytes = size * 2 + size // 2
+            self.client.execute('SELECT 2')
+            # SELECT 1 becomes the most recently used entry
+            past = time.time() - 100
+            os.utime(self.client.cache.path(cacheKey('SELECT 2', None, 'XXXXX:')), (past, past))
+            self.cached('SELECT 1')
+            self.client.execute('SELECT 3')
+        assert_true(self.cached('SELECT 1') is not None)
+        assert_equal(self.cached('SELECT 2'), None)
+        assert_true(self.cached('SELECT 3') is not None)
+
+    def test_clear(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests):
+            self.client.execute('SELECT 1')
+            self.client.execute('SELECT 2')
+        assert_equal(len(os.listdir(self.directory)), 2)
+        self.client.cache.clear()
+        assert_equal(os.listdir(self.directory), [])
+
+    def test_credentials_are_part_of_the_key(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests) as mock_request:
+            self.client.execute(query)
+            calls = mock_request.call_count
+            other = Mixnode('YYYYY')
+            other.setLag(0)
+            other.setCache(self.client.cache)
+            other.execute(query)
+            assert_equal(mock_request.call_count, calls * 2)
+        assert_equal(self.client.cache.get(query), None)
+
+    def test_ttl_counts_from_the_creation_of_an_entry(self):
+        self.client.cache.ttl = 60
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests):
+            self.client.execute(query)
+        created = time.time() - 50
+        os.utime(self.client.cache.path(cacheKey(query, None, 'XXXXX:')), (created, created))
+        assert_true(self.cached(query) is not None)
+        with mock.patch('mixnode.cache.time.time', return_value=time.time() + 20):
+            self.client.cache.evict()
+        assert_equal(os.listdir(self.directory), [])
+
+    def test_directory_created_concurrently(self):
+        directory = os.path.join(self.directory, 'shared')
+        def created_meanwhile(path):
+            os.mkdir(path)
+            raise OSError(errno.EEXIST, 'File exists', path)
+        with mock.patch('mixnode.cache.os.makedirs', side_effect=created_meanwhile):
+            cache = ResultCache(directory)
+        assert_equal(cache.directory, directory)
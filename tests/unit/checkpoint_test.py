@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import os
+import shutil
+import tempfile
+
+import mock
+from nose.tools import assert_equal, assert_true
+from unittest import TestCase
+
+from mixnode import Mixnode, Checkpoint
+
+from tests.unit.api_client_test import endpointUrl, query
+from tests.unit.query_test import mocked_many_pages, query_id
+
+def crashing_after(pages, crash):
+    request = mocked_many_pages(pages)
+    def crashing(*args, **kwargs):
+        if args[1].endswith('/results/' + str(crash)):
+            raise KeyboardInterrupt()
+        return request(*args, **kwargs)
+    return crashing
+
+class CheckpointTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+        self.client.setCheckpoint(Checkpoint(self.directory))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_checkpoint_is_removed_once_consumed(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_many_pages(5)):
+            response = self.client.execute(query)
+        assert_equal([record['page'] for record in response], [1, 2, 3, 4, 5])
+        assert_equal(os.listdir(self.directory), [])
+
+    def test_progress_is_recorded_after_every_page(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=crashing_after(10, 4)):
+            try:
+                self.client.execute(query)
+            except KeyboardInterrupt:
+                pass
+        assert_equal(self.client.checkpoint.queries(), [query_id])
+        state = self.client.checkpoint.load(query_id)
+        assert_equal(state['query'], query)
+        assert_equal(state['page'], 4)
+        assert_equal(state['next_page'], endpointUrl + '/queries/' + query_id + '/results/4')
+        assert_equal(state['rows'], 3)
+
+    def test_resume_continues_from_last_page(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=crashing_after(10, 4)):
+            try:
+                self.client.execute(query)
+            except KeyboardInterrupt:
+                pass
+        client = Mixnode('XXXXX')
+        client.setCheckpoint(Checkpoint(self.directory))
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_many_pages(10)) as mock_request:
+            response = list(client.resume(query_id))
+        assert_equal([record['page'] for record in response], list(range(1, 11)))
+        assert_equal(mock_request.call_count, 7)
+        assert_true(all(call[0][0] == 'GET' for call in mock_request.call_args_list))
+        assert_equal(mock_request.call_args_list[0][0][1], endpointUrl + '/queries/' + query_id + '/results/4')
+        assert_equal(client.checkpoint.queries(), [])
+
+    def test_unrecorded_spool_tail_is_dropped(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=crashing_after(10, 4)):
+            try:
+                self.client.execute(query)
+            except KeyboardInterrupt:
+                pass
+        # A page spooled by a process which died before recording it
+        with open(os.path.join(self.directory, query_id + '.spool'), 'ab') as spool:
+            spool.write(b'\x05\x00\x00\x00junk!')
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_many_pages(10)):
+            response = list(self.client.resume(query_id))
+        assert_equal([record['page'] for record in response], list(range(1, 11)))
+
+    def test_abandoned_iteration_can_be_resumed(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_many_pages(6)):
+            records = self.client.iter_rows(query)
+            assert_equal([next(records)['page'] for _ in range(3)], [1, 2, 3])
+            records.close()
+            response = list(self.client.resume(query_id))
+        assert_equal([record['page'] for record in response], list(range(1, 7)))
+
+    def test_resume_without_checkpoint_starts_from_first_page(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_many_pages(3)) as mock_request:
+            response = list(self.client.resume(query_id))
+        assert_equal([record['page'] for record in response], [1, 2, 3])
+        assert_equal(mock_request.call_count, 3)
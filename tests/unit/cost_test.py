@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import mock
+from nose.tools import raises, assert_equal, assert_true
+from unittest import TestCase
+
+from mixnode import Mixnode, CostStore
+from mixnode.cost import queryShape
+from mixnode.error import MissingQuery
+
+from tests.fixtures.MockServer import mocked_query_object
+from tests.unit.api_client_test import endpointUrl, mocked_requests, query
+from tests.unit.query_test import query_id
+
+GB = 1 << 30
+
+def mocked_stats(calls, data_scanned=GB):
+    """
+    Mixnode server whose query object reports scan statistics once FINISHED
+    """
+    return mocked_query_object(mocked_requests, calls, data_scanned=data_scanned, rows_scanned=1000, output_rows=10)
+
+class QueryShapeTest(TestCase):
+    def test_literals_and_formatting_are_ignored(self):
+        assert_equal(queryShape("SELECT url FROM pages\n  WHERE content LIKE '%MediaWiki%' -- generator\n LIMIT 10;"),
+            'select url from pages where content like ? limit ?')
+        assert_equal(queryShape("select url from pages where content like 'it''s' limit 5"),
+            queryShape("SELECT url FROM pages WHERE content LIKE '%WordPress%' LIMIT 10"))
+
+    def test_identifiers_are_kept(self):
+        assert_equal(queryShape('SELECT "col 1", t2.x FROM t2'), 'select "col 1", t2.x from t2')
+
+class CostStoreTest(TestCase):
+    def setUp(self):
+        self.store = CostStore()
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_unknown_shape(self):
+        assert_equal(self.store.estimate(query), None)
+
+    def test_scan_bounded_by_the_input_limit_is_extrapolated(self):
+        self.store.record(query, GB, {'data_scanned': GB, 'rows_scanned': 1000, 'output_rows': 10}, 2.0)
+        estimate = self.store.estimate(query, 10 * GB)
+        assert_equal(estimate.data_scanned, 10 * GB)
+        assert_equal(estimate.rows_scanned, 10000)
+        assert_equal(estimate.output_rows, 100)
+        assert_equal(estimate.elapsed, 20.0)
+        assert_equal(estimate.exact, False)
+        assert_equal(estimate.bytesPerSecond(), GB / 2.0)
+
+    def test_whole_input_bounds_the_scan(self):
+        self.store.record(query, 10 * GB, {'data_scanned': 4 * GB, 'rows_scanned': 4000, 'output_rows': 40}, 8.0)
+        self.store.record(query, GB, {'data_scanned': GB, 'rows_scanned': 1000, 'output_rows': 10}, 2.0)
+        estimate = self.store.estimate(query, 100 * GB)
+        assert_equal(estimate.data_scanned, 4 * GB)
+        assert_equal(estimate.rows_scanned, 4000)
+        assert_equal(estimate.samples, 2)
+        assert_true(estimate.exact)
+
+    def test_stats_without_data_scanned_are_ignored(self):
+        self.store.record(query, None, {'status': 'FINISHED'}, 1.0)
+        assert_equal(self.store.samples(query), [])
+
+class EstimateTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+        self.client.setCostStore(CostStore())
+
+    def test_completed_queries_are_recorded(self):
+        calls = []
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_stats(calls)):
+            self.client.execute(query, GB)
+        assert_equal(calls[-1][1], endpointUrl + '/queries/' + query_id)
+        estimate = self.client.estimate(query, 2 * GB)
+        assert_equal(estimate.data_scanned, 2 * GB)
+        assert_equal(estimate.rows_scanned, 2000)
+
+    def test_probe_does_not_fetch_results(self):
+        calls = []
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_stats(calls, GB // 2)):
+            estimate = self.client.estimate(query, 100 * GB, probe=True, probe_limit=GB)
+        assert_equal([method for method, uri in calls], ['POST', 'GET'])
+        assert_true('/results/' not in calls[1][1])
+        assert_equal(estimate.data_scanned, GB // 2)
+        assert_true(estimate.exact)
+
+    def test_probe_without_cost_store_is_not_kept(self):
+        self.client.setCostStore(None)
+        calls = []
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_stats(calls, GB // 2)):
+            estimate = self.client.estimate(query, 100 * GB, probe=True, probe_limit=GB)
+            assert_equal(estimate.data_scanned, GB // 2)
+            assert_equal(self.client.costStore, None)
+            del calls[:]
+            self.client.execute(query)
+        assert_true(endpointUrl + '/queries/' + query_id not in [uri for method, uri in calls])
+
+    def test_no_probe_without_samples(self):
+        assert_equal(self.client.estimate(query), None)
+
+    @raises(MissingQuery)
+    def test_missing_query(self):
+        self.client.estimate()
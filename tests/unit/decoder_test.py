@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import datetime
+import math
+from decimal import Decimal
+
+import mock
+from nose.tools import assert_equal, assert_true
+from unittest import TestCase, skipIf
+
+from mixnode import Mixnode
+from mixnode.decoder import Decoder, UTC
+from mixnode.resultset import ResultSet
+
+from tests.fixtures.MockServer import MockResponse
+from tests.unit.api_client_test import endpointUrl, query
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def signature(rawType, *arguments):
+    return {
+        'rawType': rawType,
+        'arguments': [{'kind': 'TYPE_SIGNATURE', 'value': argument} for argument in arguments]
+    }
+
+columns = [
+    {'name': 'url', 'type': 'varchar', 'typeSignature': signature('varchar')},
+    {'name': 'size', 'type': 'bigint', 'typeSignature': signature('bigint')},
+    {'name': 'score', 'type': 'double', 'typeSignature': signature('double')},
+    {'name': 'price', 'type': 'decimal(10,2)', 'typeSignature': signature('decimal')},
+    {'name': 'day', 'type': 'date', 'typeSignature': signature('date')},
+    {'name': 'crawled', 'type': 'timestamp', 'typeSignature': signature('timestamp')},
+    {'name': 'seen', 'type': 'timestamp with time zone', 'typeSignature': signature('timestamp with time zone')},
+    {'name': 'body', 'type': 'varbinary', 'typeSignature': signature('varbinary')},
+    {'name': 'dates', 'type': 'array(date)', 'typeSignature': signature('array', signature('date'))},
+    {'name': 'scores', 'type': 'map(varchar,double)', 'typeSignature': signature('map', signature('varchar'), signature('double'))}
+]
+
+rows = [
+    ['http://a.com/', 10, 'NaN', '12.50', '2019-03-01', '2019-03-01 10:20:30.123', '2019-03-01 10:20:30.000 UTC', 'aGk=', ['2019-03-02'], {'a': 'Infinity'}],
+    ['http://b.com/', None, 1.5, None, None, None, None, None, None, None]
+]
+
+class DecoderTest(TestCase):
+    def test_decode_rows(self):
+        decoded = Decoder(columns).decodeRows(rows)
+        first, second = decoded
+        assert_equal(first[0], 'http://a.com/')
+        assert_equal(first[1], 10)
+        assert_true(math.isnan(first[2]))
+        assert_equal(first[3], Decimal('12.50'))
+        assert_equal(first[4], datetime.date(2019, 3, 1))
+        assert_equal(first[5], datetime.datetime(2019, 3, 1, 10, 20, 30, 123000))
+        assert_equal(first[6], datetime.datetime(2019, 3, 1, 10, 20, 30, tzinfo=UTC))
+        assert_equal(first[7], b'hi')
+        assert_equal(first[8], [datetime.date(2019, 3, 2)])
+        assert_equal(first[9], {'a': float('inf')})
+        assert_equal(second, ['http://b.com/', None, 1.5, None, None, None, None, None, None, None])
+
+    def test_fractional_seconds_precision(self):
+        decoder = Decoder([
+            {'name': 'crawled', 'type': 'timestamp(p)', 'typeSignature': signature('timestamp')},
+            {'name': 'at', 'type': 'time(p)', 'typeSignature': signature('time')}
+        ])
+        decoded = decoder.decodeRows([
+            ['2020-01-01 00:00:00', '10:20:30'],
+            ['2020-01-01 00:00:00.123', '10:20:30.123'],
+            ['2020-01-01 00:00:00.123456789', '10:20:30.123456789']
+        ])
+        assert_equal(decoded, [
+            [datetime.datetime(2020, 1, 1), datetime.time(10, 20, 30)],
+            [datetime.datetime(2020, 1, 1, 0, 0, 0, 123000), datetime.time(10, 20, 30, 123000)],
+            [datetime.datetime(2020, 1, 1, 0, 0, 0, 123456), datetime.time(10, 20, 30, 123456)]
+        ])
+
+    def test_identity_columns_are_not_converted(self):
+        decoder = Decoder(columns[:2])
+        assert_true(decoder.isIdentity)
+        assert_true(decoder.decodeRows(rows) is rows)
+
+    def test_type_without_signature(self):
+        decoder = Decoder([{'name': 'day', 'type': 'date'}])
+        assert_equal(decoder.decodeRows([['2019-03-01']]), [[datetime.date(2019, 3, 1)]])
+
+    def test_client_decodes_records(self):
+        def request(*args, **kwargs):
+            if args[1] == endpointUrl + '/queries':
+                return MockResponse({'query_id': 'q1', 'status': 'PLANNING'})
+            return MockResponse({'status': 'FINISHED', 'columns': columns, 'rows': rows})
+
+        client = Mixnode('XXXXX')
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=request):
+            assert_equal(client.execute(query)[0]['day'], '2019-03-01')
+            client.setDecodeTypes(True)
+            assert_equal(client.execute(query)[0]['day'], datetime.date(2019, 3, 1))
+            assert_equal(client.execute_columnar(query)['price'][0], Decimal('12.50'))
+
+    @skipIf(numpy is None, 'numpy is not installed')
+    def test_to_numpy(self):
+        resultset = ResultSet()
+        resultset.addPage({'columns': columns, 'rows': rows}, Decoder(columns))
+        assert_equal(resultset.to_numpy('score').dtype, numpy.dtype('float64'))
+        assert_equal(resultset.to_numpy('size').dtype, numpy.dtype('object'))
+        assert_equal(str(resultset.to_numpy('crawled').dtype), 'datetime64[us]')
+        resultset = ResultSet()
+        resultset.addPage({'columns': columns[:2], 'rows': [['a', 1], ['b', 2]]})
+        assert_equal(list(resultset.to_numpy('size')), [1, 2])
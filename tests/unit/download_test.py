@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import os
+import shutil
+import tempfile
+
+import mock
+from nose.tools import raises, assert_equal
+from unittest import TestCase
+
+from mixnode import Mixnode
+from mixnode.download import iterLines, iterRecords
+from mixnode.error import DownloadError
+from mixnode.query import PAGINATION_STATE
+
+from tests.fixtures import ApiClientJsonData
+from tests.fixtures.MockServer import MockResponse
+from tests.unit.api_client_test import endpointUrl, query
+
+query_id = ApiClientJsonData.data['dummyQueryObject']['query_id']
+results_file = u'url,title\nhttp://a.com/,"Café, ""the"" best"\nhttp://b.com/,"two\nlines"\n'.encode('utf-8')
+
+def chunked(data, size):
+    return [data[index:index + size] for index in range(0, len(data), size)]
+
+def mocked_query_object(statuses):
+    statuses = list(statuses)
+    def request(*args, **kwargs):
+        query_object = dict(ApiClientJsonData.data['dummyQueryObject'])
+        if args[1] == endpointUrl + '/queries/' + query_id:
+            query_object['status'] = statuses.pop(0)
+        return MockResponse(query_object)
+    return request
+
+class IterRecordsTest(TestCase):
+    def test_lines_split_across_chunks(self):
+        lines = list(iterLines(chunked(results_file, 3)))
+        assert_equal(u''.join(lines), results_file.decode('utf-8'))
+        assert_equal(lines[0], u'url,title\n')
+
+    def test_records(self):
+        for size in (1, 2, 7, len(results_file)):
+            records = list(iterRecords(chunked(results_file, size)))
+            assert_equal(records, [
+                {'url': 'http://a.com/', 'title': u'Café, "the" best'},
+                {'url': 'http://b.com/', 'title': 'two\nlines'}
+            ])
+
+    def test_empty_file(self):
+        assert_equal(list(iterRecords([])), [])
+
+class BulkDownloadTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_iter_download_waits_for_the_query(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_query_object(['RUNNING', 'FINISHED'])) as mock_request:
+            with mock.patch.object(self.client.transport, 'stream', return_value=iter(chunked(results_file, 5))) as mock_stream:
+                records = list(self.client.iter_download(query))
+        assert_equal(len(records), 2)
+        assert_equal(mock_request.call_count, 3)
+        mock_stream.assert_called_once_with(ApiClientJsonData.data['dummyQueryObject']['results_download_url'])
+        assert_equal(self.client.lastQuery.state, PAGINATION_STATE['DONE'])
+
+    def test_bulk_download_mode(self):
+        self.client.setBulkDownload(True)
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_query_object(['FINISHED'])):
+            with mock.patch.object(self.client.transport, 'stream', return_value=iter([results_file])):
+                records = self.client.execute(query)
+        assert_equal(records[1]['url'], 'http://b.com/')
+
+    def test_download_to_disk(self):
+        path = os.path.join(self.directory, 'results.csv')
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_query_object(['FINISHED'])):
+            with mock.patch.object(self.client.transport, 'stream', return_value=iter(chunked(results_file, 4))):
+                written = self.client.download(query, path)
+        assert_equal(written, len(results_file))
+        with open(path, 'rb') as downloaded:
+            assert_equal(downloaded.read(), results_file)
+
+    @raises(DownloadError)
+    def test_http_error_of_the_download(self):
+        response = mock.Mock(status_code=403, reason='Forbidden')
+        with mock.patch('mixnode.transport.requests.Session.get', return_value=response):
+            list(self.client.transport.stream('https://www.mixnode.com/download-results'))
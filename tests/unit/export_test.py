@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import datetime
+from decimal import Decimal
+
+import mock
+from nose.tools import assert_equal, assert_true
+from unittest import TestCase, skipIf
+
+from mixnode import Mixnode
+
+from tests.fixtures.MockServer import MockResponse
+from tests.unit.api_client_test import endpointUrl, query
+from tests.unit.decoder_test import columns, rows
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+def mocked_pages(*args, **kwargs):
+    if args[1] == endpointUrl + '/queries':
+        return MockResponse({'query_id': 'q1', 'status': 'PLANNING'})
+    page = int(args[1].rsplit('/', 1)[1])
+    if page == 1:
+        return MockResponse({'status': 'RUNNING', 'columns': [], 'rows': [], 'next_page': endpointUrl + '/queries/q1/results/2'})
+    payload = {'status': 'FINISHED', 'columns': columns, 'rows': rows}
+    if page == 2:
+        payload['next_page'] = endpointUrl + '/queries/q1/results/3'
+    return MockResponse(payload)
+
+@skipIf(pyarrow is None, 'pyarrow is not installed')
+class ArrowExportTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_pages)
+    def test_execute_arrow(self, mock_request):
+        table = self.client.execute_arrow(query)
+        assert_equal(table.num_rows, 4)
+        assert_equal(table.column_names, [column['name'] for column in columns])
+        assert_equal(table.schema.field('size').type, pyarrow.int64())
+        assert_equal(table.schema.field('price').type, pyarrow.decimal128(10, 2))
+        assert_equal(table.schema.field('dates').type, pyarrow.list_(pyarrow.date32()))
+        # timestamp with time zone has no Arrow counterpart and stays text
+        assert_equal(table.schema.field('seen').type, pyarrow.string())
+        first = table.slice(0, 1).to_pylist()[0]
+        assert_equal(first['price'], Decimal('12.50'))
+        assert_equal(first['crawled'], datetime.datetime(2019, 3, 1, 10, 20, 30, 123000))
+        assert_equal(first['seen'], '2019-03-01 10:20:30.000 UTC')
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_pages)
+    def test_stream_arrow(self, mock_request):
+        reader = self.client.stream_arrow(query)
+        batches = list(reader)
+        assert_equal(len(batches), 2)
+        assert_true(all(batch.num_rows == 2 for batch in batches))
+
+    @skipIf(pandas is None, 'pandas is not installed')
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_pages)
+    def test_execute_df(self, mock_request):
+        frame = self.client.execute_df(query)
+        assert_equal(len(frame), 4)
+        assert_equal(list(frame['url'])[:2], ['http://a.com/', 'http://b.com/'])
+
+@skipIf(pandas is None, 'pandas is not installed')
+class DataFrameWithoutArrowTest(TestCase):
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_pages)
+    def test_execute_df_falls_back_on_result_set(self, mock_request):
+        client = Mixnode('XXXXX')
+        client.setLag(0)
+        with mock.patch.dict('sys.modules', {'pyarrow': None}):
+            frame = client.execute_df(query)
+        assert_equal(len(frame), 4)
+        assert_equal(list(frame.columns), [column['name'] for column in columns])
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import json
+
+import mock
+from nose.tools import raises, assert_equal
+from unittest import TestCase, skipIf
+
+from mixnode import Mixnode, JsonBackend
+from mixnode.error import MissingDependency
+from mixnode.jsonbackend import BACKENDS
+
+from tests.fixtures import ApiClientJsonData
+from tests.unit.api_client_test import endpointUrl, query
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class RawResponse:
+    def __init__(self, json_data, status_code=200):
+        self.content = json.dumps(json_data).encode('utf-8')
+        self.status_code = status_code
+
+    def json(self):
+        raise AssertionError('the body should be decoded from its raw bytes')
+
+def mocked_raw_requests(*args, **kwargs):
+    query_id = ApiClientJsonData.data['dummyQueryObject']['query_id']
+    if args[1] == endpointUrl + '/queries':
+        return RawResponse(ApiClientJsonData.data['dummyQueryObject'])
+    elif args[1] == endpointUrl + '/queries/' + query_id + '/results/1':
+        return RawResponse(ApiClientJsonData.data['dummyPage1Response'])
+    return RawResponse(ApiClientJsonData.data['dummyPage2Response'])
+
+class JsonBackendTest(TestCase):
+    def test_fastest_installed_backend_is_picked(self):
+        assert_equal(JsonBackend().name in BACKENDS, True)
+        if orjson is not None:
+            assert_equal(JsonBackend().name, 'orjson')
+
+    def test_every_installed_backend_decodes_bytes(self):
+        document = {'rows': [['http://a.com/', 10, 1.5, None, u'été']]}
+        for name in BACKENDS:
+            try:
+                backend = JsonBackend(name)
+            except MissingDependency:
+                continue
+            assert_equal(backend.loads(json.dumps(document).encode('utf-8')), document)
+
+    @raises(ValueError)
+    def test_unknown_backend(self):
+        JsonBackend('yaml')
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_raw_requests)
+    def test_pages_are_decoded_from_raw_bytes(self, mock_request):
+        client = Mixnode('XXXXX')
+        client.setLag(0)
+        client.setJsonBackend('json')
+        response = client.execute(query)
+        assert_equal(len(response), 2)
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_raw_requests)
+    def test_orjson_backend(self, mock_request):
+        client = Mixnode('XXXXX')
+        client.setLag(0)
+        client.setJsonBackend('orjson')
+        assert_equal(len(client.execute(query)), 2)
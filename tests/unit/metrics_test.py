@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import sys
+
+import mock
+from nose.tools import assert_equal, assert_true
+from unittest import TestCase, skipIf
+
+from mixnode import Mixnode, QueryListener, ConstantPolling, PrometheusListener
+from mixnode.metrics import SLEEP_POLLING
+
+from tests.fixtures import ApiClientJsonData
+from tests.fixtures.MockServer import mocked_query_object
+from tests.unit.api_client_test import mocked_requests, mocked_requests_server_error, query
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+query_id = ApiClientJsonData.data['dummyQueryObject']['query_id']
+
+mocked_with_query_object = mocked_query_object(mocked_requests, data_scanned=1024, rows_scanned=10, output_rows=2, ended_ts=1551497630)
+
+class RecordingListener(QueryListener):
+    def __init__(self):
+        self.events = []
+
+    def onQueryStart(self, query):
+        self.events.append(('start', query.state))
+
+    def onRequest(self, query, method, latency, size, is_page):
+        self.events.append(('request', method, is_page))
+
+    def onSleep(self, query, seconds, reason):
+        self.events.append(('sleep', seconds, reason))
+
+    def onQueryEnd(self, query):
+        self.events.append(('end', query.state))
+
+@mock.patch('mixnode.api_client.time.sleep')
+class MetricsTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setPollingPolicy(ConstantPolling(0.25))
+        self.listener = RecordingListener()
+        self.client.addListener(self.listener)
+
+    def test_lifecycle_events(self, sleep):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests):
+            self.client.execute(query)
+        assert_equal(self.listener.events, [
+            ('start', 'SUBMITTED'),
+            ('request', 'POST', False),
+            ('request', 'GET', True),
+            ('sleep', 0.25, SLEEP_POLLING),
+            ('request', 'GET', True),
+            ('end', 'DONE')
+        ])
+
+    def test_query_metrics(self, sleep):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests):
+            self.client.execute(query)
+        metrics = self.client.lastQuery.metrics
+        assert_equal(metrics.requests, 3)
+        assert_equal(metrics.pages, 2)
+        assert_equal(metrics.sleeps, {SLEEP_POLLING: 0.25})
+        assert_equal(sorted(metrics.statusTimes.keys()), ['FINISHED', 'PLANNING'])
+        assert_true(metrics.ended is not None)
+        assert_equal(metrics.server, {})
+
+    def test_scan_stats_of_the_query_object(self, sleep):
+        self.client.setScanStats(True)
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_with_query_object) as mock_request:
+            self.client.execute(query)
+        assert_equal(mock_request.call_count, 4)
+        server = self.client.lastQuery.metrics.server
+        assert_equal(server['data_scanned'], 1024)
+        assert_equal(server['rows_scanned'], 10)
+        assert_equal(server['ended_ts'] - server['created_ts'], 6)
+
+    def test_failed_query_ends(self, sleep):
+        self.client.setScanStats(True)
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests_server_error) as mock_request:
+            try:
+                self.client.execute(query)
+            except Exception:
+                pass
+        assert_equal(self.listener.events[-1], ('end', 'FAILED'))
+        assert_equal(mock_request.call_count, 3)
+
+    def test_remove_listener(self, sleep):
+        self.client.removeListener(self.listener)
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests):
+            self.client.execute(query)
+        assert_equal(self.listener.events, [])
+
+@skipIf(prometheus_client is None, 'prometheus_client is not installed')
+@mock.patch('mixnode.api_client.time.sleep')
+class PrometheusListenerTest(TestCase):
+    def test_metrics_are_exported(self, sleep):
+        registry = prometheus_client.CollectorRegistry()
+        client = Mixnode('XXXXX')
+        client.setScanStats(True)
+        client.addListener(PrometheusListener(registry=registry))
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_with_query_object):
+            client.execute(query)
+        assert_equal(registry.get_sample_value('mixnode_queries_total', {'state': 'DONE'}), 1)
+        assert_equal(registry.get_sample_value('mixnode_rows_total'), 2)
+        assert_equal(registry.get_sample_value('mixnode_data_scanned_bytes_total'), 1024)
+        assert_equal(registry.get_sample_value('mixnode_request_latency_seconds_count', {'method': 'GET', 'kind': 'page'}), 2)
+
+@skipIf(sys.version_info < (3, 6), 'asyncio client requires Python 3.6')
+class AsyncMetricsTest(TestCase):
+    def test_lifecycle_events(self):
+        from mixnode import AsyncMixnode
+        from tests.unit.async_client_test import MockAsyncTransport, run
+        client = AsyncMixnode('XXXXX', transport=MockAsyncTransport(mocked_with_query_object))
+        client.setLag(0)
+        client.setScanStats(True)
+        listener = RecordingListener()
+        client.addListener(listener)
+        run(client.execute(query))
+        assert_equal(listener.events[0], ('start', 'SUBMITTED'))
+        assert_equal(listener.events[-1], ('end', 'DONE'))
+        assert_equal(client.lastQuery.metrics.server['data_scanned'], 1024)
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+
+import mock
+import requests
+from nose.tools import raises, assert_equal
+from unittest import TestCase
+
+from mixnode import Mixnode, HashPartitions, OffsetPartitions, Aggregation
+from mixnode.error import PartitionError
+
+from tests.fixtures.MockServer import MockResponse
+
+template = 'SELECT url_host, count(*) AS pages FROM pages WHERE {partition} GROUP BY url_host'
+
+class MockServer(object):
+    """
+    Runs every shard as a query of its own; shards listed in failures fail
+    with the given status the first time they run, and those listed in
+    rejects are turned down with the given HTTP status code or exception
+    when submitted
+    """
+    def __init__(self, rows, failures=None, rejects=None):
+        self.rows = rows
+        self.failures = dict(failures or {})
+        self.rejects = dict(rejects or {})
+        self.submissions = []
+        self.queries = []
+        self.lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        if args[0] == 'POST':
+            with self.lock:
+                self.submissions.append(kwargs['data']['query_str'])
+                reject = self.rejects.get(kwargs['data']['query_str'])
+            if isinstance(reject, Exception):
+                raise reject
+            if reject is not None:
+                return MockResponse({'errors': {'message': 'Rejected'}}, reject)
+            with self.lock:
+                self.queries.append(kwargs['data']['query_str'])
+                query_id = 'q' + str(len(self.queries) - 1)
+            return MockResponse({'query_id': query_id, 'status': 'PLANNING'})
+        query_str = self.queries[int(args[1].split('/')[-3][1:])]
+        status = self.failures.pop(query_str, None)
+        if status is not None:
+            return MockResponse({'status': status, 'error_msg': 'Query failed'})
+        return MockResponse({'status': 'FINISHED', 'columns': [{'name': 'url_host'}, {'name': 'pages'}], 'rows': self.rows(query_str)})
+
+class PartitionsTest(TestCase):
+    def test_hash_clause(self):
+        partitions = HashPartitions('url_host', 4)
+        assert_equal(partitions.shards(), [(0, 4), (1, 4), (2, 4), (3, 4)])
+        assert_equal(partitions.query('SELECT 1 FROM pages WHERE {partition}', (1, 4)),
+            'SELECT 1 FROM pages WHERE mod(bitwise_and(from_big_endian_64(xxhash64(to_utf8(CAST(url_host AS varchar)))), 9223372036854775807), 4) = 1')
+
+    def test_hash_split_covers_the_shard(self):
+        halves = HashPartitions('url_host', 4).split((1, 4))
+        assert_equal(halves, [(1, 8), (5, 8)])
+        for value in range(64):
+            assert_equal(value % 4 == 1, any(value % modulus == remainder for remainder, modulus in halves))
+
+    def test_offset_shards(self):
+        partitions = OffsetPartitions('url', 10, 3)
+        assert_equal(partitions.shards(), [(0, 4), (4, 4), (8, 2)])
+        assert_equal(partitions.clause((4, 4)), 'ORDER BY url OFFSET 4 LIMIT 4')
+        assert_equal(partitions.split((4, 4)), [(4, 2), (6, 2)])
+        assert_equal(partitions.split((8, 1)), None)
+
+    @raises(ValueError)
+    def test_template_without_placeholder(self):
+        HashPartitions('url_host', 2).query('SELECT 1', (0, 2))
+
+    def test_aggregation(self):
+        aggregation = Aggregation(group_by=['host'], count=['pages'], sum=['bytes'], min=['first'], max=['last'])
+        merged = aggregation.merge([
+            {'host': 'a', 'pages': 1, 'bytes': 10, 'first': 5, 'last': 5},
+            {'host': 'b', 'pages': 2, 'bytes': None, 'first': 1, 'last': 9},
+            {'host': 'a', 'pages': 3, 'bytes': 20, 'first': 2, 'last': 7},
+        ])
+        assert_equal(merged, [
+            {'host': 'a', 'pages': 4, 'bytes': 30, 'first': 2, 'last': 7},
+            {'host': 'b', 'pages': 2, 'bytes': None, 'first': 1, 'last': 9},
+        ])
+
+    def test_global_aggregation(self):
+        assert_equal(Aggregation(count=['rows']).merge([{'rows': 2}, {'rows': 3}]), [{'rows': 5}])
+
+class ExecutePartitionedTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+        self.partitions = HashPartitions('url_host', 2)
+
+    def test_shards_are_merged(self):
+        server = MockServer(lambda query_str: [['total', 1]])
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=server):
+            result = self.client.execute_partitioned(template, self.partitions, aggregation=Aggregation(group_by=['url_host'], count=['pages']))
+        assert_equal(len(server.queries), 2)
+        assert_equal(result.records, [{'url_host': 'total', 'pages': 2}])
+        assert_equal([shard for shard, batch_result in result.shards], [(0, 2), (1, 2)])
+
+    def test_shard_over_memory_limit_is_split(self):
+        failing = self.partitions.query(template, (1, 2))
+        server = MockServer(lambda query_str: [[query_str[-20:], 1]], {failing: 'EXCEEDED_MEMORY_LIMIT'})
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=server):
+            result = self.client.execute_partitioned(template, self.partitions)
+        assert_equal([shard for shard, batch_result in result.shards], [(0, 2), (1, 4), (3, 4)])
+        assert_equal(result.splits, 1)
+        assert_equal(len(result.records), 3)
+
+    def test_failed_shard_is_run_again(self):
+        failing = self.partitions.query(template, (0, 2))
+        server = MockServer(lambda query_str: [['a', 1]], {failing: 'GENERIC_INTERNAL_ERROR'})
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=server):
+            result = self.client.execute_partitioned(template, self.partitions)
+        assert_equal(result.retries, 1)
+        assert_equal(server.queries.count(failing), 2)
+        assert_equal(len(result.records), 2)
+
+    def test_fatal_shard_error(self):
+        failing = self.partitions.query(template, (0, 2))
+        server = MockServer(lambda query_str: [['a', 1]], {failing: 'SYNTAX_ERROR'})
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=server):
+            try:
+                self.client.execute_partitioned(template, self.partitions)
+            except PartitionError as err:
+                assert_equal([shard for shard, batch_result in err.result.failed], [(0, 2)])
+                assert_equal(len(err.result.shards), 1)
+            else:
+                raise AssertionError('PartitionError not raised')
+        assert_equal(server.queries.count(failing), 1)
+
+    def test_rejected_shard_is_not_run_again(self):
+        failing = self.partitions.query(template, (0, 2))
+        server = MockServer(lambda query_str: [['a', 1]], rejects={failing: 400})
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=server):
+            try:
+                self.client.execute_partitioned(template, self.partitions)
+            except PartitionError as err:
+                assert_equal(err.result.failed[0][1].error.status_code, 400)
+                assert_equal(err.result.retries, 0)
+            else:
+                raise AssertionError('PartitionError not raised')
+        assert_equal(server.submissions.count(failing), 1)
+
+    def test_shard_lost_on_submission_is_not_run_again(self):
+        failing = self.partitions.query(template, (0, 2))
+        server = MockServer(lambda query_str: [['a', 1]], rejects={failing: requests.exceptions.ConnectionError()})
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=server):
+            try:
+                self.client.execute_partitioned(template, self.partitions)
+            except PartitionError as err:
+                assert_equal(err.result.retries, 0)
+            else:
+                raise AssertionError('PartitionError not raised')
+        assert_equal(server.submissions.count(failing), 1)
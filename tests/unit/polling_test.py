@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import mock
+from nose.tools import assert_equal, assert_true
+from unittest import TestCase
+
+from mixnode import Mixnode
+from mixnode.polling import ConstantPolling, ExponentialBackoff
+
+from tests.unit.api_client_test import mocked_requests, query
+
+class PollingPolicyTest(TestCase):
+    def test_constant_polling(self):
+        policy = ConstantPolling(3)
+        assert_equal(policy.delay(1), 3)
+        assert_equal(policy.delay(10), 3)
+
+    def test_exponential_backoff_without_jitter(self):
+        policy = ExponentialBackoff(initial=1, factor=2, maximum=5, jitter=0)
+        assert_equal([policy.delay(attempt) for attempt in range(1, 6)], [1, 2, 4, 5, 5])
+
+    def test_exponential_backoff_after_many_attempts(self):
+        policy = ExponentialBackoff(initial=0.5, factor=2, maximum=30, jitter=0)
+        assert_equal(policy.delay(2000), 30)
+        assert_equal(policy.delay(10 ** 9), 30)
+
+    def test_exponential_backoff_jitter_is_bounded(self):
+        policy = ExponentialBackoff(initial=1, factor=2, maximum=5, jitter=0.5)
+        for _ in range(100):
+            delay = policy.delay(2)
+            assert_true(1 <= delay <= 3)
+            assert_true(policy.delay(10) <= 5)
+
+class PollingTest(TestCase):
+    @mock.patch('mixnode.api_client.time.sleep')
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests)
+    def test_sleeps_only_while_query_in_progress(self, mock_request, mock_sleep):
+        client = Mixnode('XXXXX')
+        client.setPollingPolicy(ExponentialBackoff(initial=7, jitter=0))
+        client.execute(query)
+        # Page 1 is PLANNING, page 2 is FINISHED and last
+        mock_sleep.assert_called_once_with(7)
+
+    def test_set_lag_installs_constant_policy(self):
+        client = Mixnode('XXXXX')
+        client.setLag(0)
+        assert_true(isinstance(client.pollingPolicy, ConstantPolling))
+        assert_equal(client.pollingPolicy.delay(5), 0)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import mock
+from nose.tools import raises, assert_equal, assert_true
+from unittest import TestCase
+
+from mixnode import Mixnode
+from mixnode.error import ResponseError
+
+from tests.fixtures import ApiClientJsonData
+from tests.fixtures.MockServer import MockResponse
+from tests.unit.api_client_test import endpointUrl, query
+
+query_id = ApiClientJsonData.data['dummyQueryObject']['query_id']
+
+def mocked_finished_pages(pages, failing_page=None):
+    requested = []
+    def request(*args, **kwargs):
+        if args[1] == endpointUrl + '/queries':
+            return MockResponse(ApiClientJsonData.data['dummyQueryObject'])
+        page = int(args[1].rsplit('/', 1)[1])
+        requested.append(page)
+        if page > pages or page == failing_page:
+            return MockResponse({'errors': {'message': 'Not found'}}, 404)
+        payload = {'status': 'FINISHED', 'columns': [{'name': 'page'}], 'rows': [[page]]}
+        if page < pages:
+            payload['next_page'] = endpointUrl + '/queries/' + query_id + '/results/' + str(page + 1)
+        return MockResponse(payload)
+    request.requested = requested
+    return request
+
+class PrefetchTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+        self.client.setPrefetch(4)
+
+    def test_pages_are_delivered_in_order(self):
+        side_effect = mocked_finished_pages(50)
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=side_effect):
+            response = self.client.execute(query)
+        assert_equal([record['page'] for record in response], list(range(1, 51)))
+        # At most window - 1 pages are requested past the last one
+        assert_true(max(side_effect.requested) <= 53)
+
+    def test_pages_past_the_end_are_ignored(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_finished_pages(2)):
+            response = self.client.execute(query)
+        assert_equal(len(response), 2)
+
+    @raises(ResponseError)
+    def test_error_of_a_needed_page_is_raised(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_finished_pages(10, failing_page=5)):
+            self.client.execute(query)
+
+    def test_prefetch_is_disabled_by_default(self):
+        client = Mixnode('XXXXX')
+        side_effect = mocked_finished_pages(5)
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=side_effect):
+            client.execute(query)
+        assert_equal(side_effect.requested, [1, 2, 3, 4, 5])
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import mock
+from nose.tools import raises, assert_equal, assert_true
+from unittest import TestCase
+
+from mixnode import Mixnode
+from mixnode.error import MixnodeError, QueryTimeout, ResponseServerError
+from mixnode.polling import ConstantPolling
+from mixnode.query import Query, PAGINATION_STATE
+
+from tests.fixtures import ApiClientJsonData
+from tests.fixtures.MockServer import MockResponse
+from tests.unit.api_client_test import endpointUrl, mocked_requests, mocked_requests_server_error, query
+
+query_id = ApiClientJsonData.data['dummyQueryObject']['query_id']
+
+def mocked_many_pages(pages):
+    def request(*args, **kwargs):
+        if args[1] == endpointUrl + '/queries':
+            return MockResponse(ApiClientJsonData.data['dummyQueryObject'])
+        page = int(args[1].rsplit('/', 1)[1])
+        payload = {'status': 'FINISHED', 'columns': [{'name': 'page'}], 'rows': [[page]]}
+        if page < pages:
+            payload['next_page'] = endpointUrl + '/queries/' + query_id + '/results/' + str(page + 1)
+        return MockResponse(payload)
+    return request
+
+def mocked_running_pages(calls, status='RUNNING'):
+    """
+    Endless results pages of a query which is still running, recording the
+    requests fired in calls; PLANNING pages have no rows and link to page 1
+    """
+    def request(*args, **kwargs):
+        calls.append((args[0], args[1]))
+        if args[0] == 'DELETE':
+            info = dict(ApiClientJsonData.data['dummyQueryObject'])
+            info['status'] = 'USER_CANCELED'
+            return MockResponse(info)
+        if args[1] == endpointUrl + '/queries':
+            return MockResponse(ApiClientJsonData.data['dummyQueryObject'])
+        page = int(args[1].rsplit('/', 1)[1])
+        if status == 'PLANNING':
+            return MockResponse({'status': status, 'next_page': endpointUrl + '/queries/' + query_id + '/results/1'})
+        return MockResponse({'status': status, 'columns': [{'name': 'page'}], 'rows': [[page]], 'next_page': endpointUrl + '/queries/' + query_id + '/results/' + str(page + 1)})
+    return request
+
+class QueryTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+
+    def test_state_transitions(self):
+        q = Query(self.client, {'query_str': query})
+        assert_equal(q.state, PAGINATION_STATE['SUBMITTED'])
+        assert_equal(q.next_request()['method'], 'POST')
+        assert_equal(q.feed(ApiClientJsonData.data['dummyQueryObject']), False)
+        assert_equal(q.state, PAGINATION_STATE['POLLING'])
+        assert_equal(q.next_request()['uri'], endpointUrl + '/queries/' + query_id + '/results/1')
+        assert_equal(q.feed(ApiClientJsonData.data['dummyPage1Response']), True)
+        assert_equal(q.state, PAGINATION_STATE['POLLING'])
+        assert_equal(q.page, 2)
+        assert_equal(q.feed(ApiClientJsonData.data['dummyPage2Response']), True)
+        assert_equal(q.state, PAGINATION_STATE['DONE'])
+        assert_equal(q.next_request(), None)
+        assert_equal(q.rows, 2)
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests)
+    def test_timings_are_reported(self, mock_request):
+        self.client.execute(query)
+        timings = self.client.lastQuery.timings
+        assert_equal(sorted(timings.keys()), sorted(PAGINATION_STATE.keys()))
+        assert_true(all(value >= 0 for value in timings.values()))
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests_server_error)
+    def test_failed_state(self, mock_request):
+        try:
+            self.client.execute(query)
+        except MixnodeError as err:
+            assert_equal(self.client.lastQuery.state, PAGINATION_STATE['FAILED'])
+            assert_equal(self.client.lastQuery.error, err)
+        else:
+            raise AssertionError('MixnodeError not raised')
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_many_pages(3000))
+    def test_many_pages_in_constant_stack(self, mock_request):
+        response = self.client.execute(query)
+        assert_equal(len(response), 3000)
+        assert_equal(response[-1]['page'], 3000)
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests)
+    def test_attach_resumes_from_page(self, mock_request):
+        response = list(self.client.attach(query_id, 2))
+        assert_equal(mock_request.call_count, 1)
+        assert_equal(response[0]['url'], ApiClientJsonData.data['dummyPage2Response']['rows'][0][0])
+
+    def test_budget_stops_the_state_machine(self):
+        q = Query(self.client, {'query_str': query})
+        q.max_rows = 1
+        q.feed(ApiClientJsonData.data['dummyQueryObject'])
+        q.feed({'status': 'RUNNING', 'columns': [{'name': 'page'}], 'rows': [[1]], 'next_page': endpointUrl + '/queries/' + query_id + '/results/2'})
+        assert_equal(q.state, PAGINATION_STATE['CANCELED'])
+        assert_true(q.isRunning())
+        assert_equal(q.next_request(), None)
+
+    def test_max_rows_cancels_a_running_query(self):
+        calls = []
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_running_pages(calls)):
+            response = self.client.execute(query, max_rows=3)
+        assert_equal([record['page'] for record in response], [1, 2, 3])
+        assert_equal([method for method, uri in calls], ['POST', 'GET', 'GET', 'GET', 'DELETE'])
+        assert_equal(calls[-1][1], endpointUrl + '/queries/' + query_id)
+        assert_equal(self.client.lastQuery.state, PAGINATION_STATE['CANCELED'])
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_many_pages(10))
+    def test_max_rows_of_a_finished_query(self, mock_request):
+        response = self.client.execute(query, max_rows=2)
+        assert_equal(len(response), 2)
+        assert_equal([call[0][0] for call in mock_request.call_args_list], ['POST', 'GET', 'GET'])
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests)
+    def test_no_rows_wanted_does_not_submit(self, mock_request):
+        assert_equal(self.client.execute(query, max_rows=0), [])
+        assert_equal(mock_request.call_count, 0)
+
+    def test_deadline_stops_polling(self):
+        calls = []
+        self.client.setPollingPolicy(ConstantPolling(0.01))
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_running_pages(calls, 'PLANNING')):
+            response = self.client.execute(query, deadline=0.05)
+        assert_equal(response, [])
+        assert_equal(calls[-1][0], 'DELETE')
+        assert_equal(self.client.lastQuery.state, PAGINATION_STATE['CANCELED'])
+
+    def test_closing_the_generator_cancels_the_query(self):
+        calls = []
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_running_pages(calls)):
+            records = self.client.iter_rows(query)
+            assert_equal(next(records)['page'], 1)
+            records.close()
+        assert_equal(calls[-1][0], 'DELETE')
+
+    @raises(ResponseServerError)
+    def test_user_canceled_status_is_an_error(self):
+        response = mock.Mock(status_code=200, content=b'{"status": "USER_CANCELED", "error_msg": null}')
+        self.client._parseResponse(response)
+
+    def test_query_timeout_cancels_the_query(self):
+        calls = []
+        self.client.setPollingPolicy(ConstantPolling(0.01))
+        self.client.setQueryTimeout(0.05)
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_running_pages(calls, 'PLANNING')):
+            try:
+                self.client.execute(query)
+            except QueryTimeout as err:
+                assert_equal(self.client.lastQuery.error, err)
+            else:
+                raise AssertionError('QueryTimeout not raised')
+        assert_equal(calls[-1], ('DELETE', endpointUrl + '/queries/' + query_id))
+        assert_equal([method for method, uri in calls].count('DELETE'), 1)
+        assert_equal(self.client.lastQuery.state, PAGINATION_STATE['FAILED'])
+
+    def test_cancel(self):
+        calls = []
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_running_pages(calls)):
+            self.client.cancel(query_id)
+        assert_equal(calls, [('DELETE', endpointUrl + '/queries/' + query_id)])
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+from array import array
+
+import mock
+from nose.tools import raises, assert_equal, assert_true
+from unittest import TestCase
+
+from mixnode import Mixnode
+from mixnode.resultset import ResultSet
+
+from tests.unit.api_client_test import mocked_requests, query
+
+columns = [
+    {'name': 'url', 'type': 'varchar'},
+    {'name': 'size', 'type': 'bigint'},
+    {'name': 'score', 'type': 'double'}
+]
+
+class ResultSetTest(TestCase):
+    def setUp(self):
+        self.resultset = ResultSet()
+        self.resultset.addPage({'columns': columns, 'rows': [['a', 1, 0.5], ['b', 2, 1.5]]})
+        self.resultset.addPage({'columns': columns, 'rows': [['c', 3, 2.5]]})
+
+    def test_columns(self):
+        assert_equal(len(self.resultset), 3)
+        assert_equal(list(self.resultset['url']), ['a', 'b', 'c'])
+        assert_true(isinstance(self.resultset.column('size'), array))
+        assert_equal(list(self.resultset.column('score')), [0.5, 1.5, 2.5])
+
+    def test_rows(self):
+        assert_equal(self.resultset[1]['url'], 'b')
+        assert_equal(self.resultset[-1], {'url': 'c', 'size': 3, 'score': 2.5})
+        assert_equal([row['size'] for row in self.resultset], [1, 2, 3])
+        assert_equal(len(self.resultset[0:2]), 2)
+
+    @raises(IndexError)
+    def test_row_out_of_range(self):
+        self.resultset[3]
+
+    def test_null_falls_back_to_list(self):
+        self.resultset.addPage({'columns': columns, 'rows': [['d', 4, 1.0], ['e', None, 'NaN']]})
+        assert_equal(list(self.resultset['size']), [1, 2, 3, 4, None])
+        assert_equal(list(self.resultset['score']), [0.5, 1.5, 2.5, 1.0, 'NaN'])
+        assert_equal(len(self.resultset), 5)
+
+    def test_to_records(self):
+        records = self.resultset.to_records()
+        assert_equal(records[0], {'url': 'a', 'size': 1, 'score': 0.5})
+        assert_equal(len(records), 3)
+
+    def test_empty_pages_are_skipped(self):
+        resultset = ResultSet()
+        resultset.addPage({'columns': [], 'rows': []})
+        assert_equal(len(resultset), 0)
+        assert_equal(resultset.to_records(), [])
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests)
+    def test_execute_columnar(self, mock_request):
+        client = Mixnode('XXXXX')
+        client.setLag(0)
+        resultset = client.execute_columnar(query)
+        assert_equal(resultset.to_records(), client.execute(query))
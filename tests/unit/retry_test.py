@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import email.utils
+import json
+import sys
+import time
+
+import mock
+import requests
+from nose.tools import raises, assert_equal, assert_true
+from unittest import TestCase, skipIf
+
+from mixnode import Mixnode, RetryPolicy, ConstantPolling
+from mixnode.error import ResponseError, ResponseServerError, Network, RequestTimeout, MissingQuery
+from mixnode.retry import isTransient, retryAfter
+
+from tests.fixtures.MockServer import MockResponse
+from tests.unit.api_client_test import mocked_requests, query
+
+def failing(failures, status_code=502, method=None, headers=None):
+    """
+    Fails the first ``failures`` requests (of a method) before answering them
+    """
+    remaining = [failures]
+    def request(*args, **kwargs):
+        if remaining[0] and (method is None or args[0] == method):
+            remaining[0] -= 1
+            if isinstance(status_code, Exception):
+                raise status_code
+            return MockResponse(None, status_code, headers, 'Bad Gateway')
+        return mocked_requests(*args, **kwargs)
+    return request
+
+def error(status_code, headers=None):
+    return ResponseError(MockResponse(None, status_code, headers, 'Bad Gateway'))
+
+class ClassificationTest(TestCase):
+    def test_transient_errors(self):
+        assert_true(isTransient(Network()))
+        assert_true(isTransient(RequestTimeout()))
+        assert_true(isTransient(error(503)))
+        assert_true(isTransient(error(429)))
+
+    def test_permanent_errors(self):
+        assert_equal(isTransient(error(403)), False)
+        assert_equal(isTransient(error(404)), False)
+        assert_equal(isTransient(ResponseServerError({'status': 'INSUFFICIENT_RESOURCES', 'message': ''})), False)
+        assert_equal(isTransient(ResponseServerError({'status': 'SYNTAX_ERROR', 'message': ''})), False)
+        assert_equal(isTransient(ResponseServerError({'status': 'PERMISSION_DENIED', 'message': ''})), False)
+        assert_equal(isTransient(MissingQuery()), False)
+
+    def test_non_json_error_body(self):
+        assert_equal(error(502).message, 'Bad Gateway')
+
+    def test_retry_after(self):
+        assert_equal(retryAfter(error(503, {'Retry-After': '7'})), 7)
+        date = email.utils.formatdate(time.time() + 60, usegmt=True)
+        assert_true(55 < retryAfter(error(503, {'Retry-After': date})) <= 60)
+        assert_equal(retryAfter(error(503)), None)
+
+    def test_post_is_only_retried_when_turned_down(self):
+        policy = RetryPolicy()
+        assert_equal(policy.isRetryable('POST', error(502)), False)
+        assert_equal(policy.isRetryable('POST', Network()), False)
+        assert_true(policy.isRetryable('POST', error(429)))
+        assert_true(policy.isRetryable('GET', error(502)))
+
+@mock.patch('mixnode.api_client.time.sleep')
+class RetryTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+
+    def test_page_is_fetched_again(self, sleep):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=failing(2, method='GET')) as mock_request:
+            response = self.client.execute(query)
+        assert_equal(len(response), 2)
+        assert_equal(mock_request.call_count, 5)
+        assert_equal(self.client.lastQuery.retries, 2)
+        assert_equal(sleep.call_count, 2)
+
+    def test_retry_after_is_honored(self, sleep):
+        side_effect = failing(1, 503, 'GET', {'Retry-After': '3'})
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=side_effect):
+            self.client.execute(query)
+        sleep.assert_called_once_with(3.0)
+
+    @raises(ResponseError)
+    def test_post_is_never_duplicated(self, sleep):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=failing(1, 502, 'POST')) as mock_request:
+            try:
+                self.client.execute(query)
+            finally:
+                assert_equal(mock_request.call_count, 1)
+
+    def test_rate_limited_post_is_retried(self, sleep):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=failing(1, 429, 'POST')) as mock_request:
+            response = self.client.execute(query)
+        assert_equal(len(response), 2)
+        assert_equal(mock_request.call_count, 4)
+
+    @raises(ResponseError)
+    def test_permanent_error_is_not_retried(self, sleep):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=failing(1, 403, 'GET')) as mock_request:
+            try:
+                self.client.execute(query)
+            finally:
+                assert_equal(mock_request.call_count, 2)
+
+    def test_failed_query_is_not_fetched_again(self, sleep):
+        def request(*args, **kwargs):
+            if args[0] == 'GET':
+                return mock.Mock(status_code=200, content=json.dumps({'status': 'INSUFFICIENT_RESOURCES', 'error_msg': 'Not enough resources'}).encode('utf-8'))
+            return mocked_requests(*args, **kwargs)
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=request) as mock_request:
+            try:
+                self.client.execute(query)
+            except ResponseServerError as err:
+                assert_equal(err.status, 'INSUFFICIENT_RESOURCES')
+            else:
+                raise AssertionError('ResponseServerError not raised')
+        assert_equal([call[0][0] for call in mock_request.call_args_list], ['POST', 'GET'])
+        assert_equal(sleep.call_count, 0)
+
+    def test_network_errors_are_retried(self, sleep):
+        side_effect = failing(1, requests.exceptions.ConnectionError('reset'), 'GET')
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=side_effect):
+            response = self.client.execute(query)
+        assert_equal(len(response), 2)
+        assert_equal(self.client.lastQuery.retries, 1)
+
+    def test_gives_up_after_max_retries(self, sleep):
+        self.client.setRetryPolicy(RetryPolicy(max_retries=2))
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=failing(10, 502, 'GET')) as mock_request:
+            try:
+                self.client.execute(query)
+            except ResponseError as err:
+                assert_equal(err.status_code, 502)
+            else:
+                raise AssertionError('ResponseError not raised')
+        assert_equal(mock_request.call_count, 4)
+        assert_equal(self.client.lastQuery.state, 'FAILED')
+
+    def test_retries_can_be_disabled(self, sleep):
+        self.client.setRetryPolicy(None)
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=failing(1, 502, 'GET')) as mock_request:
+            try:
+                self.client.execute(query)
+            except ResponseError:
+                pass
+        assert_equal(mock_request.call_count, 2)
+
+    def test_retries_are_reported_per_query_of_a_batch(self, sleep):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=failing(1, 502, 'GET')):
+            results = self.client.execute_many([query, query], max_workers=1)
+        assert_equal(sum(result.retries for result in results), 1)
+        assert_equal(self.client.lastBatchStats.retries, 1)
+
+@skipIf(sys.version_info < (3, 6), 'asyncio client requires Python 3.6')
+class AsyncRetryTest(TestCase):
+    def test_page_is_fetched_again(self):
+        from mixnode import AsyncMixnode
+        from tests.unit.async_client_test import MockAsyncTransport, run
+        transport = MockAsyncTransport(failing(1, 502, 'GET'))
+        client = AsyncMixnode('XXXXX', transport=transport)
+        client.setLag(0)
+        client.setRetryPolicy(RetryPolicy(backoff=ConstantPolling(0)))
+        response = run(client.execute(query))
+        assert_equal(len(response), 2)
+        assert_equal(client.lastQuery.retries, 1)
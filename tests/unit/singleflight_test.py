@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import asyncio
+import threading
+import time
+
+import mock
+from nose.tools import assert_equal, assert_true
+from unittest import TestCase
+
+from mixnode import Mixnode
+from mixnode.error import ResponseServerError
+from mixnode.singleflight import SingleFlight
+
+from tests.unit.api_client_test import query, mocked_requests_server_error
+from tests.unit.query_test import mocked_many_pages
+
+def slowly(side_effect, delay=0.2):
+    def request(*args, **kwargs):
+        if args[0] == 'POST':
+            time.sleep(delay)
+        return side_effect(*args, **kwargs)
+    return request
+
+def run_concurrently(target, count):
+    results = [None] * count
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as err:
+            results[index] = err
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+class SingleFlightTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+        self.client.setSingleFlight(SingleFlight())
+
+    def posts(self, mock_request):
+        return len([call for call in mock_request.call_args_list if call[0][0] == 'POST'])
+
+    def test_concurrent_identical_queries_share_one_query(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=slowly(mocked_many_pages(20))) as mock_request:
+            results = run_concurrently(lambda: self.client.execute(query), 5)
+        assert_equal(self.posts(mock_request), 1)
+        assert_equal(mock_request.call_count, 21)
+        assert_true(all(len(result) == 20 for result in results))
+        assert_equal(len(self.client.singleFlight), 0)
+
+    def test_different_queries_do_not_share(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=slowly(mocked_many_pages(2))) as mock_request:
+            run_concurrently(lambda: self.client.execute(query + str(threading.current_thread().ident)), 3)
+        assert_equal(self.posts(mock_request), 3)
+
+    def test_sequential_queries_do_not_share(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_many_pages(2)) as mock_request:
+            self.client.execute(query)
+            self.client.execute(query)
+        assert_equal(self.posts(mock_request), 2)
+
+    def test_error_is_raised_to_every_caller(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=slowly(mocked_requests_server_error)) as mock_request:
+            results = run_concurrently(lambda: self.client.execute(query), 3)
+        assert_equal(self.posts(mock_request), 1)
+        assert_true(all(isinstance(result, ResponseServerError) for result in results))
+
+    def test_abandoning_subscriber_does_not_stop_the_others(self):
+        group = SingleFlight()
+        closed = []
+        def run(query):
+            try:
+                for page in range(1, 6):
+                    yield page
+            finally:
+                closed.append(query)
+        _, first = group.join('key', 'query', run)
+        _, second = group.join('key', 'other query', run)
+        assert_equal(next(first), 1)
+        assert_equal(next(second), 1)
+        first.close()
+        assert_equal(list(second), [2, 3, 4, 5])
+        assert_equal(closed, ['query'])
+        assert_equal(len(group), 0)
+
+    def test_abandoning_every_subscriber_closes_the_query(self):
+        group = SingleFlight()
+        closed = []
+        def run(query):
+            try:
+                for page in range(1, 6):
+                    yield page
+            finally:
+                closed.append(query)
+        _, first = group.join('key', 'query', run)
+        assert_equal(next(first), 1)
+        first.close()
+        assert_equal(closed, ['query'])
+        assert_equal(len(group), 0)
+
+    def test_late_caller_starts_a_new_flight(self):
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_many_pages(5)) as mock_request:
+            first = self.client.iter_rows(query)
+            next(first)
+            next(first)
+            # The first page was released, so it can't be replayed
+            second = list(self.client.iter_rows(query))
+            assert_equal(len(second), 5)
+            assert_equal(len(list(first)), 3)
+        assert_equal(self.posts(mock_request), 2)
+
+class AsyncSingleFlightTest(TestCase):
+    def test_concurrent_identical_queries_share_one_query(self):
+        from mixnode.async_client import AsyncMixnode, AsyncSingleFlight
+        from tests.unit.async_client_test import MockAsyncTransport, run
+        transport = MockAsyncTransport(mocked_many_pages(10))
+        client = AsyncMixnode('XXXXX', transport=transport)
+        client.setLag(0)
+        client.setSingleFlight(AsyncSingleFlight())
+        with mock.patch.object(transport, 'side_effect', wraps=transport.side_effect) as side_effect:
+            async def many():
+                return await asyncio.gather(*[client.execute(query) for _ in range(5)])
+            results = run(many())
+        assert_true(all(len(result) == 10 for result in results))
+        assert_equal(side_effect.call_count, 11)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import csv
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import mock
+from nose.tools import assert_equal, assert_true
+from unittest import TestCase, skipIf
+
+from mixnode import Mixnode, MemorySink, NdjsonSink, CsvSink, ParquetSink, SqliteSink
+from mixnode.sink import FSYNC_PAGE
+
+from tests.unit.api_client_test import query
+from tests.unit.decoder_test import columns
+from tests.unit.export_test import mocked_pages
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+class SinkTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_pages)
+    def test_memory_sink_matches_execute(self, mock_request):
+        sink = self.client.execute_to(MemorySink(), query)
+        assert_equal(sink.rows, 4)
+        assert_equal(sink.records, self.client.execute(query))
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_pages)
+    def test_ndjson_sink(self, mock_request):
+        self.client.setDecodeTypes(True)
+        sink = self.client.execute_to(NdjsonSink(self.path('results.ndjson'), fsync=FSYNC_PAGE), query)
+        with io.open(self.path('results.ndjson'), encoding='utf-8') as results:
+            records = [json.loads(line) for line in results]
+        assert_equal(sink.rows, 4)
+        assert_equal(len(records), 4)
+        assert_equal(records[0]['price'], '12.50')
+        assert_equal(records[0]['crawled'], '2019-03-01T10:20:30.123000')
+        assert_equal(records[0]['body'], 'aGk=')
+        assert_equal(records[1]['size'], None)
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_pages)
+    def test_csv_sink(self, mock_request):
+        self.client.execute_to(CsvSink(self.path('results.csv')), query)
+        with io.open(self.path('results.csv'), encoding='utf-8', newline='') as results:
+            lines = list(csv.reader(results))
+        assert_equal(lines[0], [column['name'] for column in columns])
+        assert_equal(len(lines), 5)
+        assert_equal(lines[1][0], 'http://a.com/')
+        assert_equal(json.loads(lines[1][8]), ['2019-03-02'])
+        assert_equal(lines[2][1], '')
+
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_pages)
+    def test_sqlite_sink(self, mock_request):
+        self.client.setDecodeTypes(True)
+        self.client.execute_to(SqliteSink(self.path('results.db'), 'homepages', batch_rows=1), query)
+        connection = sqlite3.connect(self.path('results.db'))
+        try:
+            selected = connection.execute('SELECT url, size, score, price, day, body FROM homepages').fetchall()
+            affinity = connection.execute("SELECT type FROM pragma_table_info('homepages') WHERE name = 'size'").fetchone()
+        finally:
+            connection.close()
+        assert_equal(len(selected), 4)
+        assert_equal(selected[0][0], 'http://a.com/')
+        assert_equal(selected[0][1], 10)
+        assert_equal(selected[0][3:], ('12.50', '2019-03-01', b'hi'))
+        assert_equal(affinity, ('INTEGER',))
+
+    def test_sink_is_closed_when_the_query_fails(self):
+        sink = mock.Mock(decode=True)
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=IOError()):
+            try:
+                self.client.execute_to(sink, query)
+            except IOError:
+                pass
+        assert_true(sink.close.called)
+
+    @skipIf(pyarrow is None, 'pyarrow is not installed')
+    @mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_pages)
+    def test_parquet_sink(self, mock_request):
+        self.client.setDecodeTypes(True)
+        self.client.execute_to(ParquetSink(self.path('results.parquet'), row_group_rows=2), query)
+        parquet = pyarrow.parquet.ParquetFile(self.path('results.parquet'))
+        assert_equal(parquet.metadata.num_rows, 4)
+        assert_equal(parquet.metadata.num_row_groups, 2)
+        assert_equal(parquet.schema_arrow.field('size').type, pyarrow.int64())
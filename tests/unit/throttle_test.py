@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import mock
+from nose.tools import assert_equal, assert_true
+from unittest import TestCase, skipIf
+
+from mixnode import Mixnode, Throttle
+from mixnode.throttle import TokenBucket, FileTokenBucket, FileQueryGovernor
+
+from tests.unit.api_client_test import mocked_requests, query
+from tests.unit.jsonbackend_test import mocked_raw_requests
+
+class InFlight(object):
+    """
+    Counts the queries in flight, from their submission to their last page
+    """
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.current = 0
+        self.maximum = 0
+
+    def __call__(self, *args, **kwargs):
+        if args[0] == 'POST':
+            with self.lock:
+                self.current += 1
+                self.maximum = max(self.maximum, self.current)
+        time.sleep(self.delay)
+        response = mocked_requests(*args, **kwargs)
+        if args[1].endswith('/results/2'):
+            with self.lock:
+                self.current -= 1
+        return response
+
+class TokenBucketTest(TestCase):
+    @mock.patch('mixnode.throttle._clock', return_value=100.0)
+    def test_reservations_queue_up(self, clock):
+        bucket = TokenBucket(rate=2, capacity=2)
+        assert_equal(bucket.reserve(), 0)
+        assert_equal(bucket.reserve(), 0)
+        assert_equal(bucket.reserve(), 0.5)
+        assert_equal(bucket.reserve(), 1.0)
+        clock.return_value = 101.0
+        assert_equal(bucket.reserve(), 0.5)
+
+    @mock.patch('mixnode.throttle._clock', return_value=100.0)
+    def test_large_reservation(self, clock):
+        bucket = TokenBucket(rate=1000)
+        assert_equal(bucket.reserve(3000), 2.0)
+
+class FileThrottleTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'mixnode')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_bucket_is_shared_through_its_file(self):
+        first = FileTokenBucket(self.path, rate=1, capacity=1)
+        second = FileTokenBucket(self.path, rate=1, capacity=1)
+        assert_equal(first.reserve(), 0)
+        assert_true(0.9 < second.reserve() <= 1)
+
+    def test_query_slots_are_shared_through_files(self):
+        first = FileQueryGovernor(self.path, 1)
+        second = FileQueryGovernor(self.path, 1)
+        slot = first.tryAcquire()
+        assert_true(slot is not None)
+        assert_equal(second.tryAcquire(), None)
+        first.release(slot)
+        other = second.tryAcquire()
+        assert_true(other is not None)
+        second.release(other)
+
+class ThrottleTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+
+    @mock.patch('mixnode.api_client.time.sleep')
+    def test_request_rate(self, sleep):
+        self.client.setThrottle(Throttle(requests_per_second=1))
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_requests):
+            self.client.execute(query)
+        # POST /queries goes through the bucket, both pages wait for a token
+        delays = [call[0][0] for call in sleep.call_args_list]
+        assert_equal(len(delays), 2)
+        assert_true(all(0.9 < delay <= 2 for delay in delays))
+
+    @mock.patch('mixnode.api_client.time.sleep')
+    def test_byte_rate(self, sleep):
+        self.client.setThrottle(Throttle(bytes_per_second=100))
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=mocked_raw_requests):
+            self.client.execute(query)
+        # Every response is larger than a second worth of bytes
+        assert_equal(sleep.call_count, 3)
+        assert_true(all(delay[0][0] > 0 for delay in sleep.call_args_list))
+
+    def test_queries_in_flight_are_bounded_across_clients(self):
+        throttle = Throttle(max_queries=2)
+        in_flight = InFlight()
+        clients = [Mixnode('XXXXX') for _ in range(5)]
+        threads = []
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=in_flight):
+            for client in clients:
+                client.setLag(0)
+                client.setThrottle(throttle)
+                threads.append(threading.Thread(target=client.execute, args=(query,)))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert_equal(in_flight.maximum, 2)
+        assert_equal(in_flight.current, 0)
+
+    def test_batch_queries_in_flight_are_bounded(self):
+        self.client.setThrottle(Throttle(max_queries=2))
+        in_flight = InFlight()
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=in_flight):
+            results = self.client.execute_many([query] * 6, max_workers=6)
+        assert_true(all(result.isSuccessful() for result in results))
+        assert_equal(in_flight.maximum, 2)
+
+@skipIf(sys.version_info < (3, 6), 'asyncio client requires Python 3.6')
+class AsyncThrottleTest(TestCase):
+    def test_queries_in_flight_are_bounded(self):
+        import asyncio
+        from mixnode import AsyncMixnode
+        from tests.unit.async_client_test import MockAsyncTransport, run
+        in_flight = InFlight(delay=0)
+        client = AsyncMixnode('XXXXX', transport=MockAsyncTransport(in_flight), concurrency=5)
+        client.setLag(0)
+        client.setThrottle(Throttle(max_queries=1))
+        async def many():
+            return await asyncio.gather(*[client.execute(query) for _ in range(5)])
+        results = run(many())
+        assert_true(all(len(result) == 2 for result in results))
+        assert_equal(in_flight.maximum, 1)
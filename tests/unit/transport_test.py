@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import gzip
+import json
+import socket
+import threading
+import time
+
+import mock
+from nose.tools import raises, assert_equal, assert_true
+from unittest import TestCase
+
+from mixnode import Mixnode
+from mixnode.error import MissingDependency, Network, RequestTimeout
+from mixnode.transport import RequestsTransport, HttpxTransport, TIMEOUT
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from tests.unit.api_client_test import mocked_requests, query
+
+class GzipHandler(BaseHTTPRequestHandler):
+    body = json.dumps({'status': 'FINISHED', 'columns': [{'name': 'content'}], 'rows': [['<html>' * 1000]]}).encode('utf-8')
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.accept_encoding = self.headers.get('Accept-Encoding')
+        body = gzip.compress(self.body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class TruncatedHandler(BaseHTTPRequestHandler):
+    """
+    Sends the first bytes of a download, then stalls for ``stall`` seconds
+    and drops the connection
+    """
+    stall = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '1000')
+        self.end_headers()
+        self.wfile.write(b'url,title\n')
+        self.wfile.flush()
+        time.sleep(self.stall)
+
+def streamTruncated(stall):
+    TruncatedHandler.stall = stall
+    server = HTTPServer(('127.0.0.1', 0), TruncatedHandler)
+    thread = threading.Thread(target=server.handle_request)
+    thread.start()
+    try:
+        transport = RequestsTransport(timeout=(1, 0.05))
+        for chunk in transport.stream('http://127.0.0.1:%d/results.csv' % server.server_address[1], 4):
+            pass
+    finally:
+        thread.join()
+        server.server_close()
+
+class TransportTest(TestCase):
+    def test_default_transport_is_pooled_session(self):
+        client = Mixnode('XXXXX', pool_maxsize=3)
+        assert_true(isinstance(client.transport, RequestsTransport))
+        adapter = client.transport.session.get_adapter('https://api.mixnode.com')
+        assert_equal(adapter._pool_maxsize, 3)
+
+    def test_session_is_reused_across_pages(self):
+        client = Mixnode('XXXXX')
+        client.setLag(0)
+        with mock.patch.object(client.transport.session, 'request', side_effect=mocked_requests) as mock_request:
+            client.execute(query)
+        # POST /queries + two results pages, all through the same session
+        assert_equal(mock_request.call_count, 3)
+        for call in mock_request.call_args_list:
+            assert_equal(call[1]['auth'], ('XXXXX:', ''))
+            assert_equal(call[1]['timeout'], TIMEOUT)
+
+    def test_timeout(self):
+        assert_equal(Mixnode('XXXXX', timeout=(3, 30)).transport.timeout, (3, 30))
+        assert_equal(RequestsTransport(timeout=5).timeout, (5, 5))
+
+    @raises(RequestTimeout)
+    def test_silent_server_raises_request_timeout(self):
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        try:
+            RequestsTransport(timeout=(1, 0.05)).request('GET', 'http://127.0.0.1:%d/queries' % listener.getsockname()[1])
+        finally:
+            listener.close()
+
+    def test_custom_transport(self):
+        transport = mock.Mock()
+        transport.request.side_effect = mocked_requests
+        with Mixnode('XXXXX', transport=transport) as client:
+            client.setLag(0)
+            response = client.execute(query)
+        assert_equal(len(response), 2)
+        assert_true(transport.close.called)
+
+    @raises(MissingDependency)
+    def test_httpx_transport_missing_dependency(self):
+        with mock.patch.dict('sys.modules', {'httpx': None}):
+            HttpxTransport()
+
+    def test_compressed_responses_are_counted(self):
+        server = HTTPServer(('127.0.0.1', 0), GzipHandler)
+        thread = threading.Thread(target=server.handle_request)
+        thread.start()
+        try:
+            client = Mixnode('XXXXX')
+            url = 'http://127.0.0.1:%d/queries/q1/results/1' % server.server_address[1]
+            payload = client._parseResponse(client.transport.request('GET', url))
+        finally:
+            thread.join()
+            server.server_close()
+        assert_equal(payload['rows'][0][0], '<html>' * 1000)
+        assert_true('gzip' in server.accept_encoding)
+        stats = client.transferStats
+        assert_equal(stats.responses, 1)
+        assert_equal(stats.decodedBytes, len(GzipHandler.body))
+        assert_true(stats.wireBytes < stats.decodedBytes / 10)
+        assert_true(stats.compressionRatio() > 10)
+
+    def test_downloads_are_counted(self):
+        server = HTTPServer(('127.0.0.1', 0), GzipHandler)
+        thread = threading.Thread(target=server.handle_request)
+        thread.start()
+        try:
+            transport = RequestsTransport()
+            content = b''.join(transport.stream('http://127.0.0.1:%d/results.csv' % server.server_address[1], 512))
+        finally:
+            thread.join()
+            server.server_close()
+        assert_equal(content, GzipHandler.body)
+        assert_equal(transport.stats.decodedBytes, len(GzipHandler.body))
+        assert_true(transport.stats.wireBytes < len(GzipHandler.body) / 10)
+
+    @raises(Network)
+    def test_download_cut_mid_body_raises_network(self):
+        streamTruncated(0)
+
+    @raises(RequestTimeout)
+    def test_download_stalled_mid_body_raises_request_timeout(self):
+        streamTruncated(0.5)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# Mixnode Python SDK
+# Turn the web into a database
+# A fast, flexible and massively scalable platform to extract and analyze data from the web.
+#
+# Contact: hi@mixnode.com
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import sys
+import threading
+
+try:
+    from urllib.request import Request, urlopen
+    from urllib.error import HTTPError
+except ImportError:
+    from urllib2 import Request, urlopen, HTTPError
+
+import mock
+from nose.tools import raises, assert_equal, assert_true
+from unittest import TestCase, skipIf
+
+from mixnode import Mixnode
+from mixnode.error import MissingWebhook, ResponseServerError
+from mixnode.metrics import SLEEP_WEBHOOK
+from mixnode.webhook import WebhookReceiver
+
+from tests.fixtures import ApiClientJsonData
+from tests.unit.api_client_test import endpointUrl, query
+from tests.unit.query_test import mocked_many_pages, query_id
+
+if sys.version_info >= (3, 6):
+    from mixnode import AsyncMixnode
+    from tests.unit.async_client_test import MockAsyncTransport, run
+
+def notify(url, info, content_type='application/json'):
+    """
+    Calls a webhook the way Mixnode server does
+    """
+    if content_type == 'application/json':
+        body = json.dumps(info)
+    else:
+        body = '&'.join(key + '=' + value for key, value in info.items())
+    urlopen(Request(url, body.encode('utf-8'), {'Content-Type': content_type})).close()
+
+def finished(status='FINISHED', error_msg=None):
+    info = dict(ApiClientJsonData.data['dummyQueryObject'])
+    info['status'] = status
+    info['error_msg'] = error_msg
+    return info
+
+class StandIn(object):
+    """
+    Stand-in for Mixnode server: serves two results pages and calls the
+    webhook of a submitted query once it is over
+    """
+    def __init__(self, info=None, delay=0.05, notifies=True):
+        self.info = info or finished()
+        self.notifies = notifies
+        self.delay = delay
+        self.uris = []
+        self.forms = []
+        self.pages = mocked_many_pages(2)
+
+    def __call__(self, *args, **kwargs):
+        self.uris.append(args[1])
+        if args[0] == 'POST':
+            self.forms.append(kwargs.get('data'))
+            if self.notifies:
+                threading.Timer(self.delay, notify, (kwargs['data']['webhook_url'], self.info)).start()
+        if args[1] == endpointUrl + '/queries/' + query_id:
+            return mock.Mock(status_code=200, content=json.dumps(finished()).encode('utf-8'))
+        return self.pages(*args, **kwargs)
+
+class WebhookReceiverTest(TestCase):
+    def setUp(self):
+        self.receiver = WebhookReceiver(poll_interval=0.05)
+
+    def tearDown(self):
+        self.receiver.close()
+
+    def test_webhook_arriving_before_the_waiter_is_kept(self):
+        notify(self.receiver.url, finished())
+        assert_equal(self.receiver.wait(query_id, 1)['status'], 'FINISHED')
+
+    def test_webhook_wakes_up_the_waiter(self):
+        threading.Timer(0.05, notify, (self.receiver.url, finished())).start()
+        assert_equal(self.receiver.wait(query_id, 5)['query_id'], query_id)
+
+    def test_form_encoded_webhook(self):
+        notify(self.receiver.url, {'query_id': query_id, 'status': 'FINISHED'}, 'application/x-www-form-urlencoded')
+        assert_equal(self.receiver.wait(query_id, 1), {'query_id': query_id, 'status': 'FINISHED'})
+
+    def test_webhook_wakes_up_every_waiter(self):
+        received = []
+        waiters = [threading.Thread(target=lambda: received.append(self.receiver.wait(query_id, 5))) for _ in range(3)]
+        for waiter in waiters:
+            waiter.start()
+        threading.Timer(0.05, notify, (self.receiver.url, finished())).start()
+        for waiter in waiters:
+            waiter.join()
+        assert_equal([info['query_id'] for info in received], [query_id] * 3)
+
+    def test_wait_times_out(self):
+        assert_equal(self.receiver.wait(query_id, 0.01), None)
+
+    def test_unknown_path_is_rejected(self):
+        try:
+            notify(self.receiver.url.rsplit('/', 1)[0] + '/other', finished())
+        except HTTPError as err:
+            assert_equal(err.code, 404)
+        else:
+            raise AssertionError('the webhook was accepted')
+        assert_equal(self.receiver.wait(query_id, 0.01), None)
+
+    def test_public_url(self):
+        receiver = WebhookReceiver(public_url='https://hooks.example.com/mixnode/')
+        receiver.close()
+        assert_true(receiver.url.startswith('https://hooks.example.com/mixnode/'))
+        assert_equal(receiver.url.rsplit('/', 1)[1], receiver.token)
+
+class WebhookClientTest(TestCase):
+    def setUp(self):
+        self.client = Mixnode('XXXXX')
+        self.client.setLag(0)
+        self.client.setWebhook(WebhookReceiver(poll_interval=5))
+
+    def tearDown(self):
+        self.client.webhook.close()
+
+    def test_results_are_paged_once_notified(self):
+        stand_in = StandIn()
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=stand_in):
+            records = self.client.execute(query, wait='webhook')
+        assert_equal(records, [{'page': 1}, {'page': 2}])
+        assert_equal(stand_in.forms[0]['webhook_url'], self.client.webhook.url)
+        assert_equal(stand_in.uris[1:], [endpointUrl + '/queries/' + query_id + '/results/1', endpointUrl + '/queries/' + query_id + '/results/2'])
+        assert_true(SLEEP_WEBHOOK in self.client.lastQuery.metrics.sleeps)
+
+    def test_lost_webhook_falls_back_to_polling(self):
+        self.client.webhook.poll_interval = 0.05
+        stand_in = StandIn(notifies=False)
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=stand_in):
+            records = self.client.execute(query, wait='webhook')
+        assert_equal(len(records), 2)
+        assert_equal(stand_in.uris[1], endpointUrl + '/queries/' + query_id)
+
+    @raises(ResponseServerError)
+    def test_failed_query(self):
+        stand_in = StandIn(finished('FAILED', 'Query failed'))
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=stand_in):
+            self.client.execute(query, wait='webhook')
+
+    def test_batch_waits_for_webhooks(self):
+        stand_in = StandIn()
+        with mock.patch('mixnode.transport.requests.Session.request', side_effect=stand_in):
+            results = self.client.execute_many([query], wait='webhook')
+        assert_equal(results[0].records, [{'page': 1}, {'page': 2}])
+        assert_true(endpointUrl + '/queries/' + query_id not in stand_in.uris)
+
+    @raises(ValueError)
+    def test_unknown_wait_mode(self):
+        self.client.execute(query, wait='sleep')
+
+    @raises(MissingWebhook)
+    def test_webhook_without_receiver(self):
+        client = Mixnode('XXXXX')
+        client.execute(query, wait='webhook')
+
+@skipIf(sys.version_info < (3, 6), 'asyncio client requires Python 3.6')
+class AsyncWebhookTest(TestCase):
+    def test_results_are_paged_once_notified(self):
+        stand_in = StandIn()
+        client = AsyncMixnode('XXXXX', transport=MockAsyncTransport(lambda method, uri: stand_in(method, uri, data=client.lastQuery.form_params)))
+        client.setLag(0)
+        client.setWebhook(WebhookReceiver())
+        try:
+            records = run(client.execute(query, wait='webhook'))
+        finally:
+            client.webhook.close()
+        assert_equal(records, [{'page': 1}, {'page': 2}])
+        assert_equal(stand_in.uris[1:], [endpointUrl + '/queries/' + query_id + '/results/1', endpointUrl + '/queries/' + query_id + '/results/2'])